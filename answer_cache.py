@@ -0,0 +1,174 @@
+"""
+LiveSearch Answer Cache
+Final answers keyed on the optimized search query. Lookups are by similarity
+(character n-gram TF-IDF cosine), so rephrasings of a recent question reuse its answer
+and source URLs without searching, fetching or calling the LLM again.
+"""
+
+import json
+import math
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import Counter, namedtuple
+
+from .cache_store import CACHE_DIR, query_key_terms
+
+CachedAnswer = namedtuple("CachedAnswer", ["query", "answer", "source_urls", "created_at", "similarity"])
+
+PUNCTUATION = re.compile(r"[^\w\s]")
+WHITESPACE = re.compile(r"\s+")
+# Spaces next to CJK characters carry no meaning ("北京 天气" == "北京天气")
+CJK_SPACE = re.compile(r"(?<=[\u4e00-\u9fff]) | (?=[\u4e00-\u9fff])")
+NUMBER = re.compile(r"\d+")
+
+
+def normalize_answer_query(query):
+    """Lowercased query without punctuation, whitespace collapsed and dropped around CJK"""
+    text = WHITESPACE.sub(" ", PUNCTUATION.sub(" ", (query or "").lower())).strip()
+    return CJK_SPACE.sub("", text)
+
+
+def char_ngrams(text, sizes=(2, 3)):
+    padded = f" {text} "
+    return Counter(padded[i:i + n] for n in sizes for i in range(len(padded) - n + 1))
+
+
+def key_terms_match(a, b):
+    """
+    Same key terms, or one query adds a single term to a query of 3+ key terms
+    ("python 3.13 release" / "python 3.13 release date"). A swapped term never matches.
+    """
+    if a == b:
+        return True
+    small, large = sorted((a, b), key=len)
+    return len(small) >= 3 and small < large and len(large - small) == 1
+
+
+class AnswerCache:
+    """
+    Answers per scope (provider, model, output language, role), matched by cosine similarity
+    of character n-gram TF-IDF vectors, IDF taken over the cached queries. N-grams cannot tell
+    "CEO" from "CTO" in a short query, so the key terms (query_key_terms) must match as well.
+    Entries are kept in memory and persisted to SQLite; failures are logged and treated as misses.
+    """
+
+    # How long an answer may be reused, per classify_query_intent
+    MAX_AGE = {
+        "realtime": 10 * 60,
+        "news": 2 * 60 * 60,
+        "general": 3 * 24 * 60 * 60,
+    }
+    SIMILARITY_THRESHOLD = 0.8
+    MAX_ENTRIES = 2000
+
+    def __init__(self, name="answer_cache"):
+        self.path = os.path.join(CACHE_DIR, f"{name}.sqlite3")
+        self._conn = None
+        self._entries = None
+        self._df = Counter()
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        if self._conn is None:
+            os.makedirs(CACHE_DIR, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=5, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS answers ("
+                "id INTEGER PRIMARY KEY, scope TEXT, query TEXT, intent TEXT, "
+                "answer TEXT, source_urls TEXT, created_at REAL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_created_at ON answers(created_at)")
+            self._conn = conn
+        return self._conn
+
+    def _load(self):
+        """Entries young enough to be reused, loaded once per process (caller holds the lock)"""
+        if self._entries is not None:
+            return
+        self._entries = []
+        conn = self._connect()
+        cutoff = time.time() - max(self.MAX_AGE.values())
+        conn.execute("DELETE FROM answers WHERE created_at < ?", (cutoff,))
+        conn.commit()
+        rows = conn.execute(
+            "SELECT scope, query, intent, answer, source_urls, created_at FROM answers "
+            "ORDER BY created_at DESC LIMIT ?", (self.MAX_ENTRIES,)
+        ).fetchall()
+        for scope, query, intent, answer, source_urls, created_at in reversed(rows):
+            self._append(scope, query, intent, answer, json.loads(source_urls), created_at)
+
+    def _append(self, scope, query, intent, answer, source_urls, created_at):
+        normalized = normalize_answer_query(query)
+        grams = char_ngrams(normalized)
+        self._entries.append({
+            "scope": scope, "query": query, "intent": intent, "answer": answer, "source_urls": source_urls,
+            "created_at": created_at, "grams": grams, "numbers": set(NUMBER.findall(normalized)),
+            "terms": query_key_terms(normalized),
+        })
+        self._df.update(grams.keys())
+        if len(self._entries) > self.MAX_ENTRIES:
+            self._df.subtract(self._entries.pop(0)["grams"].keys())
+
+    def _vector(self, grams):
+        total = len(self._entries) + 1
+        vector = {gram: count * (math.log(total / (self._df.get(gram, 0) + 1)) + 1) for gram, count in grams.items()}
+        norm = math.sqrt(sum(weight * weight for weight in vector.values()))
+        return vector, norm
+
+    def lookup(self, query, scope, intent):
+        """Most similar fresh answer in scope as a CachedAnswer, or None"""
+        normalized = normalize_answer_query(query)
+        if not normalized:
+            return None
+        grams = char_ngrams(normalized)
+        numbers = set(NUMBER.findall(normalized))
+        terms = query_key_terms(normalized)
+        now = time.time()
+        best = None
+        try:
+            with self._lock:
+                self._load()
+                vector, norm = self._vector(grams)
+                for entry in self._entries:
+                    max_age = min(self.MAX_AGE.get(intent, self.MAX_AGE["general"]),
+                                  self.MAX_AGE.get(entry["intent"], self.MAX_AGE["general"]))
+                    # Years, versions and prices change the question: numbers must match exactly
+                    if entry["scope"] != scope or now - entry["created_at"] > max_age or entry["numbers"] != numbers:
+                        continue
+                    if not key_terms_match(entry["terms"], terms):
+                        continue
+                    entry_vector, entry_norm = self._vector(entry["grams"])
+                    dot = sum(weight * entry_vector.get(gram, 0.0) for gram, weight in vector.items())
+                    similarity = dot / (norm * entry_norm) if norm and entry_norm else 0.0
+                    if similarity >= self.SIMILARITY_THRESHOLD and (best is None or similarity >= best[1]):
+                        best = (entry, similarity)
+        except Exception as e:
+            print(f"[LiveSearch] Answer cache read failed: {e}")
+            best = None
+        if best is None:
+            return None
+        entry, similarity = best
+        return CachedAnswer(entry["query"], entry["answer"], entry["source_urls"], entry["created_at"], similarity)
+
+    def store(self, query, scope, intent, answer, source_urls):
+        if not normalize_answer_query(query):
+            return
+        now = time.time()
+        try:
+            with self._lock:
+                self._load()
+                conn = self._connect()
+                conn.execute("DELETE FROM answers WHERE created_at < ?", (now - max(self.MAX_AGE.values()),))
+                conn.execute(
+                    "INSERT INTO answers (scope, query, intent, answer, source_urls, created_at) VALUES (?, ?, ?, ?, ?, ?)",
+                    (scope, query, intent, answer, json.dumps(source_urls, ensure_ascii=False), now)
+                )
+                conn.commit()
+                self._append(scope, query, intent, answer, source_urls, now)
+        except Exception as e:
+            print(f"[LiveSearch] Answer cache write failed: {e}")
@@ -299,6 +299,15 @@ class LiveSearch_API_Loader:
                 "temperature": ("FLOAT", {"default": 0.7, "min": 0.0, "max": 2.0, "step": 0.1}),
                 "max_tokens": ("INT", {"default": 2048, "min": 1, "max": 128000, "step": 1}),
                 "timeout": ("INT", {"default": 120, "min": 10, "max": 600, "step": 10}),
+                "stream": ("BOOLEAN", {"default": False, "label_on": "Streaming ON", "label_off": "Streaming OFF"}),
+                "max_output_chars": ("INT", {"default": 0, "min": 0, "max": 200000, "step": 100}),
+                "context_window": ("INT", {"default": 0, "min": 0, "max": 2000000, "step": 1024}),
+                "hedge_provider": (["None"] + providers, {"default": "None"}),
+                "hedge_model": ("STRING", {"default": "", "placeholder": "Backup T2T model (empty = provider's first)"}),
+                "hedge_percentile": ("INT", {"default": 95, "min": 50, "max": 99, "step": 1}),
+                "rpm_limit": ("INT", {"default": 0, "min": 0, "max": 100000, "step": 1}),
+                "tpm_limit": ("INT", {"default": 0, "min": 0, "max": 100000000, "step": 1000}),
+                "fallback_chain": ("STRING", {"multiline": True, "default": "", "placeholder": "Fallbacks, one per line: Provider: model\ne.g. SiliconFlow (硅基流动): deepseek-ai/DeepSeek-V3"}),
             }
         }
     
@@ -307,7 +316,7 @@ class LiveSearch_API_Loader:
     FUNCTION = "load_api"
     CATEGORY = "LiveSearch"
     
-    def load_api(self, provider, t2t_model, ti2t_model, api_key="", base_url="", temperature=0.7, max_tokens=2048, timeout=120):
+    def load_api(self, provider, t2t_model, ti2t_model, api_key="", base_url="", temperature=0.7, max_tokens=2048, timeout=120, stream=False, max_output_chars=0, context_window=0, hedge_provider="None", hedge_model="", hedge_percentile=95, fallback_chain="", rpm_limit=0, tpm_limit=0):
         """
         Load and validate API configuration
         Returns a config dict that can be passed to other nodes
@@ -329,12 +338,76 @@ class LiveSearch_API_Loader:
             "base_url": resolved_base_url,
             "temperature": temperature,
             "max_tokens": max_tokens,
-            "timeout": timeout
+            "timeout": timeout,
+            "stream": stream,
+            "max_output_chars": max_output_chars,
+            "context_window": context_window,
+            "hedge": self._hedge_config(hedge_provider, hedge_model, hedge_percentile),
+            "fallbacks": self._fallback_chain(fallback_chain),
+            "rpm_limit": rpm_limit,
+            "tpm_limit": tpm_limit
         }
         
         print(f"[LiveSearch API Loader] Configured: {provider} / T2T: {t2t_model} / TI2T: {ti2t_model}")
+        if model_config["hedge"]:
+            hedge = model_config["hedge"]
+            print(f"[LiveSearch API Loader] Hedging T2T requests to {hedge['provider']} / {hedge['model']} after p{hedge_percentile} latency")
+        if model_config["fallbacks"]:
+            chain = " -> ".join(f"{entry['provider']} / {entry['model']}" for entry in model_config["fallbacks"])
+            print(f"[LiveSearch API Loader] Fallback chain: {chain}")
         
         return (model_config,)
+    
+    @staticmethod
+    def _backup_entry(provider, model=""):
+        """
+        Provider/model used for hedging or failover; None if the provider is unknown or has no T2T model.
+        Key and base URL come from .env / config file like the primary's defaults.
+        """
+        provider_config = MODEL_CONFIGS.get(provider)
+        if provider_config is None:
+            print(f"[LiveSearch API Loader] Unknown provider ignored: {provider}")
+            return None
+        model = model.strip() if model else ""
+        if not model:
+            models = provider_config.get("t2t_models") or []
+            if not models:
+                print(f"[LiveSearch API Loader] No T2T model for {provider}, ignored")
+                return None
+            model = models[0]
+        return {
+            "provider": provider,
+            "model": model,
+            "api_key": config_manager.get_api_key(provider, ""),
+            "base_url": provider_config.get("base_url", "")
+        }
+    
+    @classmethod
+    def _hedge_config(cls, hedge_provider, hedge_model, hedge_percentile):
+        """Backup provider/model for hedged requests (None = hedging off)"""
+        if not hedge_provider or hedge_provider == "None":
+            return None
+        entry = cls._backup_entry(hedge_provider, hedge_model)
+        if entry is not None:
+            entry["percentile"] = hedge_percentile
+        return entry
+    
+    @classmethod
+    def _fallback_chain(cls, fallback_chain):
+        """
+        Parse the fallback chain: one "Provider: model" entry per line, tried in order
+        after the primary. The model is optional (provider's first T2T model).
+        """
+        entries = []
+        for line in (fallback_chain or "").splitlines():
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            provider, _, model = line.partition(":")
+            entry = cls._backup_entry(provider.strip(), model)
+            if entry is not None:
+                entries.append(entry)
+        return entries
 
 NODE_CLASS_MAPPINGS = {
     "LiveSearch_API_Loader": LiveSearch_API_Loader
@@ -0,0 +1,557 @@
+"""
+LiveSearch Async Engine
+Asyncio version of the T2T search pipeline on top of httpx.
+A single background event loop serves every workflow; the node entry point
+stays synchronous and simply waits on the coroutine.
+"""
+
+import asyncio
+import re
+import threading
+import time
+
+try:
+    import httpx
+    HTTPX_AVAILABLE = True
+except ImportError:
+    httpx = None
+    HTTPX_AVAILABLE = False
+
+from .context_budget import ContextBudget
+from .dedup import SourceDeduplicator
+from . import failover, hedging
+from .passage_ranker import estimate_tokens
+from .rate_limiter import RateLimiter
+from .search_agent import SearchTool, LLMClient, StreamAccumulator
+from .search_backends import SearchRouter
+
+
+class _EventLoopThread:
+    """
+    Process-wide event loop running in a daemon thread
+    """
+
+    _loop = None
+    _lock = threading.Lock()
+
+    @classmethod
+    def get_loop(cls):
+        with cls._lock:
+            if cls._loop is None:
+                loop = asyncio.new_event_loop()
+                thread = threading.Thread(target=loop.run_forever, name="LiveSearchAsync", daemon=True)
+                thread.start()
+                cls._loop = loop
+        return cls._loop
+
+
+def run_sync(coro, timeout=None):
+    """
+    Run a coroutine on the shared loop and block the calling (ComfyUI worker) thread for its result
+    """
+    future = asyncio.run_coroutine_threadsafe(coro, _EventLoopThread.get_loop())
+    return future.result(timeout)
+
+
+class AsyncHTTP:
+    """
+    Shared httpx.AsyncClient per proxy (connection pooling and keep-alive, like SessionPool)
+    """
+
+    MAX_CONNECTIONS = 64
+    MAX_KEEPALIVE = 16
+
+    _clients = {}
+
+    @classmethod
+    def client(cls, proxy=None):
+        key = proxy or ""
+        client = cls._clients.get(key)
+        if client is None:
+            limits = httpx.Limits(max_connections=cls.MAX_CONNECTIONS, max_keepalive_connections=cls.MAX_KEEPALIVE)
+            hooks = {"request": [cls._wait_for_host], "response": [cls._record_host_response]}
+            try:
+                client = httpx.AsyncClient(proxy=proxy or None, limits=limits, follow_redirects=True, event_hooks=hooks)
+            except TypeError:
+                # httpx < 0.26 only knows "proxies"
+                client = httpx.AsyncClient(proxies=proxy or None, limits=limits, follow_redirects=True, event_hooks=hooks)
+            cls._clients[key] = client
+        return client
+
+    @staticmethod
+    async def _wait_for_host(request):
+        # Same per-host limits as the threaded engine's pooled adapter
+        await RateLimiter.wait_async(request.url.host)
+
+    @staticmethod
+    async def _record_host_response(response):
+        if response.status_code == 429:
+            RateLimiter.throttled(response.request.url.host)
+        else:
+            RateLimiter.succeeded(response.request.url.host)
+
+
+class AsyncSearchTool:
+    """
+    Async counterparts of the SearchTool network calls; caches and parsing are shared with SearchTool
+    """
+
+    _weather_inflight = {}
+
+    @staticmethod
+    async def get_weather_data(lat, lon, proxy=None, use_cache=True):
+        try:
+            cell = SearchTool._weather_cell(lat, lon, SearchTool.WEATHER_GRID_DEGREES)
+            data = SearchTool._weather_cache_get(cell) if use_cache else None
+            if data is None:
+                # Single-flight: concurrent workflows asking for the same cell await one request
+                task = AsyncSearchTool._weather_inflight.get(cell)
+                if task is None:
+                    task = asyncio.ensure_future(AsyncSearchTool._fetch_open_meteo(cell, proxy))
+                    AsyncSearchTool._weather_inflight[cell] = task
+                    task.add_done_callback(lambda _: AsyncSearchTool._weather_inflight.pop(cell, None))
+                data = await asyncio.shield(task)
+            return SearchTool._format_weather(lat, lon, data)
+        except Exception as e:
+            print(f"[LiveSearch Async] Open-Meteo fetch failed: {e}")
+            return ""
+
+    @staticmethod
+    async def _fetch_open_meteo(cell, proxy=None):
+        url, params = SearchTool._open_meteo_request(cell)
+        response = await AsyncHTTP.client(proxy).get(url, params=params, timeout=10)
+        response.raise_for_status()
+        data = response.json()
+        SearchTool._weather_cache_put(cell, data)
+        return data
+
+    @staticmethod
+    async def fetch_url_content(url, timeout=10, proxy=None, use_cache=True, max_bytes=None, extractor="auto"):
+        max_bytes = max_bytes or SearchTool.PAGE_MAX_BYTES
+        try:
+            # SQLite (behind a lock) and parsing run in worker threads: this loop serves every workflow
+            entry = await asyncio.to_thread(SearchTool.page_cache.lookup, url) if use_cache else None
+            if entry and entry.fresh:
+                return entry.value
+            headers = SearchTool._page_request_headers(entry)
+
+            async with AsyncHTTP.client(proxy).stream("GET", url, headers=headers, timeout=timeout) as response:
+                if response.status_code == 304 and entry:
+                    return await asyncio.to_thread(SearchTool._revalidated, url, entry, response.headers)
+                response.raise_for_status()
+                if not SearchTool._is_text_response(url, response.headers):
+                    return ""
+
+                body = bytearray()
+                async for chunk in response.aiter_bytes(SearchTool.PAGE_CHUNK_SIZE):
+                    body.extend(chunk)
+                    if len(body) >= max_bytes:
+                        print(f"[LiveSearch Async] Page truncated at {max_bytes // 1024} KB: {url}")
+                        del body[max_bytes:]
+                        break
+
+            return await asyncio.to_thread(
+                SearchTool._finish_download, url, bytes(body), response.headers, extractor, use_cache
+            )
+        except Exception as e:
+            print(f"[LiveSearch Async] Fetch error for {url}: {e}")
+            return ""
+
+    @staticmethod
+    async def search(query, num_results=3, proxy=None, use_cache=True, cache_ttl=None, router=None):
+        # ddgs has no async client; run the (fan-out) search in the default executor
+        return await asyncio.to_thread(
+            SearchTool.search_web, query, num_results, proxy, None, use_cache, cache_ttl, router
+        )
+
+    @staticmethod
+    async def reverse_geocode(lat, lon, backend, user_agent="comfyui_live_search", proxy=None):
+        return await asyncio.to_thread(SearchTool.reverse_geocode, lat, lon, backend, user_agent, proxy)
+
+
+class AsyncLLMClient:
+    """
+    Async counterpart of LLMClient.chat_completion (same wire formats and error strings)
+    """
+
+    @staticmethod
+    async def chat_completion(model_config, messages, stats=None):
+        backup = hedging.backup_config(model_config, messages)
+        if backup is not None:
+            return await AsyncLLMClient._hedged_completion(model_config, backup, messages, stats)
+        return await AsyncLLMClient._failover_completion(model_config, messages, stats)
+
+    @staticmethod
+    async def _failover_completion(model_config, messages, stats=None):
+        """Same chain as LLMClient._failover_completion"""
+        configs = failover.chain(model_config, messages)
+        failures = []
+        for config in configs:
+            answer = await AsyncLLMClient._single_completion(config, messages, stats)
+            if not hedging.is_error(answer):
+                if failures:
+                    report = failover.failover_report(config, failures)
+                    print(f"[LiveSearch Async] {report}")
+                    if stats is not None:
+                        stats["failover"] = report
+                return answer
+            failures.append((config, answer))
+            if len(failures) < len(configs):
+                print(f"[LiveSearch Async] {failover.describe(config)} failed, trying next fallback")
+        return failures[0][1]
+
+    @staticmethod
+    async def _hedged_completion(model_config, backup, messages, stats=None):
+        """Same policy as LLMClient._hedged_completion; the losing request is cancelled outright"""
+        delay, delay_source = hedging.hedge_delay(model_config)
+        hedge_stats = hedging.HedgeStats(model_config, backup, delay, delay_source)
+        attempt_stats = {"primary": {}, "backup": {}}
+
+        async def attempt(name, config):
+            complete = AsyncLLMClient._failover_completion if name == "primary" else AsyncLLMClient._single_completion
+            answer = await complete(config, messages, attempt_stats[name])
+            hedge_stats.finished(name)
+            return answer
+
+        def launch(name, config):
+            hedge_stats.start(name)
+            tasks[asyncio.ensure_future(attempt(name, config))] = name
+
+        tasks = {}
+        launch("primary", model_config)
+        errors = {}
+        winner = None
+        try:
+            while tasks:
+                timeout = None
+                if "backup" not in hedge_stats.started_at:
+                    timeout = max(0.0, hedge_stats.started_at["primary"] + delay - time.perf_counter())
+                done, _ = await asyncio.wait(tasks, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    print(f"[LiveSearch Async] Primary LLM slower than {delay:.1f}s ({delay_source}), hedging to {backup['provider']} / {backup['model']}")
+                    launch("backup", backup)
+                    continue
+                for task in done:
+                    name = tasks.pop(task)
+                    answer = task.result()
+                    if not hedging.is_error(answer):
+                        winner = winner or (name, answer)
+                    else:
+                        errors[name] = answer
+                if winner:
+                    break
+                if "backup" not in hedge_stats.started_at:
+                    print(f"[LiveSearch Async] Primary LLM failed, hedging to {backup['provider']} / {backup['model']}")
+                    launch("backup", backup)
+        finally:
+            for task in tasks:
+                task.cancel()
+
+        if winner is None:
+            print(f"[LiveSearch Async] {hedge_stats.report()}")
+            return errors.get("primary") or errors.get("backup")
+        name, answer = winner
+        hedge_stats.win(name)
+        report = hedge_stats.report()
+        print(f"[LiveSearch Async] {report}")
+        if stats is not None:
+            stats.update(attempt_stats[name])
+            stats["hedge"] = report
+        return answer
+
+    @staticmethod
+    async def _single_completion(model_config, messages, stats=None):
+        """Same breaker and retry policy as LLMClient._single_completion"""
+        api_key = model_config.get("api_key", "")
+        provider = model_config.get("provider", "")
+
+        # Ollama (Local) typically doesn't require API key
+        if not api_key and "Ollama" not in provider:
+            return "Error: API Key is missing."
+
+        breaker = failover.breaker_for(model_config)
+        request_tokens = LLMClient._request_tokens(model_config, messages)
+        for attempt in range(failover.MAX_ATTEMPTS):
+            if not breaker.allow():
+                return failover.circuit_open_error(model_config, breaker)
+            LLMClient._log_rate_wait(model_config, await RateLimiter.wait_llm_async(model_config, request_tokens))
+            started = time.perf_counter()
+            try:
+                answer = await AsyncLLMClient._request_completion(model_config, messages, stats)
+            except asyncio.CancelledError:
+                breaker.abandon()
+                raise
+            except failover.ProviderError as e:
+                if e.status == 429:
+                    RateLimiter.llm_throttled(model_config)
+                failover.record_outcome(breaker, e)
+                retry, delay = failover.should_retry(e, attempt)
+                if not retry:
+                    return e.message
+                print(f"[LiveSearch Async] {failover.describe(model_config)}: {e.message[:120]} - retry {attempt + 2}/{failover.MAX_ATTEMPTS} in {delay:.1f}s")
+                await asyncio.sleep(delay)
+                continue
+            breaker.record_success()
+            RateLimiter.llm_succeeded(model_config)
+            hedging.record_latency(model_config, time.perf_counter() - started, answer)
+            return answer
+
+    @staticmethod
+    async def _request_completion(model_config, messages, stats=None):
+        timeout = model_config.get("timeout", 120)
+        proxy = model_config.get("proxy", None)
+        provider = model_config.get("provider", "")
+
+        url, headers, payload, use_responses_api = LLMClient._build_request(model_config, messages)
+        RateLimiter.exempt_url(url)
+        client = AsyncHTTP.client(proxy)
+
+        try:
+            if model_config.get("stream", False):
+                accumulator = StreamAccumulator(provider, use_responses_api, model_config.get("max_output_chars", 0))
+                async with client.stream("POST", url, headers=headers, json=dict(payload, stream=True), timeout=timeout) as response:
+                    if response.status_code != 200:
+                        await response.aread()
+                        raise failover.response_error(LLMClient._error_from_response(response), response.status_code, response.headers)
+                    async for line in response.aiter_lines():
+                        if accumulator.feed(line):
+                            break
+                return accumulator.finish(stats)
+
+            response = await client.post(url, headers=headers, json=payload, timeout=timeout)
+            if response.status_code != 200:
+                raise failover.response_error(LLMClient._error_from_response(response), response.status_code, response.headers)
+            return LLMClient._parse_response(response.json(), provider, use_responses_api)
+        except failover.ProviderError:
+            raise
+        except httpx.TimeoutException as e:
+            raise failover.ProviderError(f"Error calling LLM: {str(e)}", timeout=True)
+        except httpx.TransportError as e:
+            raise failover.ProviderError(f"Error calling LLM: {str(e)}", connection=True)
+        except Exception as e:
+            raise failover.ProviderError(f"Error calling LLM: {str(e)}")
+
+
+class AsyncSearchPipeline:
+    """
+    T2T web-search pipeline as coroutines: geocode + weather -> optimize -> search -> fetch -> answer.
+    Prompt building and context formatting come from the LiveSearch_Agent instance.
+    The loop is shared by every workflow, so blocking work (SQLite caches, HTML parsing,
+    SimHash, passage ranking, token counting) goes through asyncio.to_thread.
+    """
+
+    def __init__(self, agent):
+        self.agent = agent
+
+    async def run_t2t(self, prompt, model_config, search_settings, role=""):
+        agent = self.agent
+        num_results = search_settings.get("num_results", 3)
+        output_language = search_settings.get("output_language", "中文")
+        optimize_query = search_settings.get("optimize_query", search_settings.get("optimize_prompt", False))
+        proxy = search_settings.get("proxy")
+        use_cache = search_settings.get("use_cache", True)
+        cache_ttl = search_settings.get("cache_ttl_minutes", 360) * 60
+        index_first = search_settings.get("index_first", False)
+        geocoder_backend = search_settings.get("reverse_geocoder", "Offline (GeoNames)")
+        max_page_bytes = search_settings.get("max_page_kb", 1024) * 1024
+        html_extractor = search_settings.get("html_extractor", "auto")
+
+        search_query = prompt
+        optimized_prompt_output = "No optimization (using original prompt)"
+
+        # Speculative search on the raw prompt, overlapping the optimization round trip
+        router = SearchRouter.from_settings(search_settings)
+        speculation = None
+        if optimize_query and search_settings.get("speculative_search", False) and not index_first:
+            speculation = asyncio.ensure_future(self._speculative_search(prompt, num_results, proxy, use_cache, cache_ttl, max_page_bytes, html_extractor, router))
+
+        # 1-2. Weather, geocoding and query optimization
+        try:
+            weather_context, location_name, refined = await self._pre_search(
+                prompt, model_config, optimize_query, proxy, use_cache, geocoder_backend
+            )
+        except BaseException:
+            if speculation is not None:
+                speculation.cancel()
+            raise
+        if refined:
+            refined_query, from_cache = refined
+            if not refined_query.startswith("Error"):
+                print(f"[LiveSearch Async] Prompt optimized{' (cached)' if from_cache else ''}: {prompt} -> {refined_query}")
+                search_query = refined_query
+            optimized_prompt_output = agent._optimization_summary(prompt, refined_query, from_cache, location_name)
+
+        # A recent answer to a similar query skips search, fetch and answer generation
+        if use_cache:
+            cached = await asyncio.to_thread(agent._cached_answer, prompt, search_query, model_config, output_language, role)
+            if cached:
+                if speculation is not None:
+                    speculation.cancel()
+                return (cached[0], cached[1], optimized_prompt_output + cached[2])
+
+        # tiktoken may download its encoding on first use, and counting long pages is CPU-bound
+        budget = await asyncio.to_thread(ContextBudget, model_config)
+        fixed_tokens = await asyncio.to_thread(
+            budget.count_messages, agent._build_answer_messages(prompt, weather_context, output_language, role)
+        )
+
+        # 3. Index-first: locally indexed pages when they are fresh enough for the query
+        indexed = None
+        if index_first:
+            indexed = await asyncio.to_thread(agent._indexed_sources, prompt, search_query, num_results, budget, fixed_tokens)
+
+        if indexed:
+            context_data, source_urls = indexed
+            optimized_prompt_output += f"\nPage index: {len(source_urls)} local pages, web search skipped"
+        else:
+            # 4. Search
+            print(f"[LiveSearch Async] Searching for: {search_query} using {router.label}")
+            if speculation is not None:
+                speculative_results = await speculation
+                refined_results = None
+                if search_query != prompt:
+                    refined_results = await AsyncSearchTool.search(search_query, num_results, proxy, use_cache, cache_ttl, router)
+                search_results = agent._resolve_speculation(speculative_results, refined_results, num_results)
+            else:
+                search_results = await AsyncSearchTool.search(search_query, num_results, proxy, use_cache, cache_ttl, router)
+            if not search_results:
+                return (f"No search results found using {router.label}.", "", optimized_prompt_output)
+
+            # 5. Fetch pages concurrently, consumed in priority order, sized to the model's context window
+            context_data, source_urls = await self._collect_sources(
+                search_results, proxy, use_cache, max_page_bytes, html_extractor, f"{search_query} {prompt}",
+                budget.source_budget(fixed_tokens, len(search_results))
+            )
+        context_data, source_urls = await asyncio.to_thread(budget.fit, context_data, source_urls, fixed_tokens)
+        full_context = "\n".join(context_data)
+        if weather_context:
+            full_context = f"{weather_context}\n\n--- Web Search Results ---\n{full_context}"
+
+        # 6. Answer
+        final_messages = agent._build_answer_messages(prompt, full_context, output_language, role)
+        optimized_prompt_output += await asyncio.to_thread(agent._prompt_token_report, budget, final_messages)
+        llm_stats = {}
+        answer = await AsyncLLMClient.chat_completion(model_config, final_messages, llm_stats)
+        optimized_prompt_output += agent._llm_report(llm_stats)
+        if use_cache:
+            await asyncio.to_thread(agent._store_answer, prompt, search_query, model_config, output_language, role, answer, source_urls, llm_stats)
+        return (answer, "\n".join(source_urls), optimized_prompt_output)
+
+    @staticmethod
+    async def _timed(timings, stage, coro):
+        started = time.perf_counter()
+        try:
+            return await coro
+        finally:
+            timings[stage] = time.perf_counter() - started
+
+    async def _pre_search(self, prompt, model_config, optimize_query, proxy, use_cache, geocoder_backend):
+        """
+        Same stage graph as LiveSearch_Agent._pre_search: weather and geocoding overlap,
+        optimization starts once the location hint is known
+        """
+        agent = self.agent
+        started = time.perf_counter()
+        timings = {}
+        location_name = None
+        city_name = None
+        refined = None
+        weather_task = None
+
+        coord_match = re.search(r'(-?\d+\.?\d*)\s*[,，]\s*(-?\d+\.?\d*)', prompt)
+        try:
+            if coord_match:
+                lat, lon = float(coord_match.group(1)), float(coord_match.group(2))
+                weather_task = asyncio.ensure_future(
+                    self._timed(timings, "weather", AsyncSearchTool.get_weather_data(lat, lon, proxy, use_cache))
+                )
+                try:
+                    print(f"[LiveSearch Async] Detected coordinates: {lat}, {lon}, attempting reverse geocoding...")
+                    address = await self._timed(timings, "geocode", AsyncSearchTool.reverse_geocode(lat, lon, geocoder_backend, proxy=proxy))
+                    if address:
+                        location_name, city_name = agent._location_from_address(address)
+                        print(f"[LiveSearch Async] Reverse geocoded to: {location_name} (city: {city_name})")
+                except Exception as e:
+                    print(f"[LiveSearch Async] Coordinate processing failed: {e}, will rely on LLM optimization")
+
+            if optimize_query:
+                refine_messages = agent._build_refine_messages(prompt, city_name, location_name)
+                refined = await self._timed(timings, "optimize", self._refine_query(model_config, refine_messages, use_cache))
+
+            weather_context = await weather_task if weather_task else ""
+        finally:
+            if weather_task and not weather_task.done():
+                weather_task.cancel()
+
+        agent._log_stage_timings(timings, time.perf_counter() - started)
+        return weather_context, location_name, refined
+
+    async def _speculative_search(self, prompt, num_results, proxy, use_cache, cache_ttl, max_bytes=None, extractor="auto", router=None):
+        """
+        Search the raw prompt and warm the page cache with its top pages while the query is being optimized
+        """
+        started = time.perf_counter()
+        results = await AsyncSearchTool.search(prompt, num_results, proxy, use_cache, cache_ttl, router)
+        if results and use_cache:
+            semaphore = asyncio.Semaphore(SearchTool.MAX_FETCH_WORKERS)
+
+            async def prefetch(url):
+                async with semaphore:
+                    await AsyncSearchTool.fetch_url_content(url, proxy=proxy, use_cache=use_cache, max_bytes=max_bytes, extractor=extractor)
+
+            await asyncio.gather(*(prefetch(res['url']) for res in self.agent._select_candidates(results)))
+        print(f"[LiveSearch Async] Speculative search on raw prompt finished in {time.perf_counter() - started:.2f}s ({len(results)} results)")
+        return results
+
+    async def _refine_query(self, model_config, refine_messages, use_cache=True):
+        agent = self.agent
+        memo_key = agent._query_memo_key(model_config, refine_messages)
+        if use_cache:
+            cached = await asyncio.to_thread(agent.query_memo.get, memo_key)
+            if cached:
+                return cached, True
+
+        refined_query = await AsyncLLMClient.chat_completion(model_config, refine_messages)
+        if use_cache and refined_query and not refined_query.startswith("Error"):
+            await asyncio.to_thread(agent.query_memo.set, memo_key, refined_query, agent.QUERY_MEMO_TTL)
+        return refined_query, False
+
+    async def _collect_sources(self, search_results, proxy, use_cache=True, max_bytes=None, extractor="auto", query=None, token_budget=None):
+        agent = self.agent
+        deduplicator = SourceDeduplicator()
+        candidates = agent._select_candidates(search_results, deduplicator)
+        context_data = []
+        source_urls = []
+        if not candidates:
+            return context_data, source_urls
+
+        semaphore = asyncio.Semaphore(SearchTool.MAX_FETCH_WORKERS)
+
+        async def fetch(url):
+            async with semaphore:
+                return await AsyncSearchTool.fetch_url_content(url, proxy=proxy, use_cache=use_cache, max_bytes=max_bytes, extractor=extractor)
+
+        print(f"[LiveSearch Async] Fetching {len(candidates)} pages (up to {SearchTool.MAX_FETCH_WORKERS} in parallel)")
+        tasks = [asyncio.ensure_future(fetch(res['url'])) for res in candidates]
+        fetched_tokens = 0
+        try:
+            for res, task in zip(candidates, tasks):
+                content = await task
+                if content:
+                    print(f"[LiveSearch Async] Fetched: {res['url']}")
+                    fetched_tokens += estimate_tokens(content)
+                    # SimHash and passage ranking are CPU-bound (tens of ms on a long page)
+                    block = await asyncio.to_thread(agent._source_block, deduplicator, res, content, query, token_budget)
+                    if block is None:
+                        continue
+                    context_data.append(block)
+                    source_urls.append(res['url'])
+                    if agent._has_enough_sources(source_urls):
+                        print("[LiveSearch Async] Found enough trusted sources with content, stopping early")
+                        break
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+        agent._log_context_size(context_data, fetched_tokens)
+        return context_data, source_urls
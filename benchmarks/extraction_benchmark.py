@@ -0,0 +1,161 @@
+"""
+HTML extraction benchmark
+Runs every installed html_extractor backend over a saved corpus of pages and reports parse time and
+extracted-text quality, to pick the fastest backend that keeps answer quality. Alongside the backends,
+"full-page" is the extraction used before main-content detection (BeautifulSoup text of the page
+without script/style/header/footer/nav), so the detector's gain or loss per page type is visible.
+
+Corpus layout (default: benchmarks/corpus/, searched recursively; see corpus/README.md):
+    <name>.html   saved page (UTF-8, or with a <meta charset>)
+    <name>.txt    optional reference main text; quality is token F1 against it
+--save adds pages under corpus/saved/ (not committed).
+
+Usage:
+    python benchmarks/extraction_benchmark.py --save https://example.com/article ...
+    python benchmarks/extraction_benchmark.py [corpus_dir] [--repeat 5]
+"""
+
+import argparse
+import os
+import re
+import statistics
+import sys
+import time
+from collections import Counter
+from urllib.parse import urlsplit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+
+from bs4 import BeautifulSoup  # noqa: E402
+
+from html_extractor import available_backends, clean_text, decode_html, get_extractor  # noqa: E402
+
+DEFAULT_CORPUS = os.path.join(os.path.dirname(os.path.realpath(__file__)), "corpus")
+# SearchTool.EXTRACT_MAX_CHARS: text kept per page, before passage selection picks what reaches the prompt
+CONTEXT_CHARS = 20000
+TOKEN_PATTERN = re.compile(r"[一-鿿]|\w+")
+
+
+def tokens(text):
+    return Counter(token.lower() for token in TOKEN_PATTERN.findall(text))
+
+
+def token_f1(extracted, reference):
+    extracted_tokens, reference_tokens = tokens(extracted), tokens(reference)
+    overlap = sum((extracted_tokens & reference_tokens).values())
+    if not overlap:
+        return 0.0
+    precision = overlap / sum(extracted_tokens.values())
+    recall = overlap / sum(reference_tokens.values())
+    return 2 * precision * recall / (precision + recall)
+
+
+def full_page_text(html):
+    """Extraction before html_extractor: all visible text minus script/style/header/footer/nav"""
+    soup = BeautifulSoup(html, "html.parser")
+    for node in soup(["script", "style", "header", "footer", "nav"]):
+        node.extract()
+    return clean_text(soup.get_text())
+
+
+def save_pages(urls, corpus_dir):
+    import requests
+
+    os.makedirs(corpus_dir, exist_ok=True)
+    for url in urls:
+        response = requests.get(url, timeout=15, headers={"User-Agent": "Mozilla/5.0 (LiveSearch benchmark)"})
+        response.raise_for_status()
+        parts = urlsplit(url)
+        name = re.sub(r"[^\w.-]+", "_", f"{parts.netloc}{parts.path}").strip("_")[:80] or "page"
+        path = os.path.join(corpus_dir, f"{name}.html")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(decode_html(response.content, response.headers.get("Content-Type", "")))
+        print(f"Saved {url} -> {path}")
+
+
+def load_corpus(corpus_dir):
+    pages = []
+    paths = sorted(
+        os.path.join(directory, filename)
+        for directory, _, filenames in os.walk(corpus_dir)
+        for filename in filenames
+        if filename.endswith((".html", ".htm"))
+    )
+    for path in paths:
+        filename = os.path.relpath(path, corpus_dir)
+        with open(path, "rb") as f:
+            html = decode_html(f.read())
+        reference = None
+        reference_path = os.path.splitext(path)[0] + ".txt"
+        if os.path.exists(reference_path):
+            with open(reference_path, encoding="utf-8") as f:
+                reference = f.read()
+        pages.append((filename, html, reference))
+    return pages
+
+
+def measure(extract, pages, repeat):
+    """(median ms per page, extracted chars per page, F1 per page or None) for one extractor"""
+    timings, chars, scores = [], [], []
+    for _, html, reference in pages:
+        runs = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            text = extract(html)
+            runs.append(time.perf_counter() - started)
+        timings.append(statistics.median(runs) * 1000)
+        chars.append(len(text))
+        scores.append(token_f1(text[:CONTEXT_CHARS], reference) if reference else None)
+    return timings, chars, scores
+
+
+def run(corpus_dir, repeat):
+    pages = load_corpus(corpus_dir)
+    if not pages:
+        print(f"No .html files in {corpus_dir}; add some with --save URL")
+        return
+
+    total_kb = sum(len(html.encode("utf-8")) for _, html, _ in pages) / 1024
+    print(f"Corpus: {len(pages)} pages, {total_kb:.0f} KB, {sum(1 for p in pages if p[2])} with reference text\n")
+
+    extractors = [(backend, get_extractor(backend).extract) for backend in available_backends()]
+    extractors.append(("full-page", full_page_text))
+    results = {name: measure(extract, pages, repeat) for name, extract in extractors}
+
+    def mean_f1(scores):
+        scored = [score for score in scores if score is not None]
+        return statistics.mean(scored) if scored else None
+
+    fastest = min(statistics.mean(results[name][0]) for name, _ in extractors[:-1])
+    best_f1 = max((mean_f1(results[name][2]) or 0.0) for name, _ in extractors[:-1])
+    print(f"{'backend':<12}{'mean ms':>10}{'p95 ms':>10}{'total ms':>10}{'vs fastest':>12}{'chars':>9}{'F1':>8}{'dF1':>8}")
+    for name, _ in extractors:
+        timings, chars, scores = results[name]
+        p95 = sorted(timings)[min(len(timings) - 1, int(len(timings) * 0.95))]
+        f1 = mean_f1(scores)
+        f1_text = f"{f1:.3f}" if f1 is not None else "n/a"
+        delta = f"{f1 - best_f1:+.3f}" if f1 is not None else "n/a"
+        print(f"{name:<12}{statistics.mean(timings):>10.2f}{p95:>10.2f}{sum(timings):>10.1f}"
+              f"{statistics.mean(timings) / fastest:>11.1f}x{statistics.mean(chars):>9.0f}{f1_text:>8}{delta:>8}")
+
+    # Per-page F1: backends share the main-content detector, so differences show up per page type
+    print(f"\n{'F1 per page':<36}" + "".join(f"{name:>12}" for name, _ in extractors))
+    for index, (filename, _, reference) in enumerate(pages):
+        if reference:
+            print(f"{filename[:35]:<36}" + "".join(f"{results[name][2][index]:>12.3f}" for name, _ in extractors))
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark LiveSearch HTML extraction backends")
+    parser.add_argument("corpus", nargs="?", default=DEFAULT_CORPUS, help="directory of saved .html pages")
+    parser.add_argument("--repeat", type=int, default=5, help="runs per page (median is reported)")
+    parser.add_argument("--save", nargs="+", metavar="URL", help="download pages into the corpus and exit")
+    args = parser.parse_args()
+
+    if args.save:
+        save_pages(args.save, os.path.join(args.corpus, "saved"))
+        return
+    run(args.corpus, max(1, args.repeat))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,235 @@
+"""
+LiveSearch Disk Cache
+SQLite-backed TTL cache shared by the search, page and query caches
+"""
+
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+import zlib
+from collections import namedtuple
+
+from .passage_ranker import tokenize
+
+CACHE_DIR = os.path.join(os.path.dirname(os.path.realpath(__file__)), "cache")
+
+CacheEntry = namedtuple("CacheEntry", ["value", "meta", "expires_at", "fresh"])
+
+# Weather/time style queries go stale within minutes
+REALTIME_PATTERN = re.compile(
+    r"\b(weather|forecast|temperature|rain|snow|time|clock|now|current|currently|today|tonight|live)\b"
+    r"|天气|气温|温度|下雨|时间|几点|现在|今天|今晚|实时",
+    re.IGNORECASE
+)
+
+# News, prices and recent events change within hours
+NEWS_PATTERN = re.compile(
+    r"\b(news|latest|breaking|headlines?|recent|recently|yesterday|this week|announced|announcement|"
+    r"price|prices|stock|stocks|score|scores|election|update|updates)\b"
+    r"|新闻|最新|头条|快讯|近期|最近|昨天|本周|发布会|股价|价格|比分|选举",
+    re.IGNORECASE
+)
+
+
+# Words that only say what kind of answer is wanted (weather, latest, today...), not what it is about
+GENERIC_QUERY_TERMS = frozenset(
+    "weather forecast temperature rain snow time clock now current currently today tonight live local "
+    "news latest breaking headline headlines recent recently update updates "
+    "天气 气温 温度 下雨 预报 时间 几点 现在 当前 今天 今晚 实时 新闻 最新 头条 快讯 最近 近期".split()
+)
+
+
+def query_key_terms(query):
+    """
+    Content terms of a query (passage_ranker.tokenize) without intent words: what the query is about.
+    Two queries about different entities ("Beijing" / "Nanjing", "CEO" / "CTO") differ here.
+    """
+    return {term for term in tokenize(query or "") if term not in GENERIC_QUERY_TERMS}
+
+
+def classify_query_intent(query):
+    """
+    Rough intent of a search query, used to pick cache lifetimes: "realtime", "news" or "general"
+    """
+    if query and REALTIME_PATTERN.search(query):
+        return "realtime"
+    if query and NEWS_PATTERN.search(query):
+        return "news"
+    return "general"
+
+
+def normalize_query(query):
+    """Lowercase and collapse whitespace so trivially different queries share a cache key"""
+    return re.sub(r"\s+", " ", (query or "").strip().lower())
+
+
+class DiskCache:
+    """
+    Persistent key/value cache with per-entry TTL, zlib-compressed JSON values
+    and size-bounded LRU eviction. Failures are logged and treated as misses.
+    """
+
+    _instances = []
+
+    def __init__(self, name, max_bytes=64 * 1024 * 1024):
+        self.name = name
+        self.max_bytes = max_bytes
+        self.path = os.path.join(CACHE_DIR, f"{name}.sqlite3")
+        self.hits = 0
+        self.misses = 0
+        self._conn = None
+        self._lock = threading.Lock()
+        DiskCache._instances.append(self)
+
+    def _connect(self):
+        if self._conn is None:
+            os.makedirs(CACHE_DIR, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=5, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                "key TEXT PRIMARY KEY, value BLOB, meta TEXT, size INTEGER, "
+                "expires_at REAL, last_access REAL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_last_access ON entries(last_access)")
+            self._conn = conn
+        return self._conn
+
+    @staticmethod
+    def make_key(*parts):
+        raw = json.dumps(parts, ensure_ascii=False, sort_keys=True, default=str)
+        return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+    def lookup(self, key):
+        """
+        Return a CacheEntry (including expired ones, with fresh=False) or None.
+        Counts a hit only for fresh entries.
+        """
+        now = time.time()
+        try:
+            with self._lock:
+                conn = self._connect()
+                row = conn.execute(
+                    "SELECT value, meta, expires_at FROM entries WHERE key = ?", (key,)
+                ).fetchone()
+                if row is None:
+                    self.misses += 1
+                    return None
+                conn.execute("UPDATE entries SET last_access = ? WHERE key = ?", (now, key))
+                conn.commit()
+            value = json.loads(zlib.decompress(row[0]).decode("utf-8"))
+            meta = json.loads(row[1]) if row[1] else {}
+            fresh = row[2] > now
+            if fresh:
+                self.hits += 1
+            else:
+                self.misses += 1
+            return CacheEntry(value, meta, row[2], fresh)
+        except Exception as e:
+            print(f"[LiveSearch] Cache '{self.name}' read failed: {e}")
+            self.misses += 1
+            return None
+
+    def get(self, key):
+        """Return the cached value if present and fresh, else None"""
+        entry = self.lookup(key)
+        return entry.value if entry and entry.fresh else None
+
+    def set(self, key, value, ttl, meta=None):
+        now = time.time()
+        try:
+            blob = zlib.compress(json.dumps(value, ensure_ascii=False).encode("utf-8"))
+            meta_text = json.dumps(meta, ensure_ascii=False) if meta else None
+            with self._lock:
+                conn = self._connect()
+                conn.execute(
+                    "INSERT OR REPLACE INTO entries (key, value, meta, size, expires_at, last_access) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (key, blob, meta_text, len(blob), now + ttl, now)
+                )
+                self._evict(conn)
+                conn.commit()
+        except Exception as e:
+            print(f"[LiveSearch] Cache '{self.name}' write failed: {e}")
+
+    def touch(self, key, ttl, meta=None):
+        """Extend an entry's lifetime (e.g. after a 304 revalidation), optionally replacing its meta"""
+        now = time.time()
+        try:
+            with self._lock:
+                conn = self._connect()
+                if meta is None:
+                    conn.execute(
+                        "UPDATE entries SET expires_at = ?, last_access = ? WHERE key = ?",
+                        (now + ttl, now, key)
+                    )
+                else:
+                    conn.execute(
+                        "UPDATE entries SET expires_at = ?, last_access = ?, meta = ? WHERE key = ?",
+                        (now + ttl, now, json.dumps(meta, ensure_ascii=False), key)
+                    )
+                conn.commit()
+        except Exception as e:
+            print(f"[LiveSearch] Cache '{self.name}' update failed: {e}")
+
+    def _evict(self, conn):
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        # Drop least recently used entries until we are back under 90% of the budget
+        target = self.max_bytes * 0.9
+        for key, size in conn.execute("SELECT key, size FROM entries ORDER BY last_access ASC").fetchall():
+            if total <= target:
+                break
+            conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+            total -= size
+
+    def stats(self):
+        return {"name": self.name, "hits": self.hits, "misses": self.misses}
+
+    @classmethod
+    def log_stats(cls):
+        parts = [f"{c.name} {c.hits}/{c.hits + c.misses}" for c in cls._instances if c.hits or c.misses]
+        if parts:
+            print(f"[LiveSearch] Cache hits: {', '.join(parts)}")
+
+
+class SingleFlight:
+    """
+    Collapses concurrent calls with the same key into a single execution.
+    Followers block until the leader finishes and share its result (or exception).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def do(self, key, fn):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = {"event": threading.Event(), "result": None, "error": None}
+                self._calls[key] = call
+
+        if not leader:
+            call["event"].wait()
+            if call["error"] is not None:
+                raise call["error"]
+            return call["result"]
+
+        try:
+            call["result"] = fn()
+            return call["result"]
+        except Exception as e:
+            call["error"] = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call["event"].set()
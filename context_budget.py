@@ -0,0 +1,152 @@
+"""
+LiveSearch Context Budget
+Token estimates per provider/model and fitting search context into the model's context window
+"""
+
+import re
+
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+from .passage_ranker import CJK_PATTERN
+
+# Context windows by provider, with model-prefix overrides; Ollama's default num_ctx is small
+PROVIDER_CONTEXT_WINDOWS = {
+    "OpenAI": 128000,
+    "DeepSeek (Official)": 64000,
+    "DeepSeek (Aliyun)": 64000,
+    "Gemini (OpenAI-Format)": 1000000,
+    "Anthropic (Claude)": 200000,
+    "Grok": 128000,
+    "Volcengine (Doubao)": 128000,
+    "Qwen (Aliyun)": 128000,
+    "SiliconFlow (硅基流动)": 32000,
+    "Ollama (Local)": 4096,
+}
+# First matching prefix wins: more specific prefixes go before the ones they extend ("gpt-4o" before "gpt-4")
+MODEL_CONTEXT_WINDOWS = (
+    ("gpt-5", 400000),
+    ("gpt-4.1", 1000000),
+    ("gpt-4o", 128000),
+    ("gpt-4-turbo", 128000),
+    ("gpt-4-32k", 32768),
+    ("gpt-4", 8192),
+    ("gpt-3.5", 16000),
+    ("o1", 200000),
+    ("o3", 200000),
+    ("o4", 200000),
+)
+DEFAULT_CONTEXT_WINDOW = 32000
+
+# Tokenizer density: Chinese-trained tokenizers pack CJK text tighter than GPT/Claude ones
+CJK_EFFICIENT_PROVIDERS = ("DeepSeek", "Qwen", "Volcengine", "SiliconFlow")
+WHITESPACE_RUN = re.compile(r"\s+")
+
+
+def default_context_window(provider, model):
+    model = (model or "").lower()
+    for prefix, window in MODEL_CONTEXT_WINDOWS:
+        if model.startswith(prefix):
+            return window
+    return PROVIDER_CONTEXT_WINDOWS.get(provider, DEFAULT_CONTEXT_WINDOW)
+
+
+class ContextBudget:
+    """
+    Token accounting for one model: estimates prompt size, splits the room left after the
+    fixed prompt and the reserved output into per-source budgets, and trims the
+    lowest-priority sources when the assembled context would still overflow.
+    """
+
+    # Never hand a source less/more than this, whatever the window
+    MIN_SOURCE_TOKENS = 100
+    MAX_SOURCE_TOKENS = 2000
+    # Safety margin for estimation error: share of the window, with a floor
+    MARGIN_RATIO = 0.05
+    MIN_MARGIN = 256
+    # Per-message framing tokens (role markers etc.)
+    MESSAGE_OVERHEAD = 4
+    # Reserve for an attached image (TI2T), roughly one high-detail tile set
+    IMAGE_TOKENS = 1000
+
+    _encodings = {}
+
+    def __init__(self, model_config):
+        self.provider = model_config.get("provider", "")
+        self.model = model_config.get("model", "")
+        self.context_window = model_config.get("context_window") or default_context_window(self.provider, self.model)
+        self.max_output = model_config.get("max_tokens", 2048) or 0
+        self.cjk_ratio = 0.7 if any(name in self.provider for name in CJK_EFFICIENT_PROVIDERS) else 1.0
+        self.chars_per_token = 3.5 if "Anthropic" in self.provider else 4.0
+        self._encoding = self._load_encoding() if self.provider == "OpenAI" else None
+
+    @classmethod
+    def _load_encoding(cls):
+        if tiktoken is None:
+            return None
+        if "o200k_base" not in cls._encodings:
+            try:
+                cls._encodings["o200k_base"] = tiktoken.get_encoding("o200k_base")
+            except Exception as e:
+                # The encoding file is downloaded on first use; fall back to estimates offline
+                print(f"[LiveSearch] tiktoken unavailable, using estimates: {e}")
+                cls._encodings["o200k_base"] = None
+        return cls._encodings["o200k_base"]
+
+    def count(self, text):
+        if not text:
+            return 0
+        if self._encoding is not None:
+            return len(self._encoding.encode(text, disallowed_special=()))
+        cjk = len(CJK_PATTERN.findall(text))
+        other = len(WHITESPACE_RUN.sub(" ", text)) - cjk
+        return int(cjk * self.cjk_ratio + other / self.chars_per_token) + 1
+
+    def count_messages(self, messages):
+        total = 0
+        for message in messages:
+            total += self.MESSAGE_OVERHEAD
+            content = message.get("content", "")
+            if isinstance(content, str):
+                total += self.count(content)
+                continue
+            for part in content:
+                if part.get("type") in ("image_url", "input_image"):
+                    total += self.IMAGE_TOKENS
+                else:
+                    total += self.count(part.get("text", ""))
+        return total
+
+    def available(self, fixed_tokens):
+        """Tokens left for search context once the fixed prompt and the output reserve are taken"""
+        margin = max(self.MIN_MARGIN, int(self.context_window * self.MARGIN_RATIO))
+        return max(0, self.context_window - self.max_output - fixed_tokens - margin)
+
+    def source_budget(self, fixed_tokens, num_sources):
+        """Passage budget per source, so num_sources sources fit next to the fixed prompt"""
+        share = self.available(fixed_tokens) // max(1, num_sources)
+        return max(self.MIN_SOURCE_TOKENS, min(self.MAX_SOURCE_TOKENS, share))
+
+    def fit(self, context_data, source_urls, fixed_tokens):
+        """
+        Drop the lowest-priority (last) sources until the context fits; a lone oversized source is cut.
+        Returns (context_data, source_urls).
+        """
+        available = self.available(fixed_tokens)
+        sizes = [self.count(block) for block in context_data]
+        context_data, source_urls = list(context_data), list(source_urls)
+        dropped = 0
+        while len(context_data) > 1 and sum(sizes) > available:
+            context_data.pop()
+            source_urls.pop()
+            sizes.pop()
+            dropped += 1
+        if context_data and sizes[0] > available:
+            keep_chars = int(len(context_data[0]) * available / sizes[0])
+            context_data[0] = context_data[0][:keep_chars]
+            print(f"[LiveSearch] Context budget: truncated the top source to ~{available} tokens")
+        if dropped:
+            print(f"[LiveSearch] Context budget: dropped {dropped} lowest-priority source(s) to fit {self.context_window} tokens")
+        return context_data, source_urls
@@ -0,0 +1,111 @@
+"""
+LiveSearch Deduplication
+URL canonicalization (skip mirrors before fetching) and SimHash fingerprints
+(drop near-duplicate page text before it reaches the prompt)
+"""
+
+import hashlib
+import re
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+from .passage_ranker import tokenize
+
+# Query parameters that only track the click, never select content
+TRACKING_PARAMS = frozenset((
+    "gclid", "dclid", "gbraid", "wbraid", "fbclid", "msclkid", "yclid", "igshid", "twclid", "ttclid",
+    "mc_cid", "mc_eid", "_ga", "_gl", "_hsenc", "_hsmi", "ref_src", "ref_url", "spm", "scm", "share_source",
+))
+TRACKING_PREFIXES = ("utm_", "pk_", "mtm_", "hmsr", "hmpl", "hmcu", "hmkw", "hmci")
+# Host variants serving the same pages
+HOST_PREFIXES = ("www.", "m.", "mobile.", "amp.")
+
+SIMHASH_BITS = 64
+# Fingerprints within this many differing bits are treated as the same text
+SIMHASH_DISTANCE = 6
+SHINGLE_SIZE = 3
+# Shorter texts give unstable fingerprints (error pages, stubs); never treated as duplicates
+MIN_SIMHASH_TERMS = 30
+
+WHITESPACE_RUN = re.compile(r"\s+")
+
+
+def canonical_url(url):
+    """
+    Comparison key for a URL: scheme, www./m. prefixes, default ports, fragments, tracking
+    parameters and trailing slashes removed, remaining parameters sorted.
+    Only used to detect duplicates; the original URL is what gets fetched.
+    """
+    try:
+        parts = urlsplit((url or "").strip())
+        host = (parts.hostname or "").lower()
+        port = parts.port
+    except ValueError:
+        return url
+    for prefix in HOST_PREFIXES:
+        if host.startswith(prefix) and host.count(".") > 1:
+            host = host[len(prefix):]
+            break
+    if port and port not in (80, 443):
+        host = f"{host}:{port}"
+    path = WHITESPACE_RUN.sub("", parts.path).rstrip("/")
+    params = sorted(
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if key.lower() not in TRACKING_PARAMS and not key.lower().startswith(TRACKING_PREFIXES)
+    )
+    query = f"?{urlencode(params)}" if params else ""
+    return f"{host}{path}{query}"
+
+
+def simhash(text):
+    """64-bit SimHash over word shingles of text; None when the text is too short to fingerprint"""
+    terms = tokenize(text)
+    if len(terms) < MIN_SIMHASH_TERMS:
+        return None
+    weights = [0] * SIMHASH_BITS
+    shingles = {" ".join(terms[i:i + SHINGLE_SIZE]) for i in range(len(terms) - SHINGLE_SIZE + 1)}
+    for shingle in shingles:
+        value = int.from_bytes(hashlib.blake2b(shingle.encode("utf-8"), digest_size=8).digest(), "big")
+        for bit in range(SIMHASH_BITS):
+            weights[bit] += 1 if value >> bit & 1 else -1
+    fingerprint = 0
+    for bit, weight in enumerate(weights):
+        if weight > 0:
+            fingerprint |= 1 << bit
+    return fingerprint
+
+
+def hamming_distance(a, b):
+    return bin(a ^ b).count("1")
+
+
+class SourceDeduplicator:
+    """
+    Tracks the sources kept so far for one answer. URLs are checked before fetching,
+    page text after extraction; the first (highest-priority) copy wins.
+    """
+
+    def __init__(self, max_distance=SIMHASH_DISTANCE):
+        self.max_distance = max_distance
+        self.urls = {}
+        self.fingerprints = []
+
+    def seen_url(self, url):
+        """True if an equivalent URL was already accepted; otherwise records it"""
+        key = canonical_url(url)
+        if key in self.urls:
+            print(f"[LiveSearch] Skipping duplicate URL: {url} (same as {self.urls[key]})")
+            return True
+        self.urls[key] = url
+        return False
+
+    def duplicate_of(self, url, content):
+        """URL of an already kept near-identical page, or None (content is then recorded)"""
+        fingerprint = simhash(content)
+        if fingerprint is None:
+            return None
+        for kept_url, kept in self.fingerprints:
+            if hamming_distance(fingerprint, kept) <= self.max_distance:
+                print(f"[LiveSearch] Dropping near-duplicate page: {url} (matches {kept_url})")
+                return kept_url
+        self.fingerprints.append((url, fingerprint))
+        return None
@@ -0,0 +1,189 @@
+"""
+LiveSearch Provider Failover
+Per-process circuit breakers per LLM provider, retry backoff with jitter and
+Retry-After handling, and the fallback chain configured in the API Loader
+"""
+
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+
+from .hedging import has_image
+
+# 429, 5xx and Anthropic's 529 "overloaded" are worth retrying; other 4xx are not
+RETRYABLE_STATUS = frozenset((408, 429, 500, 502, 503, 504, 529))
+
+MAX_ATTEMPTS = 3
+BACKOFF_BASE = 1.0
+BACKOFF_MAX = 20.0
+# A longer Retry-After fails over (and holds the breaker open) instead of waiting
+MAX_RETRY_WAIT = 30.0
+# Limits set for the primary model; fallback entries use their own provider's defaults
+PRIMARY_ONLY_KEYS = ("hedge", "fallbacks", "context_window", "rpm_limit", "tpm_limit")
+
+
+class ProviderError(Exception):
+    """
+    Failed LLM request. message is the usual "Error calling LLM: ..." string;
+    transient failures (timeouts, connection errors, 429/5xx) count against the circuit breaker.
+    """
+
+    def __init__(self, message, status=None, retry_after=None, timeout=False, connection=False):
+        super().__init__(message)
+        self.message = message
+        self.status = status
+        self.retry_after = retry_after
+        self.timeout = timeout
+        self.connection = connection
+
+    @property
+    def transient(self):
+        return self.timeout or self.connection or self.status in RETRYABLE_STATUS
+
+    @property
+    def retryable(self):
+        # A timeout already cost the full timeout; the next provider is a better bet than a second wait
+        return self.transient and not self.timeout
+
+
+def response_error(message, status, headers):
+    return ProviderError(message, status=status, retry_after=parse_retry_after(headers.get("Retry-After")))
+
+
+def parse_retry_after(value):
+    """Seconds from a Retry-After header (delta-seconds or HTTP date), or None"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError, OverflowError):
+        return None
+
+
+def backoff_delay(attempt, retry_after=None):
+    """Full-jitter exponential backoff; Retry-After, when given, is the floor"""
+    delay = random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt))
+    if retry_after is not None:
+        delay = retry_after + random.uniform(0, BACKOFF_BASE)
+    return delay
+
+
+class CircuitBreaker:
+    """
+    Closed: requests pass. FAILURE_THRESHOLD consecutive transient failures open it, and
+    requests fail over immediately for RESET_TIMEOUT seconds. After that a single trial
+    request is let through (half-open); its outcome closes or re-opens the breaker.
+    """
+
+    FAILURE_THRESHOLD = 3
+    RESET_TIMEOUT = 60.0
+
+    def __init__(self, name):
+        self.name = name
+        self.failures = 0
+        self.opened_until = 0.0
+        self.trial_in_flight = False
+        self._lock = threading.Lock()
+
+    def allow(self):
+        with self._lock:
+            if not self.opened_until:
+                return True
+            if time.monotonic() < self.opened_until or self.trial_in_flight:
+                return False
+            self.trial_in_flight = True
+            return True
+
+    def retry_in(self):
+        return max(0.0, self.opened_until - time.monotonic())
+
+    def abandon(self):
+        """A request was cancelled before it finished; a half-open trial slot is freed"""
+        with self._lock:
+            self.trial_in_flight = False
+
+    def record_success(self):
+        with self._lock:
+            if self.opened_until:
+                print(f"[LiveSearch] Circuit closed: {self.name} is answering again")
+            self.failures = 0
+            self.opened_until = 0.0
+            self.trial_in_flight = False
+
+    def record_failure(self, open_for=None):
+        with self._lock:
+            self.failures += 1
+            self.trial_in_flight = False
+            if open_for is None and self.failures < self.FAILURE_THRESHOLD:
+                return
+            duration = max(open_for or 0.0, self.RESET_TIMEOUT if self.failures >= self.FAILURE_THRESHOLD else 0.0)
+            self.opened_until = time.monotonic() + duration
+            print(f"[LiveSearch] Circuit open: {self.name} after {self.failures} failure(s), failing over for {duration:.0f}s")
+
+
+_breakers = {}
+_breakers_lock = threading.Lock()
+
+
+def breaker_for(model_config):
+    """Shared breaker per provider endpoint (provider + base URL)"""
+    provider = model_config.get("provider", "")
+    key = (provider, model_config.get("base_url", ""))
+    with _breakers_lock:
+        breaker = _breakers.get(key)
+        if breaker is None:
+            breaker = _breakers[key] = CircuitBreaker(provider)
+        return breaker
+
+
+def record_outcome(breaker, error):
+    """Update the breaker for a failed attempt; non-transient errors mean the provider is up"""
+    if not error.transient:
+        breaker.record_success()
+    elif error.retry_after is not None and error.retry_after > MAX_RETRY_WAIT:
+        breaker.record_failure(open_for=error.retry_after)
+    else:
+        breaker.record_failure()
+
+
+def should_retry(error, attempt):
+    """(retry?, delay) after attempt (0-based) failed with error"""
+    if not error.retryable or attempt + 1 >= MAX_ATTEMPTS:
+        return False, 0.0
+    if error.retry_after is not None and error.retry_after > MAX_RETRY_WAIT:
+        return False, 0.0
+    return True, backoff_delay(attempt, error.retry_after)
+
+
+def circuit_open_error(model_config, breaker):
+    return (f"Error calling LLM: {model_config.get('provider')} circuit open after repeated failures "
+            f"(retrying in {breaker.retry_in():.0f}s)")
+
+
+def chain(model_config, messages):
+    """
+    Configs to try in order: the primary, then the API Loader's fallback entries.
+    Image prompts stay on the primary (fallback entries are text models).
+    """
+    configs = [model_config]
+    if has_image(messages):
+        return configs
+    base = {key: value for key, value in model_config.items() if key not in PRIMARY_ONLY_KEYS}
+    for entry in model_config.get("fallbacks") or []:
+        configs.append(dict(base, **entry))
+    return configs
+
+
+def describe(model_config):
+    return f"{model_config.get('provider')} / {model_config.get('model')}"
+
+
+def failover_report(answered_by, failures):
+    """Line for the node output: which entry answered after which ones failed"""
+    skipped = "; ".join(f"{describe(config)}: {error[:100]}" for config, error in failures)
+    return f"Failover: answered by {describe(answered_by)} after {skipped}"
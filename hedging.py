@@ -0,0 +1,134 @@
+"""
+LiveSearch Request Hedging
+Latency history per provider/model and the shared pieces of hedged LLM calls: when the
+primary model is slower than its usual (percentile) latency, the same request is sent
+to a backup provider and the first complete answer wins.
+"""
+
+import threading
+import time
+from collections import defaultdict, deque
+
+# Delay before the backup request while there is too little history for a percentile
+DEFAULT_HEDGE_DELAY = 10.0
+MIN_HEDGE_DELAY = 1.0
+MIN_SAMPLES = 5
+HISTORY_SIZE = 50
+
+
+class LatencyHistory:
+    """Recent successful call durations per (provider, model, stream)"""
+
+    def __init__(self, size=HISTORY_SIZE):
+        self.size = size
+        self._samples = defaultdict(lambda: deque(maxlen=self.size))
+        self._lock = threading.Lock()
+
+    def record(self, key, seconds):
+        with self._lock:
+            self._samples[key].append(seconds)
+
+    def percentile(self, key, pct):
+        """pct-th percentile of the recorded durations, or None with fewer than MIN_SAMPLES"""
+        with self._lock:
+            samples = sorted(self._samples.get(key, ()))
+        if len(samples) < MIN_SAMPLES:
+            return None
+        index = min(len(samples) - 1, int(round(pct / 100 * (len(samples) - 1))))
+        return samples[index]
+
+
+LATENCY_HISTORY = LatencyHistory()
+
+
+def latency_key(model_config):
+    return (model_config.get("provider", ""), model_config.get("model", ""), bool(model_config.get("stream", False)))
+
+
+def record_latency(model_config, seconds, answer):
+    if not is_error(answer):
+        LATENCY_HISTORY.record(latency_key(model_config), seconds)
+
+
+def is_error(answer):
+    """LLM calls return errors as strings starting with "Error" """
+    return not answer or answer.startswith("Error")
+
+
+def has_image(messages):
+    for message in messages:
+        content = message.get("content")
+        if isinstance(content, list) and any(part.get("type") in ("image_url", "input_image") for part in content):
+            return True
+    return False
+
+
+def backup_config(model_config, messages):
+    """
+    Model config for the backup request, or None when hedging is off.
+    Image prompts are not hedged: the backup is a text model.
+    """
+    hedge = model_config.get("hedge")
+    if not hedge or has_image(messages):
+        return None
+    return dict(
+        model_config,
+        provider=hedge["provider"],
+        model=hedge["model"],
+        api_key=hedge["api_key"],
+        base_url=hedge["base_url"],
+        hedge=None,
+    )
+
+
+def hedge_delay(model_config):
+    """(seconds to wait for the primary before hedging, description of where the number came from)"""
+    pct = model_config["hedge"].get("percentile", 95)
+    observed = LATENCY_HISTORY.percentile(latency_key(model_config), pct)
+    if observed is None:
+        return DEFAULT_HEDGE_DELAY, "default"
+    return max(MIN_HEDGE_DELAY, observed), f"p{pct}"
+
+
+class HedgeStats:
+    """Timeline of one hedged call, for the log and the node output"""
+
+    def __init__(self, primary_config, backup, delay, delay_source):
+        self.labels = {
+            "primary": f"{primary_config.get('provider')} / {primary_config.get('model')}",
+            "backup": f"{backup.get('provider')} / {backup.get('model')}",
+        }
+        self.delay = delay
+        self.delay_source = delay_source
+        self.started_at = {}
+        self.durations = {}
+        self.winner = None
+        self.decided_at = None
+        # Losers that could not be stopped (blocking requests run on in their thread)
+        self.abandoned = set()
+
+    def start(self, name):
+        self.started_at[name] = time.perf_counter()
+
+    def finished(self, name):
+        self.durations[name] = time.perf_counter() - self.started_at[name]
+
+    def win(self, name):
+        self.winner = name
+        self.decided_at = time.perf_counter()
+
+    def abandon(self, name):
+        self.abandoned.add(name)
+
+    def report(self):
+        if "backup" not in self.started_at:
+            return f"Hedge: primary answered in {self.durations.get('primary', 0):.2f}s, within the {self.delay:.1f}s {self.delay_source} delay"
+        parts = []
+        for name in ("primary", "backup"):
+            if name in self.durations:
+                parts.append(f"{name} ({self.labels[name]}) {self.durations[name]:.2f}s")
+            else:
+                outcome = "abandoned (still running)" if name in self.abandoned else "cancelled"
+                parts.append(f"{name} ({self.labels[name]}) {outcome} after {self.decided_at - self.started_at[name]:.2f}s")
+        sent_after = self.started_at["backup"] - self.started_at["primary"]
+        return f"Hedge: {self.winner or 'no answer'} won, backup sent after {sent_after:.1f}s ({self.delay_source} delay {self.delay:.1f}s); {', '.join(parts)}"
@@ -0,0 +1,385 @@
+"""
+LiveSearch HTML Extraction
+Pluggable HTML -> text backends (selectolax, lxml, BeautifulSoup) sharing a
+readability-style main-content detector
+"""
+
+import re
+
+from bs4 import BeautifulSoup
+
+try:
+    from selectolax.lexbor import LexborHTMLParser
+    SELECTOLAX_AVAILABLE = True
+except ImportError:
+    SELECTOLAX_AVAILABLE = False
+
+try:
+    import lxml.etree
+    import lxml.html
+    LXML_AVAILABLE = True
+except ImportError:
+    LXML_AVAILABLE = False
+
+CHARSET_PATTERN = re.compile(r"charset\s*=\s*[\"']?([\w.:-]+)", re.IGNORECASE)
+META_CHARSET_PATTERN = re.compile(rb"<meta[^>]+charset\s*=\s*[\"']?([\w.:-]+)", re.IGNORECASE)
+# lxml refuses decoded text that still declares an encoding (XHTML served as application/xhtml+xml)
+XML_DECLARATION = re.compile(r"^\s*<\?xml[^>]*\?>")
+
+# Never part of the readable content
+BOILERPLATE_TAGS = ("script", "style", "noscript", "template", "svg", "iframe", "form", "header", "footer", "nav", "aside")
+PARAGRAPH_TAGS = ("p", "pre", "blockquote")
+
+POSITIVE_HINTS = re.compile(r"article|body|content|entry|main|page|post|text|blog|story|forecast|weather", re.IGNORECASE)
+# Blocks dropped before scoring unless their class/id also looks like content
+UNLIKELY_HINTS = re.compile(
+    r"comment|sidebar|related|share|social|footer|cookie|banner|menu|breadcrumb|subscribe|sponsor|advert|promo|popup|modal",
+    re.IGNORECASE
+)
+MAYBE_CONTENT_HINTS = re.compile(r"article|body|column|main|content", re.IGNORECASE)
+NEGATIVE_HINTS = re.compile(
+    r"comment|footer|footnote|masthead|related|share|social|sidebar|sponsor|advert|promo|cookie|banner|menu|breadcrumb|subscribe",
+    re.IGNORECASE
+)
+
+
+def decode_html(body, content_type=""):
+    """
+    Decode a response body: charset from the Content-Type header first, then <meta charset>, then UTF-8.
+    Avoids BeautifulSoup's byte-level encoding sniffing.
+    """
+    if isinstance(body, str):
+        return body
+    candidates = []
+    match = CHARSET_PATTERN.search(content_type or "")
+    if match:
+        candidates.append(match.group(1))
+    meta = META_CHARSET_PATTERN.search(body[:4096])
+    if meta:
+        candidates.append(meta.group(1).decode("ascii", "ignore"))
+    for charset in candidates:
+        try:
+            return body.decode(charset)
+        except (LookupError, UnicodeDecodeError):
+            continue
+    return body.decode("utf-8", errors="replace")
+
+
+def clean_text(text):
+    """Strip lines, split runs of double spaces into lines and drop blanks"""
+    lines = (line.strip() for line in text.splitlines())
+    chunks = (phrase.strip() for line in lines for phrase in line.split("  "))
+    return "\n".join(chunk for chunk in chunks if chunk)
+
+
+class HTMLExtractor:
+    """
+    Base extractor. Subclasses adapt a parser's tree API; scoring is shared:
+    paragraphs add their score to their parent and half of it to the grandparent,
+    the best-scoring block (penalised by link density) is taken as the main content.
+    """
+
+    name = "base"
+    # Below this many characters the main block is not trusted and the whole body is used
+    MIN_MAIN_CHARS = 250
+    MIN_PARAGRAPH_CHARS = 25
+    # Share of the page's non-link text the main block must hold. Below it the content is spread
+    # over sibling blocks (forecast tables next to a summary, replies in a thread), and the block
+    # is widened to its ancestors until it holds that share.
+    MIN_MAIN_SHARE = 0.5
+
+    def extract(self, html):
+        if not html or not html.strip():
+            return ""
+        tree = self._parse(html)
+        self._remove(tree, BOILERPLATE_TAGS)
+        self._remove_unlikely(tree)
+        main = self._main_block(tree)
+        if main is not None:
+            text = clean_text(self._text(self._widen(main, self._body(tree))))
+            if len(text) >= self.MIN_MAIN_CHARS:
+                return text
+        body = self._body(tree)
+        return clean_text(self._text(body)) if body is not None else ""
+
+    def _main_block(self, tree):
+        candidates = {}
+        for paragraph in self._paragraphs(tree):
+            text = self._text(paragraph).strip()
+            if len(text) < self.MIN_PARAGRAPH_CHARS:
+                continue
+            score = 1 + text.count(",") + text.count("，") + min(len(text) // 100, 3)
+            parent = self._parent(paragraph)
+            grandparent = self._parent(parent) if parent is not None else None
+            for node, share in ((parent, 1.0), (grandparent, 0.5)):
+                if node is None:
+                    continue
+                key = self._key(node)
+                if key not in candidates:
+                    candidates[key] = [node, self._initial_score(node)]
+                candidates[key][1] += score * share
+
+        best, best_score = None, 0
+        for node, score in candidates.values():
+            score *= 1 - self._link_density(node)
+            if score > best_score:
+                best, best_score = node, score
+        return best
+
+    def _widen(self, main, body):
+        page_chars = self._content_chars(body) if body is not None else 0
+        while self._content_chars(main) < self.MIN_MAIN_SHARE * page_chars:
+            parent = self._parent(main)
+            if parent is None:
+                break
+            main = parent
+        return main
+
+    def _content_chars(self, node):
+        """Characters of text outside links"""
+        return len(self._text(node)) - self._link_text_length(node)
+
+    def _remove_unlikely(self, tree):
+        for node in self._hinted_nodes(tree):
+            if self._tag(node) in ("html", "body", "article", "main"):
+                continue
+            hints = self._class_id(node)
+            if UNLIKELY_HINTS.search(hints) and not MAYBE_CONTENT_HINTS.search(hints):
+                self._drop(node)
+
+    def _initial_score(self, node):
+        tag = self._tag(node)
+        score = {"article": 10, "main": 10, "div": 5, "section": 3, "td": 3, "blockquote": 3}.get(tag, 0)
+        hints = self._class_id(node)
+        if hints:
+            if POSITIVE_HINTS.search(hints):
+                score += 25
+            if NEGATIVE_HINTS.search(hints):
+                score -= 25
+        return score
+
+    def _link_density(self, node):
+        text_length = len(self._text(node))
+        if not text_length:
+            return 1.0
+        return min(1.0, self._link_text_length(node) / text_length)
+
+    def _key(self, node):
+        """Identity of a node across repeated parent lookups"""
+        return id(node)
+
+    # Parser adapters
+    def _parse(self, html):
+        raise NotImplementedError
+
+    def _remove(self, tree, tags):
+        raise NotImplementedError
+
+    def _hinted_nodes(self, tree):
+        """Elements carrying a class or id attribute, in document order"""
+        raise NotImplementedError
+
+    def _drop(self, node):
+        raise NotImplementedError
+
+    def _body(self, tree):
+        raise NotImplementedError
+
+    def _paragraphs(self, tree):
+        raise NotImplementedError
+
+    def _parent(self, node):
+        raise NotImplementedError
+
+    def _tag(self, node):
+        raise NotImplementedError
+
+    def _class_id(self, node):
+        raise NotImplementedError
+
+    def _text(self, node):
+        raise NotImplementedError
+
+    def _link_text_length(self, node):
+        raise NotImplementedError
+
+
+class SelectolaxExtractor(HTMLExtractor):
+    """selectolax (lexbor, C) backend: fastest"""
+
+    name = "selectolax"
+
+    def _parse(self, html):
+        return LexborHTMLParser(html)
+
+    def _remove(self, tree, tags):
+        for node in tree.css(",".join(tags)):
+            node.decompose()
+
+    def _hinted_nodes(self, tree):
+        return tree.css("[class],[id]")
+
+    def _drop(self, node):
+        node.decompose()
+
+    def _key(self, node):
+        # selectolax returns a new Python wrapper on every access
+        return node.mem_id
+
+    def _body(self, tree):
+        return tree.body or tree.root
+
+    def _paragraphs(self, tree):
+        return tree.css(",".join(PARAGRAPH_TAGS))
+
+    def _parent(self, node):
+        parent = node.parent
+        return parent if parent is not None and parent.tag not in ("html", "-undef") else None
+
+    def _tag(self, node):
+        return node.tag
+
+    def _class_id(self, node):
+        attributes = node.attributes
+        return f"{attributes.get('class') or ''} {attributes.get('id') or ''}".strip()
+
+    def _text(self, node):
+        return node.text(separator="\n")
+
+    def _link_text_length(self, node):
+        return sum(len(link.text()) for link in node.css("a"))
+
+
+class LxmlExtractor(HTMLExtractor):
+    """lxml (libxml2, C) backend"""
+
+    name = "lxml"
+
+    def extract(self, html):
+        try:
+            return super().extract(html)
+        except (ValueError, lxml.etree.LxmlError) as e:
+            # Markup libxml2 will not take (e.g. a document of comments only): BeautifulSoup copes
+            print(f"[LiveSearch] lxml could not parse the page ({e}), using BS4")
+            return get_extractor("bs4").extract(html)
+
+    def _parse(self, html):
+        if isinstance(html, str):
+            html = XML_DECLARATION.sub("", html, count=1)
+        return lxml.html.document_fromstring(html)
+
+    def _remove(self, tree, tags):
+        for node in tree.xpath("|".join(f"//{tag}" for tag in tags)):
+            node.drop_tree()
+
+    def _hinted_nodes(self, tree):
+        return tree.xpath("//*[@class or @id]")
+
+    def _drop(self, node):
+        if node.getparent() is not None:
+            node.drop_tree()
+
+    def _body(self, tree):
+        return tree.find("body") if tree.find("body") is not None else tree
+
+    def _paragraphs(self, tree):
+        return tree.xpath("|".join(f"//{tag}" for tag in PARAGRAPH_TAGS))
+
+    def _parent(self, node):
+        parent = node.getparent()
+        return parent if parent is not None and parent.tag != "html" else None
+
+    def _tag(self, node):
+        return node.tag if isinstance(node.tag, str) else ""
+
+    def _class_id(self, node):
+        return f"{node.get('class') or ''} {node.get('id') or ''}".strip()
+
+    def _text(self, node):
+        return "\n".join(node.itertext())
+
+    def _link_text_length(self, node):
+        return sum(len(link.text_content()) for link in node.iter("a"))
+
+
+class BS4Extractor(HTMLExtractor):
+    """BeautifulSoup backend (html.parser, pure Python): always available, slowest"""
+
+    name = "bs4"
+
+    def _parse(self, html):
+        return BeautifulSoup(html, "html.parser")
+
+    def _remove(self, tree, tags):
+        for node in tree(list(tags)):
+            node.extract()
+
+    def _hinted_nodes(self, tree):
+        return [node for node in tree.find_all(True) if node.get("class") or node.get("id")]
+
+    def _drop(self, node):
+        node.extract()
+
+    def _body(self, tree):
+        return tree.body or tree
+
+    def _paragraphs(self, tree):
+        return tree.find_all(list(PARAGRAPH_TAGS))
+
+    def _parent(self, node):
+        parent = node.parent
+        return parent if parent is not None and parent.name not in ("html", "[document]") else None
+
+    def _tag(self, node):
+        return node.name or ""
+
+    def _class_id(self, node):
+        classes = node.get("class") or []
+        if isinstance(classes, list):
+            classes = " ".join(classes)
+        return f"{classes} {node.get('id') or ''}".strip()
+
+    def _text(self, node):
+        return node.get_text(separator="\n")
+
+    def _link_text_length(self, node):
+        return sum(len(link.get_text()) for link in node.find_all("a"))
+
+
+EXTRACTORS = {
+    "selectolax": SelectolaxExtractor,
+    "lxml": LxmlExtractor,
+    "bs4": BS4Extractor,
+}
+
+
+def available_backends():
+    """
+    Installed backends, fastest first ("auto" takes the first). The order comes from
+    benchmarks/extraction_benchmark.py: per page, selectolax ~3 ms, lxml ~6-9 ms, bs4 ~25-40 ms.
+    The main-content detector is shared, so all backends return the same text.
+    """
+    backends = []
+    if SELECTOLAX_AVAILABLE:
+        backends.append("selectolax")
+    if LXML_AVAILABLE:
+        backends.append("lxml")
+    backends.append("bs4")
+    return backends
+
+
+_instances = {}
+
+
+def get_extractor(name="auto"):
+    """
+    Extractor by name ("selectolax", "lxml", "bs4"); "auto" or an unavailable backend picks the fastest installed one
+    """
+    name = (name or "auto").lower()
+    backends = available_backends()
+    if name not in backends:
+        name = backends[0]
+    extractor = _instances.get(name)
+    if extractor is None:
+        extractor = _instances[name] = EXTRACTORS[name]()
+    return extractor
@@ -0,0 +1,186 @@
+"""
+LiveSearch HTTP Session Pool
+Process-wide keep-alive sessions shared by SearchTool and LLMClient
+"""
+
+import threading
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from .rate_limiter import RateLimiter
+try:
+    from urllib3.util.retry import Retry
+except ImportError:
+    Retry = None
+
+
+class _PooledAdapter(HTTPAdapter):
+    """
+    HTTPAdapter that counts requests so pool reuse can be reported,
+    and waits on the per-host rate limit before each request
+    """
+
+    def __init__(self, *args, **kwargs):
+        self.request_count = 0
+        super().__init__(*args, **kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        # urllib3 2.x drops the least recently used host pool without closing its sockets
+        self.poolmanager.pools.dispose_func = lambda pool: pool.close()
+
+    def send(self, request, **kwargs):
+        self.request_count += 1
+        host = urlsplit(request.url).hostname
+        RateLimiter.wait(host)
+        response = super().send(request, **kwargs)
+        if response.status_code == 429:
+            RateLimiter.throttled(host)
+        else:
+            RateLimiter.succeeded(host)
+        return response
+
+    def connection_count(self):
+        """Number of TCP connections opened by this adapter's pools (direct + proxied)"""
+        managers = [self.poolmanager] + list(self.proxy_manager.values())
+        total = 0
+        for manager in managers:
+            if manager is None:
+                continue
+            for key in list(manager.pools.keys()):
+                pool = manager.pools.get(key)
+                if pool is not None:
+                    total += getattr(pool, "num_connections", 0)
+        return total
+
+
+class SessionPool:
+    """
+    Registry of requests.Session objects for the fixed API hosts (LLM providers, Open-Meteo,
+    SearXNG, GeoNames), keyed by (proxy, scheme://host), plus one shared session per proxy for
+    search-result pages. Sessions keep TCP/TLS connections alive between calls and between
+    queue items, so repeat calls to a host skip both the handshake and the DNS lookup.
+    """
+
+    # Connection pool sizing: several workflows may hit the same provider at once
+    POOL_CONNECTIONS = 4
+    POOL_MAXSIZE = 16
+    # Page fetches go to arbitrary hosts: the page session keeps pools for the most recently
+    # used PAGE_HOSTS hosts (urllib3 closes the least recently used pool on overflow)
+    PAGE_HOSTS = 32
+    PAGE_POOL_MAXSIZE = 4
+    # Retries only for connection failures and gateway errors on idempotent requests
+    MAX_RETRIES = 2
+    BACKOFF_FACTOR = 0.3
+    RETRY_STATUS = (502, 503, 504)
+
+    _sessions = {}
+    _page_sessions = {}
+    _lock = threading.Lock()
+
+    @staticmethod
+    def _origin(url):
+        parts = urlsplit(url)
+        return f"{parts.scheme.lower()}://{parts.netloc.lower()}"
+
+    @classmethod
+    def _build_retry(cls):
+        if Retry is None:
+            return cls.MAX_RETRIES
+        options = {
+            "total": cls.MAX_RETRIES,
+            "connect": cls.MAX_RETRIES,
+            "read": 0,
+            "status": cls.MAX_RETRIES,
+            "backoff_factor": cls.BACKOFF_FACTOR,
+            "status_forcelist": cls.RETRY_STATUS,
+            "raise_on_status": False,
+        }
+        try:
+            return Retry(allowed_methods=frozenset(["GET", "HEAD"]), **options)
+        except TypeError:
+            # urllib3 < 1.26
+            return Retry(method_whitelist=frozenset(["GET", "HEAD"]), **options)
+
+    @classmethod
+    def _new_session(cls, proxy, pool_connections, pool_maxsize):
+        session = requests.Session()
+        adapter = _PooledAdapter(
+            pool_connections=pool_connections,
+            pool_maxsize=pool_maxsize,
+            max_retries=cls._build_retry()
+        )
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        if proxy:
+            session.proxies.update({"http": proxy, "https": proxy})
+        return session
+
+    @classmethod
+    def get_session(cls, url, proxy=None):
+        """
+        Return the shared session for an API URL's origin and proxy, creating it on first use.
+        Search-result pages use page_session() instead, so arbitrary hosts do not pile up here.
+        """
+        key = (proxy or "", cls._origin(url))
+        session = cls._sessions.get(key)
+        if session is not None:
+            return session
+
+        with cls._lock:
+            session = cls._sessions.get(key)
+            if session is None:
+                session = cls._new_session(proxy, cls.POOL_CONNECTIONS, cls.POOL_MAXSIZE)
+                cls._sessions[key] = session
+        return session
+
+    @classmethod
+    def page_session(cls, proxy=None):
+        """
+        Return the session shared by all page fetches through proxy (at most PAGE_HOSTS host pools)
+        """
+        key = proxy or ""
+        session = cls._page_sessions.get(key)
+        if session is not None:
+            return session
+
+        with cls._lock:
+            session = cls._page_sessions.get(key)
+            if session is None:
+                session = cls._new_session(proxy, cls.PAGE_HOSTS, cls.PAGE_POOL_MAXSIZE)
+                cls._page_sessions[key] = session
+        return session
+
+    @classmethod
+    def stats(cls):
+        """
+        Per-origin pool statistics: requests sent vs. connections opened
+        """
+        result = []
+        sessions = list(cls._sessions.items())
+        sessions += [((proxy, "pages"), session) for proxy, session in list(cls._page_sessions.items())]
+        for (proxy, origin), session in sessions:
+            adapter = session.get_adapter("https://")
+            requests_sent = getattr(adapter, "request_count", 0)
+            connections = adapter.connection_count() if isinstance(adapter, _PooledAdapter) else 0
+            result.append({
+                "origin": origin,
+                "proxy": proxy or None,
+                "requests": requests_sent,
+                "connections": connections,
+                "reused": max(0, requests_sent - connections)
+            })
+        return result
+
+    @classmethod
+    def log_stats(cls):
+        stats = cls.stats()
+        if not stats:
+            return
+        total_requests = sum(item["requests"] for item in stats)
+        total_connections = sum(item["connections"] for item in stats)
+        reuse = (1 - total_connections / total_requests) * 100 if total_requests else 0
+        print(f"[LiveSearch] HTTP pool: {total_requests} requests over {total_connections} connections "
+              f"({reuse:.0f}% reused, {len(stats)} hosts)")
@@ -0,0 +1,237 @@
+"""
+LiveSearch Offline Reverse Geocoder
+Resolves coordinates to city/state/country from a local GeoNames gazetteer
+"""
+
+import heapq
+import io
+import math
+import os
+import threading
+import time
+import zipfile
+
+from .http_pool import SessionPool
+
+try:
+    from scipy.spatial import cKDTree
+except ImportError:
+    cKDTree = None
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.realpath(__file__)), "data", "geonames")
+GEONAMES_BASE_URL = "https://download.geonames.org/export/dump"
+EARTH_RADIUS_KM = 6371.0
+
+
+def _to_unit_vector(lat, lon):
+    """Project lat/lon onto the unit sphere so Euclidean neighbours are great-circle neighbours"""
+    lat_r, lon_r = math.radians(lat), math.radians(lon)
+    cos_lat = math.cos(lat_r)
+    return (cos_lat * math.cos(lon_r), cos_lat * math.sin(lon_r), math.sin(lat_r))
+
+
+def _chord_to_km(chord):
+    return 2 * math.asin(min(1.0, chord / 2)) * EARTH_RADIUS_KM
+
+
+class _KDTree:
+    """
+    Minimal 3-d KD-tree (used when scipy is not installed)
+    """
+
+    def __init__(self, points):
+        self.points = points
+        self.root = self._build(list(range(len(points))), 0)
+
+    def _build(self, indices, depth):
+        if not indices:
+            return None
+        axis = depth % 3
+        indices.sort(key=lambda i: self.points[i][axis])
+        mid = len(indices) // 2
+        return (
+            indices[mid],
+            axis,
+            self._build(indices[:mid], depth + 1),
+            self._build(indices[mid + 1:], depth + 1)
+        )
+
+    def query(self, point, k):
+        """Return [(distance, index)] of the k nearest points, closest first"""
+        heap = []  # max-heap on squared distance via negation
+
+        def visit(node):
+            if node is None:
+                return
+            index, axis, left, right = node
+            candidate = self.points[index]
+            dist2 = sum((a - b) ** 2 for a, b in zip(point, candidate))
+            if len(heap) < k:
+                heapq.heappush(heap, (-dist2, index))
+            elif dist2 < -heap[0][0]:
+                heapq.heapreplace(heap, (-dist2, index))
+            diff = point[axis] - candidate[axis]
+            near, far = (left, right) if diff < 0 else (right, left)
+            visit(near)
+            if len(heap) < k or diff * diff < -heap[0][0]:
+                visit(far)
+
+        visit(self.root)
+        return sorted((math.sqrt(-d), i) for d, i in heap)
+
+
+class OfflineGeocoder:
+    """
+    Nearest-place lookup over a GeoNames cities dump (cities15000 by default).
+    Returns Nominatim-style address dicts: city/town, suburb, state, country.
+    """
+
+    GAZETTEER = "cities15000"
+    # Beyond this distance the nearest town is not a meaningful answer (open sea, poles)
+    MAX_DISTANCE_KM = 100
+    # Places of at least this size are reported as "city", smaller ones as "town"
+    CITY_POPULATION = 100000
+    # A failed load (e.g. download blocked without the proxy) is retried after this many seconds
+    RETRY_AFTER = 10 * 60
+
+    _shared = None
+    _shared_failed_at = 0.0
+    _shared_lock = threading.Lock()
+
+    def __init__(self, data_dir=DATA_DIR, gazetteer=None):
+        self.data_dir = data_dir
+        self.gazetteer = gazetteer or self.GAZETTEER
+        self.places = []
+        self.tree = None
+        self.admin1 = {}
+        self.countries = {}
+
+    @classmethod
+    def shared(cls, auto_download=True, proxy=None):
+        """
+        Process-wide instance, loaded on first use (downloading through proxy if needed).
+        Returns None if the gazetteer is unavailable; a failed load is retried after RETRY_AFTER.
+        """
+        if cls._shared is not None:
+            return cls._shared
+        if time.time() - cls._shared_failed_at < cls.RETRY_AFTER:
+            return None
+        with cls._shared_lock:
+            if cls._shared is None and time.time() - cls._shared_failed_at >= cls.RETRY_AFTER:
+                geocoder = cls()
+                try:
+                    geocoder.load(auto_download=auto_download, proxy=proxy)
+                    cls._shared = geocoder
+                except Exception as e:
+                    cls._shared_failed_at = time.time()
+                    print(f"[LiveSearch] Offline geocoder unavailable: {e}")
+        return cls._shared
+
+    def _path(self, filename):
+        return os.path.join(self.data_dir, filename)
+
+    def download(self, proxy=None):
+        """
+        Fetch the gazetteer, admin1 names and country names from GeoNames (through proxy, if set)
+        """
+        os.makedirs(self.data_dir, exist_ok=True)
+        for filename in (f"{self.gazetteer}.zip", "admin1CodesASCII.txt", "countryInfo.txt"):
+            target = self._path(filename.replace(".zip", ".txt"))
+            if os.path.exists(target):
+                continue
+            print(f"[LiveSearch] Downloading GeoNames {filename}...")
+            url = f"{GEONAMES_BASE_URL}/{filename}"
+            response = SessionPool.get_session(url, proxy).get(url, timeout=60)
+            response.raise_for_status()
+            if filename.endswith(".zip"):
+                with zipfile.ZipFile(io.BytesIO(response.content)) as archive:
+                    with open(target, "wb") as f:
+                        f.write(archive.read(f"{self.gazetteer}.txt"))
+            else:
+                with open(target, "wb") as f:
+                    f.write(response.content)
+
+    def load(self, auto_download=True, proxy=None):
+        cities_path = self._path(f"{self.gazetteer}.txt")
+        if not os.path.exists(cities_path):
+            if not auto_download:
+                raise FileNotFoundError(cities_path)
+            self.download(proxy)
+
+        countries_path = self._path("countryInfo.txt")
+        if os.path.exists(countries_path):
+            with open(countries_path, encoding="utf-8") as f:
+                for line in f:
+                    if line.startswith("#"):
+                        continue
+                    fields = line.rstrip("\n").split("\t")
+                    if len(fields) > 4:
+                        self.countries[fields[0]] = fields[4]
+
+        admin1_path = self._path("admin1CodesASCII.txt")
+        if os.path.exists(admin1_path):
+            with open(admin1_path, encoding="utf-8") as f:
+                for line in f:
+                    fields = line.rstrip("\n").split("\t")
+                    if len(fields) > 1:
+                        self.admin1[fields[0]] = fields[1]
+
+        points = []
+        with open(cities_path, encoding="utf-8") as f:
+            for line in f:
+                fields = line.rstrip("\n").split("\t")
+                if len(fields) < 15:
+                    continue
+                try:
+                    lat, lon = float(fields[4]), float(fields[5])
+                    population = int(fields[14] or 0)
+                except ValueError:
+                    continue
+                # (name, feature code, country code, admin1 code, population)
+                self.places.append((fields[1], fields[7], fields[8], fields[10], population))
+                points.append(_to_unit_vector(lat, lon))
+
+        self.tree = cKDTree(points) if cKDTree is not None else _KDTree(points)
+        print(f"[LiveSearch] Offline geocoder loaded {len(self.places)} places from {self.gazetteer}")
+
+    def _nearest(self, lat, lon, k):
+        point = _to_unit_vector(lat, lon)
+        if cKDTree is not None and isinstance(self.tree, cKDTree):
+            distances, indices = self.tree.query(point, k=k)
+            # Missing neighbours (k > number of places) come back as index == n
+            return [(d, int(i)) for d, i in zip(distances, indices) if i < len(self.places)]
+        return self.tree.query(point, k)
+
+    def reverse(self, lat, lon, k=8):
+        """
+        Nominatim-style address dict for the coordinates, or None if nothing is close enough
+        """
+        if self.tree is None:
+            return None
+        neighbours = self._nearest(lat, lon, k)
+        if not neighbours or _chord_to_km(neighbours[0][0]) > self.MAX_DISTANCE_KM:
+            return None
+
+        # A "section of populated place" (PPLX, e.g. Haidian) is reported as the suburb
+        # of the closest proper settlement
+        nearest = self.places[neighbours[0][1]]
+        suburb = ""
+        settlement = nearest
+        if nearest[1] == "PPLX":
+            suburb = nearest[0]
+            for _, index in neighbours[1:]:
+                if self.places[index][1] != "PPLX":
+                    settlement = self.places[index]
+                    break
+
+        name, feature_code, country_code, admin1_code, population = settlement
+        is_city = population >= self.CITY_POPULATION or feature_code in ("PPLC", "PPLA", "PPLA2")
+        address = {
+            "city" if is_city else "town": name,
+            "state": self.admin1.get(f"{country_code}.{admin1_code}", ""),
+            "country": self.countries.get(country_code, country_code),
+            "country_code": country_code.lower()
+        }
+        if suburb and suburb != name:
+            address["suburb"] = suburb
+        return address
@@ -0,0 +1,165 @@
+"""
+LiveSearch Page Index
+Local SQLite FTS5 index of every extracted page (URL, title, fetch time, text), so repeat
+questions can be answered from pages fetched earlier without searching or downloading again
+"""
+
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from collections import namedtuple
+
+from .cache_store import CACHE_DIR, query_key_terms
+from .passage_ranker import tokenize
+
+IndexedPage = namedtuple("IndexedPage", ["url", "title", "text", "fetched_at"])
+
+
+class PageIndex:
+    """
+    Pages are stored with the passage ranker's terms (CJK as bigrams) in an FTS5 table, so
+    Chinese and English queries match the same way BM25 passage selection sees them.
+    A match must contain every key term of the query (cache_store.query_key_terms), so a
+    Shanghai weather page never answers a Beijing weather question.
+    Failures are logged and treated as misses; without FTS5 the index stays disabled.
+    """
+
+    # How old indexed pages may be to answer a query, per classify_query_intent
+    MAX_AGE = {
+        "realtime": 15 * 60,
+        "news": 6 * 60 * 60,
+        "general": 3 * 24 * 60 * 60,
+    }
+    # Share of the query's terms a page must contain to count as a match (key terms: all of them)
+    MIN_COVERAGE = 0.6
+    # Matches needed before the web search is skipped (fewer if num_results is smaller)
+    MIN_PAGES = 2
+    # Oldest and surplus pages are pruned every PRUNE_EVERY writes
+    MAX_PAGES = 5000
+    RETENTION = 30 * 24 * 60 * 60
+    PRUNE_EVERY = 100
+
+    def __init__(self, name="page_index"):
+        self.path = os.path.join(CACHE_DIR, f"{name}.sqlite3")
+        self.available = True
+        self._writes = 0
+        self._conn = None
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        if self._conn is None:
+            os.makedirs(CACHE_DIR, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=5, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS pages ("
+                "id INTEGER PRIMARY KEY, url TEXT UNIQUE, title TEXT, text BLOB, fetched_at REAL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_fetched_at ON pages(fetched_at)")
+            conn.execute("CREATE VIRTUAL TABLE IF NOT EXISTS pages_fts USING fts5(terms)")
+            self._conn = conn
+        return self._conn
+
+    def _disable(self, error):
+        self.available = False
+        print(f"[LiveSearch] Page index disabled ({error}); SQLite needs FTS5 support")
+
+    def add(self, url, title, text):
+        """Store (or refresh) a downloaded page as fetched now; title=None keeps the indexed title"""
+        if not self.available or not text:
+            return
+        terms = " ".join(tokenize(f"{title or ''}\n{text}"))
+        blob = zlib.compress(text.encode("utf-8"))
+        now = time.time()
+        try:
+            with self._lock:
+                conn = self._connect()
+                row = conn.execute("SELECT id FROM pages WHERE url = ?", (url,)).fetchone()
+                if row is None:
+                    page_id = conn.execute(
+                        "INSERT INTO pages (url, title, text, fetched_at) VALUES (?, ?, ?, ?)",
+                        (url, title or "", blob, now)
+                    ).lastrowid
+                else:
+                    page_id = row[0]
+                    conn.execute(
+                        "UPDATE pages SET title = COALESCE(?, title), text = ?, fetched_at = ? WHERE id = ?",
+                        (title, blob, now, page_id)
+                    )
+                    conn.execute("DELETE FROM pages_fts WHERE rowid = ?", (page_id,))
+                conn.execute("INSERT INTO pages_fts (rowid, terms) VALUES (?, ?)", (page_id, terms))
+                self._writes += 1
+                if self._writes % self.PRUNE_EVERY == 0:
+                    self._prune(conn)
+                conn.commit()
+        except sqlite3.OperationalError as e:
+            if "fts5" in str(e).lower():
+                self._disable(e)
+            else:
+                print(f"[LiveSearch] Page index write failed: {e}")
+        except Exception as e:
+            print(f"[LiveSearch] Page index write failed: {e}")
+
+    def _prune(self, conn):
+        cutoff = time.time() - self.RETENTION
+        stale = conn.execute("SELECT id FROM pages WHERE fetched_at < ?", (cutoff,)).fetchall()
+        stale += conn.execute(
+            "SELECT id FROM pages WHERE fetched_at >= ? ORDER BY fetched_at DESC LIMIT -1 OFFSET ?",
+            (cutoff, self.MAX_PAGES)
+        ).fetchall()
+        for (page_id,) in stale:
+            conn.execute("DELETE FROM pages WHERE id = ?", (page_id,))
+            conn.execute("DELETE FROM pages_fts WHERE rowid = ?", (page_id,))
+
+    def search(self, query, limit, max_age):
+        """
+        Up to limit pages fetched within max_age seconds that cover the query, best first (FTS5 bm25)
+        """
+        query_terms = list(dict.fromkeys(tokenize(query or "")))
+        if not self.available or not query_terms:
+            return []
+        key_terms = query_key_terms(query)
+        if key_terms:
+            match = " AND ".join(f'"{term}"' for term in sorted(key_terms))
+        else:
+            match = " OR ".join(f'"{term}"' for term in query_terms)
+        try:
+            with self._lock:
+                rows = self._connect().execute(
+                    "SELECT pages.url, pages.title, pages.text, pages.fetched_at, pages_fts.terms "
+                    "FROM pages_fts JOIN pages ON pages.id = pages_fts.rowid "
+                    "WHERE pages_fts MATCH ? AND pages.fetched_at >= ? "
+                    "ORDER BY bm25(pages_fts) LIMIT ?",
+                    (match, time.time() - max_age, limit * 4)
+                ).fetchall()
+        except sqlite3.OperationalError as e:
+            if "fts5" in str(e).lower():
+                self._disable(e)
+            else:
+                print(f"[LiveSearch] Page index search failed: {e}")
+            return []
+        except Exception as e:
+            print(f"[LiveSearch] Page index search failed: {e}")
+            return []
+
+        pages = []
+        for url, title, blob, fetched_at, terms in rows:
+            page_terms = set(terms.split())
+            coverage = sum(term in page_terms for term in query_terms) / len(query_terms)
+            if coverage >= self.MIN_COVERAGE and key_terms <= page_terms:
+                pages.append(IndexedPage(url, title, zlib.decompress(blob).decode("utf-8"), fetched_at))
+                if len(pages) >= limit:
+                    break
+        return pages
+
+    def lookup(self, query, num_results, intent):
+        """
+        Pages to answer from instead of the web, or None when the index has too few fresh matches
+        """
+        pages = self.search(query, num_results, self.MAX_AGE.get(intent, self.MAX_AGE["general"]))
+        if len(pages) < min(num_results, self.MIN_PAGES):
+            return None
+        return pages
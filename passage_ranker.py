@@ -0,0 +1,133 @@
+"""
+LiveSearch Passage Ranking
+Splits fetched pages into passages and keeps the ones most relevant to the query (BM25),
+packed into a per-source token budget
+"""
+
+import math
+import re
+from collections import Counter
+
+PASSAGE_CHARS = 400
+SENTENCE_SPLIT = re.compile(r"(?<=[.!?。！？；;])\s*")
+WORD_PATTERN = re.compile(r"[a-z0-9]+(?:['.][a-z0-9]+)*|[\u4e00-\u9fff]+")
+CJK_PATTERN = re.compile(r"[\u4e00-\u9fff]")
+
+STOPWORDS = frozenset(
+    "a an and are as at be by for from has have how in is it its of on or that the this to was what when where "
+    "which who why will with you your i me my we our do does did can could should would".split()
+)
+
+
+def estimate_tokens(text):
+    """Rough token count: one per CJK character, one per ~4 other characters"""
+    cjk = len(CJK_PATTERN.findall(text))
+    return cjk + (len(text) - cjk + 3) // 4
+
+
+def tokenize(text):
+    """Lowercased words without stopwords; CJK runs become character bigrams (unigrams for single characters)"""
+    terms = []
+    for token in WORD_PATTERN.findall(text.lower()):
+        if CJK_PATTERN.match(token):
+            if len(token) == 1:
+                terms.append(token)
+            else:
+                terms.extend(token[i:i + 2] for i in range(len(token) - 1))
+        elif token not in STOPWORDS:
+            terms.append(token)
+    return terms
+
+
+def split_passages(text, target_chars=PASSAGE_CHARS):
+    """
+    Group consecutive lines into passages of about target_chars; overlong lines are split at sentence ends
+    """
+    pieces = []
+    for line in text.splitlines():
+        line = line.strip()
+        if not line:
+            continue
+        if len(line) <= target_chars * 2:
+            pieces.append(line)
+        else:
+            pieces.extend(sentence for sentence in SENTENCE_SPLIT.split(line) if sentence)
+
+    passages = []
+    current = []
+    length = 0
+    for piece in pieces:
+        if current and length + len(piece) > target_chars:
+            passages.append("\n".join(current))
+            current, length = [], 0
+        current.append(piece)
+        length += len(piece) + 1
+    if current:
+        passages.append("\n".join(current))
+    return passages
+
+
+class BM25:
+    """
+    Okapi BM25 over a small in-memory collection of passages
+    """
+
+    def __init__(self, documents, k1=1.2, b=0.75):
+        self.k1 = k1
+        self.b = b
+        self.term_counts = [Counter(tokenize(doc)) for doc in documents]
+        self.lengths = [sum(counts.values()) for counts in self.term_counts]
+        self.avg_length = (sum(self.lengths) / len(self.lengths)) if self.lengths else 0
+        document_frequency = Counter(term for counts in self.term_counts for term in counts)
+        total = len(documents)
+        self.idf = {
+            term: math.log(1 + (total - freq + 0.5) / (freq + 0.5))
+            for term, freq in document_frequency.items()
+        }
+
+    def scores(self, query):
+        query_terms = set(tokenize(query))
+        results = []
+        for counts, length in zip(self.term_counts, self.lengths):
+            score = 0.0
+            norm = self.k1 * (1 - self.b + self.b * length / self.avg_length) if self.avg_length else self.k1
+            for term in query_terms:
+                freq = counts.get(term)
+                if freq:
+                    score += self.idf[term] * freq * (self.k1 + 1) / (freq + norm)
+            results.append(score)
+        return results
+
+
+def select_passages(text, query, max_tokens, separator="\n...\n"):
+    """
+    Best-scoring passages of text for query, within max_tokens, returned in document order.
+    Falls back to the leading text when nothing matches the query.
+    """
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    passages = split_passages(text)
+    scores = BM25(passages).scores(query) if query else [0.0] * len(passages)
+
+    ranked = sorted((i for i, score in enumerate(scores) if score > 0), key=lambda i: scores[i], reverse=True)
+    chosen = []
+    used = 0
+    for i in ranked:
+        cost = estimate_tokens(passages[i])
+        if used + cost > max_tokens:
+            continue
+        chosen.append(i)
+        used += cost
+
+    if not chosen:
+        # No query overlap: keep the beginning of the page, as plain truncation did
+        for i, passage in enumerate(passages):
+            cost = estimate_tokens(passage)
+            if used + cost > max_tokens:
+                break
+            chosen.append(i)
+            used += cost
+        if not chosen:
+            return passages[0][:max_tokens * 4] if passages else ""
+
+    return separator.join(passages[i] for i in sorted(chosen))
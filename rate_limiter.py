@@ -0,0 +1,245 @@
+"""
+LiveSearch Rate Limiting
+Process-wide token buckets per host / provider, shared by every workflow, so concurrent
+runs queue up instead of bursting into DuckDuckGo, Nominatim or an LLM provider.
+Throttling responses halve a bucket's rate; steady success creeps it back up (AIMD).
+"""
+
+import asyncio
+import threading
+import time
+from urllib.parse import urlsplit
+
+
+class TokenBucket:
+    """
+    Token bucket with reservations: acquiring takes tokens immediately (the balance may go
+    negative) and returns how long the caller must wait, so waiters are served in arrival order.
+    """
+
+    # Each success raises a throttled rate by this share of the configured rate
+    RECOVERY_STEP = 0.05
+    # Throttling never pushes the rate below this share of the configured rate
+    MIN_RATE_RATIO = 0.1
+
+    def __init__(self, rate, capacity):
+        self.max_rate = rate
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.requests = 0
+        self.waited = 0.0
+        self.max_wait = 0.0
+        self.throttles = 0
+        self._lock = threading.Lock()
+
+    def configure(self, rate, capacity):
+        with self._lock:
+            if rate == self.max_rate and capacity == self.capacity:
+                return
+            # A rate lowered by throttling stays lowered
+            self.rate = min(self.rate, rate) if self.rate < self.max_rate else rate
+            self.max_rate = rate
+            self.capacity = capacity
+            self.tokens = min(self.tokens, capacity)
+
+    def reserve(self, tokens=1):
+        """Take tokens; returns the seconds to wait before using them"""
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= min(tokens, self.capacity)
+            wait = -self.tokens / self.rate if self.tokens < 0 else 0.0
+            self.requests += 1
+            self.waited += wait
+            self.max_wait = max(self.max_wait, wait)
+            return wait
+
+    def throttled(self):
+        with self._lock:
+            self.throttles += 1
+            self.rate = max(self.max_rate * self.MIN_RATE_RATIO, self.rate / 2)
+            # No burst right after being throttled: the next request waits a full interval
+            self.tokens = min(self.tokens, 0)
+
+    def succeeded(self):
+        if self.rate >= self.max_rate:
+            return
+        with self._lock:
+            self.rate = min(self.max_rate, self.rate + self.max_rate * self.RECOVERY_STEP)
+
+    def idle(self):
+        """Refilled and at full rate: the bucket behaves exactly like a new one"""
+        with self._lock:
+            tokens = self.tokens + (time.monotonic() - self.updated) * self.rate
+            return self.rate >= self.max_rate and tokens >= self.capacity
+
+
+class RateLimiter:
+    """
+    Registry of named buckets. Hosts without a configured limit get the default politeness rate;
+    their buckets are dropped once idle, so fetching pages from many hosts doesn't grow the registry.
+    """
+
+    DUCKDUCKGO = "duckduckgo"
+    DEFAULT_DDG_QPS = 1.0
+    # Per-host limits (requests/second, burst); Nominatim's usage policy allows 1 request/second
+    HOST_LIMITS = {
+        "nominatim.openstreetmap.org": (1.0, 1),
+        DUCKDUCKGO: (DEFAULT_DDG_QPS, 1),
+    }
+    # Politeness limit for every other host (result pages, weather API, LLM endpoints)
+    DEFAULT_HOST_RATE = 4.0
+    DEFAULT_HOST_BURST = 4
+    # Idle default-rate host buckets are pruned when a new one would exceed this count
+    MAX_HOST_BUCKETS = 64
+
+    _buckets = {}
+    _host_keys = set()
+    _pruned = {"requests": 0, "waited": 0.0, "max_wait": 0.0, "throttles": 0}
+    _exempt_hosts = set()
+    _lock = threading.Lock()
+
+    @classmethod
+    def exempt_url(cls, url):
+        """LLM endpoints are limited by RPM/TPM instead of the per-host politeness limit"""
+        host = urlsplit(url).hostname
+        if host:
+            cls._exempt_hosts.add(host)
+
+    @classmethod
+    def bucket(cls, key, rate=None, capacity=None):
+        """
+        Bucket for key. Created with (rate, capacity), or the host limits when not given;
+        an existing bucket is re-configured only when a rate is passed.
+        """
+        bucket = cls._buckets.get(key)
+        if bucket is not None:
+            if rate is not None:
+                bucket.configure(rate, capacity)
+            return bucket
+        default_host = rate is None and key not in cls.HOST_LIMITS
+        if rate is None:
+            rate, capacity = cls.HOST_LIMITS.get(key, (cls.DEFAULT_HOST_RATE, cls.DEFAULT_HOST_BURST))
+        with cls._lock:
+            bucket = cls._buckets.get(key)
+            if bucket is None:
+                if default_host:
+                    if len(cls._host_keys) >= cls.MAX_HOST_BUCKETS:
+                        cls._prune_idle()
+                    cls._host_keys.add(key)
+                bucket = cls._buckets[key] = TokenBucket(rate, capacity)
+        return bucket
+
+    @classmethod
+    def _prune_idle(cls):
+        """Drop idle default-rate host buckets (caller holds _lock); their counts stay in stats()"""
+        for key in [key for key in cls._host_keys if cls._buckets[key].idle()]:
+            bucket = cls._buckets.pop(key)
+            cls._host_keys.discard(key)
+            cls._pruned["requests"] += bucket.requests
+            cls._pruned["waited"] += bucket.waited
+            cls._pruned["max_wait"] = max(cls._pruned["max_wait"], bucket.max_wait)
+            cls._pruned["throttles"] += bucket.throttles
+
+    @classmethod
+    def wait(cls, key, tokens=1, rate=None, capacity=None):
+        """Block until the request may go out; returns the seconds waited"""
+        if key in cls._exempt_hosts:
+            return 0.0
+        delay = cls.bucket(key, rate, capacity).reserve(tokens)
+        if delay > 0:
+            time.sleep(delay)
+        return delay
+
+    @classmethod
+    async def wait_async(cls, key, tokens=1, rate=None, capacity=None):
+        if key in cls._exempt_hosts:
+            return 0.0
+        delay = cls.bucket(key, rate, capacity).reserve(tokens)
+        if delay > 0:
+            await asyncio.sleep(delay)
+        return delay
+
+    @classmethod
+    def throttled(cls, key):
+        bucket = cls._buckets.get(key)
+        if bucket is not None:
+            bucket.throttled()
+            print(f"[LiveSearch] Throttled by {key}, rate lowered to {bucket.rate:.2f}/s")
+
+    @classmethod
+    def succeeded(cls, key):
+        bucket = cls._buckets.get(key)
+        if bucket is not None:
+            bucket.succeeded()
+
+    @classmethod
+    def configure_duckduckgo(cls, qps):
+        """Set the shared DuckDuckGo search rate (search_settings ddg_qps)"""
+        qps = qps or cls.DEFAULT_DDG_QPS
+        cls.bucket(cls.DUCKDUCKGO, qps, max(1, int(qps)))
+
+    @staticmethod
+    def llm_limits(model_config, request_tokens=0):
+        """
+        [(key, tokens, rate, capacity)] for the provider's RPM / TPM limits (0 = unlimited).
+        RPM allows bursts of a tenth of a minute's requests, TPM a full minute's tokens.
+        """
+        provider = model_config.get("provider", "")
+        limits = []
+        rpm = model_config.get("rpm_limit") or 0
+        if rpm:
+            limits.append((f"llm-rpm:{provider}", 1, rpm / 60.0, max(1, rpm // 10)))
+        tpm = model_config.get("tpm_limit") or 0
+        if tpm and request_tokens:
+            limits.append((f"llm-tpm:{provider}", request_tokens, tpm / 60.0, tpm))
+        return limits
+
+    @classmethod
+    def wait_llm(cls, model_config, request_tokens=0):
+        return sum(cls.wait(key, tokens, rate, capacity) for key, tokens, rate, capacity in cls.llm_limits(model_config, request_tokens))
+
+    @classmethod
+    async def wait_llm_async(cls, model_config, request_tokens=0):
+        waited = 0.0
+        for key, tokens, rate, capacity in cls.llm_limits(model_config, request_tokens):
+            waited += await cls.wait_async(key, tokens, rate, capacity)
+        return waited
+
+    @classmethod
+    def llm_throttled(cls, model_config):
+        for key, _, _, _ in cls.llm_limits(model_config, 1):
+            cls.throttled(key)
+
+    @classmethod
+    def llm_succeeded(cls, model_config):
+        for key, _, _, _ in cls.llm_limits(model_config, 1):
+            cls.succeeded(key)
+
+    @classmethod
+    def stats(cls):
+        items = [
+            {"key": key, "requests": bucket.requests, "waited": bucket.waited, "max_wait": bucket.max_wait,
+             "rate": bucket.rate, "throttles": bucket.throttles}
+            for key, bucket in list(cls._buckets.items())
+            if bucket.requests
+        ]
+        if cls._pruned["requests"]:
+            items.append(dict(cls._pruned, key="idle hosts", rate=cls.DEFAULT_HOST_RATE))
+        return items
+
+    @classmethod
+    def log_stats(cls):
+        """Queue wait per bucket since startup (only buckets that ever made a caller wait)"""
+        waited = [item for item in cls.stats() if item["waited"] > 0 or item["throttles"]]
+        if not waited:
+            return
+        parts = [
+            f"{item['key']} {item['requests']} req, avg wait {item['waited'] / item['requests']:.2f}s, "
+            f"max {item['max_wait']:.2f}s, {item['rate']:.2f}/s" + (f", {item['throttles']} throttled" if item["throttles"] else "")
+            for item in waited
+        ]
+        print(f"[LiveSearch] Rate limits: {' | '.join(parts)}")
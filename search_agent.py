@@ -5,23 +5,53 @@ Works with API Loader and Settings nodes for modular design
 """
 
 import base64
+import hashlib
 import io
+import math
+import queue
+import threading
 import time
 import requests
 import re
 import json
+from html import unescape
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import closing
 from bs4 import BeautifulSoup
-try:
-    from ddgs import DDGS
-except ImportError:
-    from duckduckgo_search import DDGS
+from .http_pool import SessionPool
+from .rate_limiter import RateLimiter
+from .search_backends import DuckDuckGoBackend, SearchRouter
+from .cache_store import DiskCache, SingleFlight, classify_query_intent, normalize_query
+from .offline_geocoder import OfflineGeocoder
+from .html_extractor import decode_html, get_extractor
+from .passage_ranker import estimate_tokens, select_passages
+from .context_budget import ContextBudget
+from .dedup import SourceDeduplicator, canonical_url
+from .page_index import PageIndex
+from .answer_cache import AnswerCache
+from . import failover, hedging
 try:
     from geopy.geocoders import Nominatim
     from geopy.exc import GeocoderTimedOut, GeocoderServiceError
     GEOPY_AVAILABLE = True
 except ImportError:
     GEOPY_AVAILABLE = False
-    print("[LiveSearch] Warning: geopy not available, coordinate reverse geocoding disabled")
+    print("[LiveSearch] Warning: geopy not available, Nominatim reverse geocoding disabled")
+
+try:
+    import brotli  # noqa: F401
+    BROTLI_AVAILABLE = True
+except ImportError:
+    try:
+        import brotlicffi  # noqa: F401
+        BROTLI_AVAILABLE = True
+    except ImportError:
+        BROTLI_AVAILABLE = False
+
+try:
+    import xxhash
+except ImportError:
+    xxhash = None
 
 try:
     from PIL import Image
@@ -43,199 +73,445 @@ class SearchTool:
         'easeweather.com'
     ]
     
+    # Upper bound on concurrent page downloads for a single search
+    MAX_FETCH_WORKERS = 4
+    
+    # Search result cache: weather/time and news queries expire quickly, general queries use the configured TTL
+    search_cache = DiskCache("search_results", max_bytes=16 * 1024 * 1024)
+    REALTIME_SEARCH_TTL = 10 * 60
+    NEWS_SEARCH_TTL = 60 * 60
+    DEFAULT_SEARCH_TTL = 6 * 60 * 60
+    
+    # Extracted page text with ETag/Last-Modified validators for conditional revalidation
+    page_cache = DiskCache("page_content", max_bytes=64 * 1024 * 1024)
+    PAGE_CACHE_TTL = 5 * 60
+    PAGE_CACHE_MAX_TTL = 24 * 60 * 60
+    
+    # Every downloaded page, searchable offline for index-first answers
+    page_index = PageIndex()
+    TITLE_PATTERN = re.compile(rb"<title[^>]*>(.*?)</title>", re.IGNORECASE | re.DOTALL)
+    
+    # Page downloads are streamed and cut off after PAGE_MAX_BYTES (decoded); non-text resources are skipped
+    PAGE_MAX_BYTES = 1024 * 1024
+    PAGE_CHUNK_SIZE = 16 * 1024
+    # Extracted text kept per page; passage selection decides what reaches the prompt
+    EXTRACT_MAX_CHARS = 20000
+    TEXT_CONTENT_TYPES = ("text/html", "application/xhtml+xml", "text/plain", "text/xml", "application/xml")
+    # urllib3/httpx only decode brotli when a brotli module is installed
+    ACCEPT_ENCODING = "gzip, deflate, br" if BROTLI_AVAILABLE else "gzip, deflate"
+    
+    # Open-Meteo "current" data refreshes every 15 minutes; nearby coordinates share a grid cell
+    WEATHER_GRID_DEGREES = 0.01
+    WEATHER_UPDATE_INTERVAL = 15 * 60
+    _weather_cache = {}
+    _weather_lock = threading.Lock()
+    _weather_flight = SingleFlight()
+    
     @staticmethod
     def is_trusted_url(url):
         """Check if URL is from a trusted weather/time domain"""
         return any(domain in url.lower() for domain in SearchTool.TRUSTED_DOMAINS)
     
     @staticmethod
-    def search_duckduckgo(query, num_results=3, proxy=None):
+    def search_web(query, num_results=3, proxy=None, region=None, use_cache=True, cache_ttl=None, router=None):
         """
-        Performs a DuckDuckGo search with retry mechanism.
+        Search with the router's backend(s) (DuckDuckGo by default), trusted domains first.
+        Results are cached on disk keyed by normalized query, num_results, region and backends.
+        cache_ttl: lifetime in seconds for general queries (weather/time and news queries use shorter TTLs)
         """
-        max_retries = 3
-        for attempt in range(max_retries):
-            try:
-                # DDGS supports proxy argument directly
-                # Increase timeout for slower connections
-                with DDGS(proxy=proxy, timeout=30) as ddgs:
-                    # ddgs.text() returns a generator of dicts: {'title', 'href', 'body'}
-                    results = list(ddgs.text(query, max_results=num_results))
-                    
-                    if results:
-                        # Normalize keys and prioritize trusted domains
-                        normalized_results = []
-                        trusted_results = []
-                        other_results = []
-                        
-                        for res in results:
-                            url = res.get('href', '')
-                            result_item = {
-                                'title': res.get('title', ''),
-                                'url': url,
-                                'summary': res.get('body', '')
-                            }
-                            
-                            # Prioritize trusted weather/time websites
-                            if SearchTool.is_trusted_url(url):
-                                trusted_results.append(result_item)
-                            else:
-                                other_results.append(result_item)
-                        
-                        # Return trusted results first, then others
-                        normalized_results = trusted_results + other_results
-                        return normalized_results[:num_results]
-                    
-                    # If results are empty but no error, maybe try again or just break
-                    if attempt < max_retries - 1:
-                        print(f"[LiveSearch] DDG returned empty results, retrying ({attempt + 1}/{max_retries})...")
-                        time.sleep(1)
-                        continue
-                        
-            except Exception as e:
-                print(f"[LiveSearch] Search attempt {attempt + 1} failed: {e}")
-                if attempt < max_retries - 1:
-                    time.sleep(2)  # Wait a bit before retry
-                    continue
-                return []
+        router = router or SearchRouter([DuckDuckGoBackend()])
+        key_parts = [normalize_query(query), num_results, region or "default"]
+        if router.key != DuckDuckGoBackend.name:
+            key_parts.append(router.key)
+        cache_key = DiskCache.make_key(*key_parts)
+        if use_cache:
+            cached = SearchTool.search_cache.get(cache_key)
+            if cached:
+                print(f"[LiveSearch] Search cache hit for: {query}")
+                return cached
         
-        return []
+        results = SearchTool._trusted_first(router.search(query, num_results, proxy, region))[:num_results]
+        
+        if use_cache and results:
+            intent = classify_query_intent(query)
+            if intent == "realtime":
+                ttl = SearchTool.REALTIME_SEARCH_TTL
+            elif intent == "news":
+                ttl = min(cache_ttl or SearchTool.DEFAULT_SEARCH_TTL, SearchTool.NEWS_SEARCH_TTL)
+            else:
+                ttl = cache_ttl or SearchTool.DEFAULT_SEARCH_TTL
+            SearchTool.search_cache.set(cache_key, results, ttl)
+        return results
+    
+    @staticmethod
+    def _trusted_first(results):
+        """Prioritize trusted weather/time websites, keeping the (fused) rank order otherwise"""
+        trusted_results = [res for res in results if SearchTool.is_trusted_url(res.get('url', ''))]
+        other_results = [res for res in results if not SearchTool.is_trusted_url(res.get('url', ''))]
+        return trusted_results + other_results
+
+    @staticmethod
+    def _weather_cell(lat, lon, grid):
+        """Snap coordinates to the cache grid (rounded to drop float noise such as 48.860000000000003)"""
+        return round(round(lat / grid) * grid, 6), round(round(lon / grid) * grid, 6)
+
+    @staticmethod
+    def _open_meteo_request(cell):
+        """(url, params) for an Open-Meteo "current" query at a grid cell"""
+        url = "https://api.open-meteo.com/v1/forecast"
+        params = {
+            "latitude": cell[0],
+            "longitude": cell[1],
+            "current": "temperature_2m,relative_humidity_2m,apparent_temperature,is_day,precipitation,rain,showers,snowfall,weather_code,cloud_cover,wind_speed_10m",
+            "timezone": "auto",
+            "timeformat": "iso8601"
+        }
+        return url, params
+
+    @staticmethod
+    def _weather_cache_get(cell):
+        with SearchTool._weather_lock:
+            cached = SearchTool._weather_cache.get(cell)
+        if cached and cached[0] > time.time():
+            print(f"[LiveSearch] Weather cache hit for cell {cell[0]}, {cell[1]}")
+            return cached[1]
+        return None
 
     @staticmethod
-    def get_weather_data(lat, lon, proxy=None):
+    def _weather_cache_put(cell, data):
+        # Expire at the next quarter-hour boundary, when Open-Meteo publishes new data
+        now = time.time()
+        interval = SearchTool.WEATHER_UPDATE_INTERVAL
+        expires_at = (math.floor(now / interval) + 1) * interval
+        with SearchTool._weather_lock:
+            SearchTool._weather_cache = {k: v for k, v in SearchTool._weather_cache.items() if v[0] > now}
+            SearchTool._weather_cache[cell] = (expires_at, data)
+
+    @staticmethod
+    def _fetch_open_meteo(lat, lon, proxy=None, use_cache=True, grid=None):
         """
-        Fetch precise weather and time data from Open-Meteo API (Free, No Key)
+        Open-Meteo "current" payload for the grid cell containing (lat, lon).
+        Cached until the next 15-minute update boundary; concurrent requests
+        for the same cell share one HTTP call.
         """
-        try:
-            url = "https://api.open-meteo.com/v1/forecast"
-            params = {
-                "latitude": lat,
-                "longitude": lon,
-                "current": "temperature_2m,relative_humidity_2m,apparent_temperature,is_day,precipitation,rain,showers,snowfall,weather_code,cloud_cover,wind_speed_10m",
-                "timezone": "auto",
-                "timeformat": "iso8601"
-            }
+        cell = SearchTool._weather_cell(lat, lon, grid or SearchTool.WEATHER_GRID_DEGREES)
+        if use_cache:
+            cached = SearchTool._weather_cache_get(cell)
+            if cached is not None:
+                return cached
+        
+        def fetch():
+            url, params = SearchTool._open_meteo_request(cell)
             
             # Open-Meteo usually works without proxy, but use if provided
-            proxies = {"http": proxy, "https": proxy} if proxy else None
+            session = SessionPool.get_session(url, proxy)
             
             # Reduce timeout to avoid hanging
-            response = requests.get(url, params=params, timeout=10, proxies=proxies)
+            response = session.get(url, params=params, timeout=10)
             response.raise_for_status()
             data = response.json()
-            
-            current = data.get("current", {})
-            timezone = data.get("timezone", "Unknown")
-            timezone_abbr = data.get("timezone_abbreviation", "")
-            
-            # WMO Weather Codes interpretation
-            wmo_codes = {
-                0: "Clear sky", 1: "Mainly clear", 2: "Partly cloudy", 3: "Overcast",
-                45: "Fog", 48: "Depositing rime fog",
-                51: "Light drizzle", 53: "Moderate drizzle", 55: "Dense drizzle",
-                61: "Slight rain", 63: "Moderate rain", 65: "Heavy rain",
-                71: "Slight snow fall", 73: "Moderate snow fall", 75: "Heavy snow fall",
-                80: "Slight rain showers", 81: "Moderate rain showers", 82: "Violent rain showers",
-                95: "Thunderstorm", 96: "Thunderstorm with slight hail", 99: "Thunderstorm with heavy hail"
-            }
-            weather_desc = wmo_codes.get(current.get("weather_code"), "Unknown weather code")
-            
-            # Format output string
-            output = [
-                f"--- REAL-TIME WEATHER & TIME DATA (Source: Open-Meteo) ---",
-                f"Location Coordinates: {lat}, {lon}",
-                f"Timezone: {timezone} ({timezone_abbr})",
-                f"Current Local Time: {current.get('time', '').replace('T', ' ')}",
-                f"Temperature: {current.get('temperature_2m')} °C (Apparent: {current.get('apparent_temperature')} °C)",
-                f"Condition: {weather_desc}",
-                f"Humidity: {current.get('relative_humidity_2m')}%",
-                f"Wind Speed: {current.get('wind_speed_10m')} km/h",
-                f"Cloud Cover: {current.get('cloud_cover')}%",
-                f"Is Day: {'Yes' if current.get('is_day') else 'No'}",
-                "--------------------------------------------------------"
-            ]
-            
-            return "\n".join(output)
-            
+            SearchTool._weather_cache_put(cell, data)
+            return data
+        
+        return SearchTool._weather_flight.do(cell, fetch)
+
+    @staticmethod
+    def get_weather_data(lat, lon, proxy=None, use_cache=True, grid=None):
+        """
+        Fetch precise weather and time data from Open-Meteo API (Free, No Key)
+        grid: cache cell size in degrees (defaults to WEATHER_GRID_DEGREES)
+        """
+        try:
+            data = SearchTool._fetch_open_meteo(lat, lon, proxy=proxy, use_cache=use_cache, grid=grid)
+            return SearchTool._format_weather(lat, lon, data)
         except Exception as e:
             print(f"[LiveSearch] Open-Meteo fetch failed: {e}")
             return ""
 
     @staticmethod
-    def fetch_url_content(url, timeout=10, proxy=None):
+    def _format_weather(lat, lon, data):
+        """
+        Render an Open-Meteo payload as the context block injected ahead of search results
+        """
+        current = data.get("current", {})
+        timezone = data.get("timezone", "Unknown")
+        timezone_abbr = data.get("timezone_abbreviation", "")
+        
+        # WMO Weather Codes interpretation
+        wmo_codes = {
+            0: "Clear sky", 1: "Mainly clear", 2: "Partly cloudy", 3: "Overcast",
+            45: "Fog", 48: "Depositing rime fog",
+            51: "Light drizzle", 53: "Moderate drizzle", 55: "Dense drizzle",
+            61: "Slight rain", 63: "Moderate rain", 65: "Heavy rain",
+            71: "Slight snow fall", 73: "Moderate snow fall", 75: "Heavy snow fall",
+            80: "Slight rain showers", 81: "Moderate rain showers", 82: "Violent rain showers",
+            95: "Thunderstorm", 96: "Thunderstorm with slight hail", 99: "Thunderstorm with heavy hail"
+        }
+        weather_desc = wmo_codes.get(current.get("weather_code"), "Unknown weather code")
+        
+        # Format output string
+        output = [
+            f"--- REAL-TIME WEATHER & TIME DATA (Source: Open-Meteo) ---",
+            f"Location Coordinates: {lat}, {lon}",
+            f"Timezone: {timezone} ({timezone_abbr})",
+            f"Current Local Time: {current.get('time', '').replace('T', ' ')}",
+            f"Temperature: {current.get('temperature_2m')} °C (Apparent: {current.get('apparent_temperature')} °C)",
+            f"Condition: {weather_desc}",
+            f"Humidity: {current.get('relative_humidity_2m')}%",
+            f"Wind Speed: {current.get('wind_speed_10m')} km/h",
+            f"Cloud Cover: {current.get('cloud_cover')}%",
+            f"Is Day: {'Yes' if current.get('is_day') else 'No'}",
+            "--------------------------------------------------------"
+        ]
+        
+        return "\n".join(output)
+
+    @staticmethod
+    def _page_cache_ttl(response_headers):
+        """
+        Freshness lifetime from Cache-Control; None means the page must not be cached
+        """
+        cache_control = response_headers.get("Cache-Control", "").lower()
+        if "no-store" in cache_control:
+            return None
+        match = re.search(r"max-age=(\d+)", cache_control)
+        if match:
+            return min(int(match.group(1)), SearchTool.PAGE_CACHE_MAX_TTL)
+        return SearchTool.PAGE_CACHE_TTL
+
+    @staticmethod
+    def _page_request_headers(entry=None):
+        """Request headers for a page fetch, with validators from a stale cache entry"""
+        headers = {
+            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
+            "Accept": "text/html,application/xhtml+xml,text/plain;q=0.9,*/*;q=0.1",
+            "Accept-Encoding": SearchTool.ACCEPT_ENCODING
+        }
+        if entry:
+            if entry.meta.get("etag"):
+                headers["If-None-Match"] = entry.meta["etag"]
+            if entry.meta.get("last_modified"):
+                headers["If-Modified-Since"] = entry.meta["last_modified"]
+        return headers
+
+    @staticmethod
+    def _page_not_modified(url, entry, response_headers):
+        """Handle a 304: extend the cached entry and return its text"""
+        ttl = SearchTool._page_cache_ttl(response_headers) or SearchTool.PAGE_CACHE_TTL
+        meta = {
+            "etag": response_headers.get("ETag") or entry.meta.get("etag"),
+            "last_modified": response_headers.get("Last-Modified") or entry.meta.get("last_modified")
+        }
+        SearchTool.page_cache.touch(url, ttl, meta)
+        print(f"[LiveSearch] Page not modified, using cached content: {url}")
+        return entry.value
+
+    @staticmethod
+    def _store_page(url, text, response_headers):
+        ttl = SearchTool._page_cache_ttl(response_headers)
+        if ttl is not None:
+            meta = {
+                "etag": response_headers.get("ETag"),
+                "last_modified": response_headers.get("Last-Modified")
+            }
+            SearchTool.page_cache.set(url, text, ttl, meta)
+
+    @staticmethod
+    def _finish_download(url, body, response_headers, extractor="auto", use_cache=True):
+        """Extract a downloaded page, then store it in the page cache and the page index; returns its text"""
+        content_type = response_headers.get("Content-Type", "")
+        text = SearchTool._extract_text(url, body, content_type, extractor)
+        if text:
+            if use_cache:
+                SearchTool._store_page(url, text, response_headers)
+            SearchTool._index_page(url, text, body, content_type)
+        return text
+
+    @staticmethod
+    def _revalidated(url, entry, response_headers):
+        """A 304: extend the page-cache entry, refresh the page index and return the cached text"""
+        text = SearchTool._page_not_modified(url, entry, response_headers)
+        SearchTool._index_page(url, text)
+        return text
+
+    @staticmethod
+    def _index_page(url, text, body=None, content_type=""):
+        """
+        Add a page to the page index as fetched now. Only for real downloads and 304 revalidations
+        (body=None keeps the indexed title): page-cache hits would make old text look fresh.
+        """
+        title = None
+        if body is not None:
+            match = SearchTool.TITLE_PATTERN.search(body, 0, 64 * 1024)
+            # Decoding the head up to </title> picks up <meta charset> without splitting a character
+            head = decode_html(body[:match.end()], content_type) if match else ""
+            title_match = re.search(r"<title[^>]*>(.*?)</title>", head, re.IGNORECASE | re.DOTALL)
+            title = unescape(title_match.group(1)).strip() if title_match else ""
+        SearchTool.page_index.add(url, title, text)
+
+    @staticmethod
+    def _is_text_response(url, response_headers):
+        """Only HTML/XML/plain-text responses are worth parsing; a missing Content-Type is given the benefit of the doubt"""
+        content_type = response_headers.get("Content-Type", "").split(";")[0].strip().lower()
+        if content_type and content_type not in SearchTool.TEXT_CONTENT_TYPES:
+            print(f"[LiveSearch] Skipping non-text resource ({content_type}): {url}")
+            return False
+        return True
+
+    @staticmethod
+    def fetch_url_content(url, timeout=10, proxy=None, use_cache=True, max_bytes=None, extractor="auto"):
         """
         Fetches and extracts text content from a URL.
-        For timeanddate.com, extract key information more precisely.
+        Extracted text is cached; stale entries are revalidated with a conditional GET,
+        so a 304 skips both the download and the HTML parse.
+        The body is streamed: non-text resources are dropped after the headers and reading stops
+        after max_bytes of decoded content (default PAGE_MAX_BYTES).
+        extractor: HTML extraction backend ("auto", "selectolax", "lxml", "bs4")
         """
+        max_bytes = max_bytes or SearchTool.PAGE_MAX_BYTES
         try:
-            headers = {
-                "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
-            }
-            proxies = {"http": proxy, "https": proxy} if proxy else None
-            response = requests.get(url, headers=headers, timeout=timeout, proxies=proxies)
-            response.raise_for_status()
+            entry = SearchTool.page_cache.lookup(url) if use_cache else None
+            if entry and entry.fresh:
+                return entry.value
+            headers = SearchTool._page_request_headers(entry)
             
-            soup = BeautifulSoup(response.content, 'html.parser')
-            
-            # Special handling for timeanddate.com - extract key information
-            if 'timeanddate.com' in url:
-                # Try to extract time and weather info more precisely
-                time_info = []
-                weather_info = []
-                
-                # Look for time display (usually in specific divs/classes)
-                time_elements = soup.find_all(['div', 'span'], class_=lambda x: x and ('time' in x.lower() or 'clock' in x.lower() or 'cst' in x.lower() or 'utc' in x.lower()))
-                for elem in time_elements[:5]:  # Limit to first 5 matches
-                    text = elem.get_text(strip=True)
-                    if text and len(text) < 100:  # Time strings are usually short
-                        time_info.append(text)
-                
-                # Look for weather info
-                weather_elements = soup.find_all(['div', 'span'], class_=lambda x: x and ('weather' in x.lower() or 'temp' in x.lower() or '°f' in x.lower() or '°c' in x.lower()))
-                for elem in weather_elements[:5]:
-                    text = elem.get_text(strip=True)
-                    if text and ('°' in text or 'weather' in text.lower() or 'forecast' in text.lower()):
-                        weather_info.append(text)
-                
-                # Also get main content
-                main_content = soup.find('main') or soup.find('div', class_=lambda x: x and 'content' in str(x).lower())
-                if main_content:
-                    main_text = main_content.get_text(separator='\n', strip=True)
-                else:
-                    main_text = soup.get_text(separator='\n', strip=True)
+            session = SessionPool.page_session(proxy)
+            with session.get(url, headers=headers, timeout=timeout, stream=True) as response:
+                if response.status_code == 304 and entry:
+                    return SearchTool._revalidated(url, entry, response.headers)
                 
-                # Combine: prioritize time and weather info
-                combined = []
-                if time_info:
-                    combined.append(f"Time Information: {' | '.join(time_info[:3])}")
-                if weather_info:
-                    combined.append(f"Weather Information: {' | '.join(weather_info[:3])}")
-                combined.append(f"Main Content: {main_text[:3000]}")
+                response.raise_for_status()
+                if not SearchTool._is_text_response(url, response.headers):
+                    return ""
                 
-                return '\n'.join(combined)
+                body = bytearray()
+                for chunk in response.iter_content(chunk_size=SearchTool.PAGE_CHUNK_SIZE):
+                    body.extend(chunk)
+                    if len(body) >= max_bytes:
+                        print(f"[LiveSearch] Page truncated at {max_bytes // 1024} KB: {url}")
+                        del body[max_bytes:]
+                        break
             
-            # For other sites, use standard extraction
-            # Remove script and style elements
-            for script in soup(["script", "style", "header", "footer", "nav"]):
-                script.extract()
-            
-            # Get text
-            text = soup.get_text()
-            
-            # Break into lines and remove leading/trailing space on each
-            lines = (line.strip() for line in text.splitlines())
-            # Break multi-headlines into a line each
-            chunks = (phrase.strip() for line in lines for phrase in line.split("  "))
-            # Drop blank lines
-            text = '\n'.join(chunk for chunk in chunks if chunk)
-            
-            # Limit text length to avoid context overflow (simple truncation)
-            return text[:5000] 
+            return SearchTool._finish_download(url, bytes(body), response.headers, extractor, use_cache)
             
         except Exception as e:
             print(f"[LiveSearch] Fetch error for {url}: {e}")
             return ""
 
+    @staticmethod
+    def _extract_text(url, html, content_type="", extractor="auto"):
+        """
+        Extracts readable text from an HTML document.
+        The body is decoded with the header charset, then handed to the selected extraction backend
+        (see html_extractor). For timeanddate.com, extract key information more precisely.
+        """
+        html = decode_html(html, content_type)
+        if 'timeanddate.com' not in url:
+            # Limit text length to avoid context overflow (simple truncation)
+            return get_extractor(extractor).extract(html)[:SearchTool.EXTRACT_MAX_CHARS]
+        
+        soup = BeautifulSoup(html, 'html.parser')
+        
+        # Special handling for timeanddate.com - extract key information
+        # Try to extract time and weather info more precisely
+        time_info = []
+        weather_info = []
+        
+        # Look for time display (usually in specific divs/classes)
+        time_elements = soup.find_all(['div', 'span'], class_=lambda x: x and ('time' in x.lower() or 'clock' in x.lower() or 'cst' in x.lower() or 'utc' in x.lower()))
+        for elem in time_elements[:5]:  # Limit to first 5 matches
+            text = elem.get_text(strip=True)
+            if text and len(text) < 100:  # Time strings are usually short
+                time_info.append(text)
+        
+        # Look for weather info
+        weather_elements = soup.find_all(['div', 'span'], class_=lambda x: x and ('weather' in x.lower() or 'temp' in x.lower() or '°f' in x.lower() or '°c' in x.lower()))
+        for elem in weather_elements[:5]:
+            text = elem.get_text(strip=True)
+            if text and ('°' in text or 'weather' in text.lower() or 'forecast' in text.lower()):
+                weather_info.append(text)
+        
+        # Also get main content
+        main_content = soup.find('main') or soup.find('div', class_=lambda x: x and 'content' in str(x).lower())
+        if main_content:
+            main_text = main_content.get_text(separator='\n', strip=True)
+        else:
+            main_text = soup.get_text(separator='\n', strip=True)
+        
+        # Combine: prioritize time and weather info
+        combined = []
+        if time_info:
+            combined.append(f"Time Information: {' | '.join(time_info[:3])}")
+        if weather_info:
+            combined.append(f"Weather Information: {' | '.join(weather_info[:3])}")
+        combined.append(f"Main Content: {main_text[:3000]}")
+        
+        return '\n'.join(combined)
+
+    _geolocators = {}
+    
+    @staticmethod
+    def get_geolocator(user_agent="comfyui_live_search", proxy=None):
+        """
+        Shared Nominatim geolocator per user agent and proxy, so geopy's session (and its connections) are reused
+        """
+        key = (user_agent, proxy or "")
+        geolocator = SearchTool._geolocators.get(key)
+        if geolocator is None:
+            geolocator = Nominatim(user_agent=user_agent, proxies=proxy or None)
+            SearchTool._geolocators[key] = geolocator
+        return geolocator
+
+    @staticmethod
+    def reverse_geocode(lat, lon, backend="Offline (GeoNames)", user_agent="comfyui_live_search", proxy=None):
+        """
+        Resolve coordinates to a Nominatim-style address dict (city/town/suburb/state/country).
+        The offline GeoNames backend answers locally; Nominatim is the fallback.
+        The GeoNames download (first use) and Nominatim both go through proxy.
+        Returns {} when neither backend can resolve the point.
+        """
+        if backend == "Offline (GeoNames)":
+            geocoder = OfflineGeocoder.shared(proxy=proxy)
+            address = geocoder.reverse(lat, lon) if geocoder else None
+            if address:
+                return address
+            print("[LiveSearch] Offline geocoder had no match, falling back to Nominatim")
+        
+        if not GEOPY_AVAILABLE:
+            return {}
+        try:
+            geolocator = SearchTool.get_geolocator(user_agent, proxy)
+            # geopy has its own HTTP stack, so Nominatim's 1 request/second is enforced here
+            RateLimiter.wait(geolocator.domain)
+            location = geolocator.reverse((lat, lon), timeout=10, language='en')
+            return location.raw.get('address', {}) if location else {}
+        except (GeocoderTimedOut, GeocoderServiceError, Exception) as e:
+            print(f"[LiveSearch] Nominatim reverse geocoding failed: {e}")
+            return {}
+
+    @staticmethod
+    def fetch_urls_in_order(urls, timeout=10, proxy=None, max_workers=None, use_cache=True, max_bytes=None, extractor="auto"):
+        """
+        Fetches URLs concurrently and yields (url, content) in the given order.
+        Closing the generator early cancels fetches that have not started yet;
+        fetches already in flight are abandoned and finish in the background.
+        """
+        if not urls:
+            return
+        workers = max(1, min(max_workers or SearchTool.MAX_FETCH_WORKERS, len(urls)))
+        executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="LiveSearchFetch")
+        try:
+            futures = [executor.submit(SearchTool.fetch_url_content, url, timeout, proxy, use_cache, max_bytes, extractor) for url in urls]
+            for url, future in zip(urls, futures):
+                try:
+                    content = future.result()
+                except Exception as e:
+                    print(f"[LiveSearch] Fetch error for {url}: {e}")
+                    content = ""
+                yield url, content
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
 class LLMClient:
     RESPONSES_MODEL_PREFIXES = ("gpt-5",)
     
@@ -291,24 +567,17 @@ class LLMClient:
         return responses_input
     
     @staticmethod
-    def chat_completion(model_config, messages):
+    def _build_request(model_config, messages):
         """
-        Generic OpenAI-compatible chat completion using config from API Loader
-        Supports both T2T (LLM) and TI2T (VLM) models
+        Build (url, headers, payload, use_responses_api) for the provider's wire format
         """
         api_key = model_config.get("api_key", "")
         base_url = model_config.get("base_url", "")
         model = model_config.get("model", "")
         temperature = model_config.get("temperature", 0.7)
         max_tokens = model_config.get("max_tokens", 2048)
-        timeout = model_config.get("timeout", 120)
-        proxy = model_config.get("proxy", None)
         provider = model_config.get("provider", "")
         
-        # Ollama (Local) typically doesn't require API key
-        if not api_key and "Ollama" not in provider:
-            return "Error: API Key is missing."
-        
         use_responses_api = LLMClient._should_use_responses_api(provider, model)
         
         # Anthropic (Claude) uses /messages endpoint instead of /chat/completions
@@ -374,66 +643,421 @@ class LLMClient:
                 "messages": messages,
                 "temperature": temperature,
                 "max_tokens": max_tokens,
-                "stream": False # Explicitly disable stream as requested
+                "stream": False # Explicitly disable stream unless streaming mode is on
             }
             # Remove max_tokens for o1 models as they don't support it
             if model.startswith("o1-") or model == "o1" or model == "o1-pro":
                 payload.pop("max_tokens", None)
                 payload.pop("temperature", None) # o1 often has fixed temp
+        
+        return url, headers, payload, use_responses_api
+    
+    @staticmethod
+    def _error_from_response(response):
+        try:
+            error_json = response.json()
+            return f"Error calling LLM: HTTP {response.status_code} - {error_json}"
+        except:
+            return f"Error calling LLM: HTTP {response.status_code} - {response.text}"
+    
+    @staticmethod
+    def _parse_response(data, provider, use_responses_api):
+        """
+        Extract the answer text from a non-streaming response body
+        """
+        # Anthropic (Claude) uses different response format
+        if "Anthropic" in provider:
+            if 'content' in data and len(data['content']) > 0:
+                # Claude returns content as array of text blocks
+                content_blocks = data['content']
+                text_content = ""
+                for block in content_blocks:
+                    if block.get('type') == 'text':
+                        text_content += block.get('text', '')
+                return text_content if text_content else str(data)
+            else:
+                return f"Error: Unexpected response format from Anthropic. Response: {data}"
+        elif use_responses_api:
+            # Responses API returns output_text plus structured output array
+            output_text = data.get("output_text")
+            if isinstance(output_text, list) and output_text:
+                return "\n".join(output_text).strip()
+            output_items = data.get("output", [])
+            collected_text = []
+            for item in output_items:
+                if item.get("type") == "message":
+                    for content in item.get("content", []):
+                        if content.get("type") in ("output_text", "text", "input_text"):
+                            collected_text.append(content.get("text", ""))
+                elif item.get("type") in ("output_text", "text"):
+                    collected_text.append(item.get("text", ""))
+            if collected_text:
+                return "\n".join(collected_text).strip()
+            return str(data)
+        # Standard OpenAI-compatible format (OpenAI, DeepSeek, Grok, Volcengine, Gemini, Aliyun, Ollama)
+        elif 'choices' in data and len(data['choices']) > 0:
+            return data['choices'][0]['message']['content']
+        else:
+            return f"Error: Unexpected response format from LLM provider. Response: {data}"
+    
+    @staticmethod
+    def _parse_stream_event(event, provider, use_responses_api):
+        """
+        Interpret one SSE JSON event.
+        Returns (text_delta, saw_token, output_tokens, done, error); output_tokens is None unless reported.
+        """
+        if "Anthropic" in provider:
+            event_type = event.get("type")
+            if event_type == "content_block_delta":
+                delta = event.get("delta", {})
+                if delta.get("type") == "text_delta":
+                    return delta.get("text", ""), True, None, False, None
+                # thinking / tool deltas still prove the model is producing output
+                return "", True, None, False, None
+            if event_type == "message_delta":
+                return "", False, event.get("usage", {}).get("output_tokens"), False, None
+            if event_type == "message_stop":
+                return "", False, None, True, None
+            if event_type == "error":
+                return "", False, None, True, f"Error calling LLM: {event.get('error', event)}"
+            return "", False, None, False, None
+        
+        if use_responses_api:
+            event_type = event.get("type", "")
+            if event_type == "response.output_text.delta":
+                return event.get("delta", ""), True, None, False, None
+            if event_type.startswith("response.reasoning") and event_type.endswith(".delta"):
+                return "", True, None, False, None
+            if event_type == "response.completed":
+                usage = (event.get("response") or {}).get("usage") or {}
+                return "", False, usage.get("output_tokens"), True, None
+            if event_type in ("response.failed", "error"):
+                return "", False, None, True, f"Error calling LLM: {event.get('response', event)}"
+            return "", False, None, False, None
+        
+        # Chat Completions chunks
+        if "error" in event:
+            return "", False, None, True, f"Error calling LLM: {event['error']}"
+        usage = event.get("usage") or {}
+        choices = event.get("choices") or []
+        if not choices:
+            return "", False, usage.get("completion_tokens"), False, None
+        delta = choices[0].get("delta") or {}
+        text = delta.get("content") or ""
+        # Reasoning models (deepseek-reasoner, R1 distills) stream their thinking separately
+        saw_token = bool(text or delta.get("reasoning_content"))
+        return text, saw_token, usage.get("completion_tokens"), False, None
+    
+    @staticmethod
+    def _stream_completion(session, url, headers, payload, timeout, provider, use_responses_api, max_output_chars, stats, cancel=None):
+        """
+        Stream an SSE completion, assembling the same final string as the blocking path.
+        Records time-to-first-token and tokens/sec; stops early once max_output_chars is reached
+        or the cancel event is set (hedged call lost).
+        """
+        accumulator = StreamAccumulator(provider, use_responses_api, max_output_chars)
+        response = session.post(url, headers=headers, json=dict(payload, stream=True), timeout=timeout, stream=True)
+        try:
+            if response.status_code != 200:
+                raise failover.response_error(LLMClient._error_from_response(response), response.status_code, response.headers)
+            
+            # text/event-stream without a charset would otherwise decode as ISO-8859-1
+            response.encoding = "utf-8"
+            for line in response.iter_lines(chunk_size=None, decode_unicode=True):
+                if accumulator.feed(line) or (cancel is not None and cancel.is_set()):
+                    break
+        finally:
+            # Closing mid-stream drops the connection, which cancels generation server-side
+            response.close()
+        
+        return accumulator.finish(stats)
+    
+    @staticmethod
+    def chat_completion(model_config, messages, stats=None):
+        """
+        Generic OpenAI-compatible chat completion using config from API Loader
+        Supports both T2T (LLM) and TI2T (VLM) models
+        stats: optional dict filled with timing info (TTFT, tokens/sec) in streaming mode,
+        and with "hedge" / "failover" report lines when the call was hedged or failed over
+        """
+        backup = hedging.backup_config(model_config, messages)
+        if backup is not None:
+            return LLMClient._hedged_completion(model_config, backup, messages, stats)
+        return LLMClient._failover_completion(model_config, messages, stats)
+    
+    @staticmethod
+    def _hedged_completion(model_config, backup, messages, stats=None):
+        """
+        Send the request to the primary model; if it has not answered within its percentile
+        latency (or fails), send it to the backup too. The first complete answer wins.
+        A streaming loser is closed, which cancels generation. A blocking one cannot be
+        interrupted: it runs to completion in its daemon thread and is reported as abandoned.
+        """
+        delay, delay_source = hedging.hedge_delay(model_config)
+        hedge_stats = hedging.HedgeStats(model_config, backup, delay, delay_source)
+        results = queue.Queue()
+        cancels = {}
+        
+        def launch(name, config):
+            cancel = cancels[name] = threading.Event()
+            attempt_stats = {}
+            hedge_stats.start(name)
+            
+            def run():
+                # The primary keeps its fallback chain; the backup is a single provider
+                complete = LLMClient._failover_completion if name == "primary" else LLMClient._single_completion
+                results.put((name, complete(config, messages, attempt_stats, cancel), attempt_stats))
             
-        proxies = {"http": proxy, "https": proxy} if proxy else None
+            threading.Thread(target=run, name=f"llm-hedge-{name}", daemon=True).start()
+        
+        launch("primary", model_config)
+        pending = {"primary"}
+        errors = {}
+        winner = None
+        while pending:
+            timeout = None
+            if "backup" not in cancels:
+                timeout = max(0.0, hedge_stats.started_at["primary"] + delay - time.perf_counter())
+            try:
+                name, answer, attempt_stats = results.get(timeout=timeout)
+            except queue.Empty:
+                print(f"[LiveSearch] Primary LLM slower than {delay:.1f}s ({delay_source}), hedging to {backup['provider']} / {backup['model']}")
+                launch("backup", backup)
+                pending.add("backup")
+                continue
+            pending.discard(name)
+            hedge_stats.finished(name)
+            if not hedging.is_error(answer):
+                winner = (name, answer, attempt_stats)
+                break
+            errors[name] = answer
+            if "backup" not in cancels:
+                print(f"[LiveSearch] Primary LLM failed, hedging to {backup['provider']} / {backup['model']}")
+                launch("backup", backup)
+                pending.add("backup")
+        
+        for name in pending:
+            cancels[name].set()
+            if not (model_config if name == "primary" else backup).get("stream", False):
+                hedge_stats.abandon(name)
+        if winner is None:
+            print(f"[LiveSearch] {hedge_stats.report()}")
+            return errors.get("primary") or errors.get("backup")
+        
+        name, answer, attempt_stats = winner
+        hedge_stats.win(name)
+        report = hedge_stats.report()
+        print(f"[LiveSearch] {report}")
+        if stats is not None:
+            stats.update(attempt_stats)
+            stats["hedge"] = report
+        return answer
+    
+    @staticmethod
+    def _failover_completion(model_config, messages, stats=None, cancel=None):
+        """
+        Try the primary, then each fallback entry from the API Loader, in order.
+        Providers whose circuit is open are skipped without sending a request.
+        """
+        configs = failover.chain(model_config, messages)
+        failures = []
+        for config in configs:
+            answer = LLMClient._single_completion(config, messages, stats, cancel)
+            if not hedging.is_error(answer) or (cancel is not None and cancel.is_set()):
+                if failures:
+                    report = failover.failover_report(config, failures)
+                    print(f"[LiveSearch] {report}")
+                    if stats is not None:
+                        stats["failover"] = report
+                return answer
+            failures.append((config, answer))
+            if len(failures) < len(configs):
+                print(f"[LiveSearch] {failover.describe(config)} failed, trying next fallback")
+        # Everything failed: the primary's error is the most useful one
+        return failures[0][1]
+    
+    @staticmethod
+    def _single_completion(model_config, messages, stats=None, cancel=None):
+        """
+        One provider/model behind its circuit breaker, retrying transient failures
+        with jittered exponential backoff (Retry-After honoured). cancel (threading.Event) aborts.
+        """
+        api_key = model_config.get("api_key", "")
+        provider = model_config.get("provider", "")
+        
+        # Ollama (Local) typically doesn't require API key
+        if not api_key and "Ollama" not in provider:
+            return "Error: API Key is missing."
+        
+        breaker = failover.breaker_for(model_config)
+        request_tokens = LLMClient._request_tokens(model_config, messages)
+        for attempt in range(failover.MAX_ATTEMPTS):
+            if not breaker.allow():
+                return failover.circuit_open_error(model_config, breaker)
+            LLMClient._log_rate_wait(model_config, RateLimiter.wait_llm(model_config, request_tokens))
+            started = time.perf_counter()
+            try:
+                answer = LLMClient._request_completion(model_config, messages, stats, cancel)
+            except failover.ProviderError as e:
+                if e.status == 429:
+                    RateLimiter.llm_throttled(model_config)
+                failover.record_outcome(breaker, e)
+                retry, delay = failover.should_retry(e, attempt)
+                if not retry or (cancel is not None and cancel.is_set()):
+                    return e.message
+                print(f"[LiveSearch] {failover.describe(model_config)}: {e.message[:120]} - retry {attempt + 2}/{failover.MAX_ATTEMPTS} in {delay:.1f}s")
+                if cancel is not None:
+                    if cancel.wait(delay):
+                        return e.message
+                else:
+                    time.sleep(delay)
+                continue
+            breaker.record_success()
+            RateLimiter.llm_succeeded(model_config)
+            if cancel is None or not cancel.is_set():
+                hedging.record_latency(model_config, time.perf_counter() - started, answer)
+            return answer
+    
+    @staticmethod
+    def _request_tokens(model_config, messages):
+        """Tokens a request counts against the TPM limit: prompt estimate plus the output reserve"""
+        if not model_config.get("tpm_limit"):
+            return 0
+        return ContextBudget(model_config).count_messages(messages) + (model_config.get("max_tokens") or 0)
+    
+    @staticmethod
+    def _log_rate_wait(model_config, waited):
+        if waited >= 0.5:
+            print(f"[LiveSearch] Waited {waited:.1f}s for the {model_config.get('provider')} rate limit")
+    
+    @staticmethod
+    def _request_completion(model_config, messages, stats=None, cancel=None):
+        """Send one request; failures are raised as failover.ProviderError"""
+        timeout = model_config.get("timeout", 120)
+        proxy = model_config.get("proxy", None)
+        provider = model_config.get("provider", "")
+        
+        url, headers, payload, use_responses_api = LLMClient._build_request(model_config, messages)
+        RateLimiter.exempt_url(url)
         
         try:
-            response = requests.post(url, headers=headers, json=payload, timeout=timeout, proxies=proxies)
+            session = SessionPool.get_session(url, proxy)
+            
+            if model_config.get("stream", False):
+                return LLMClient._stream_completion(
+                    session, url, headers, payload, timeout, provider, use_responses_api,
+                    model_config.get("max_output_chars", 0), stats, cancel
+                )
+            
+            response = session.post(url, headers=headers, json=payload, timeout=timeout)
             
             # Better error handling for non-200 responses
             if response.status_code != 200:
-                try:
-                    error_json = response.json()
-                    return f"Error calling LLM: HTTP {response.status_code} - {error_json}"
-                except:
-                    return f"Error calling LLM: HTTP {response.status_code} - {response.text}"
+                raise failover.response_error(LLMClient._error_from_response(response), response.status_code, response.headers)
                     
-            response.raise_for_status()
             data = response.json()
-            
-            # Anthropic (Claude) uses different response format
-            if "Anthropic" in provider:
-                if 'content' in data and len(data['content']) > 0:
-                    # Claude returns content as array of text blocks
-                    content_blocks = data['content']
-                    text_content = ""
-                    for block in content_blocks:
-                        if block.get('type') == 'text':
-                            text_content += block.get('text', '')
-                    return text_content if text_content else str(data)
-                else:
-                    return f"Error: Unexpected response format from Anthropic. Response: {data}"
-            elif use_responses_api:
-                # Responses API returns output_text plus structured output array
-                output_text = data.get("output_text")
-                if isinstance(output_text, list) and output_text:
-                    return "\n".join(output_text).strip()
-                output_items = data.get("output", [])
-                collected_text = []
-                for item in output_items:
-                    if item.get("type") == "message":
-                        for content in item.get("content", []):
-                            if content.get("type") in ("output_text", "text", "input_text"):
-                                collected_text.append(content.get("text", ""))
-                    elif item.get("type") in ("output_text", "text"):
-                        collected_text.append(item.get("text", ""))
-                if collected_text:
-                    return "\n".join(collected_text).strip()
-                return str(data)
-            # Standard OpenAI-compatible format (OpenAI, DeepSeek, Grok, Volcengine, Gemini, Aliyun, Ollama)
-            elif 'choices' in data and len(data['choices']) > 0:
-                return data['choices'][0]['message']['content']
-            else:
-                return f"Error: Unexpected response format from LLM provider. Response: {data}"
-                
+            return LLMClient._parse_response(data, provider, use_responses_api)
+        
+        except failover.ProviderError:
+            raise
+        except requests.exceptions.Timeout as e:
+            raise failover.ProviderError(f"Error calling LLM: {str(e)}", timeout=True)
+        except requests.exceptions.ConnectionError as e:
+            raise failover.ProviderError(f"Error calling LLM: {str(e)}", connection=True)
         except Exception as e:
-            return f"Error calling LLM: {str(e)}"
+            raise failover.ProviderError(f"Error calling LLM: {str(e)}")
+
+class StreamAccumulator:
+    """
+    Collects SSE lines from a streaming completion into the final answer text
+    and keeps the timing numbers (time-to-first-token, tokens/sec).
+    """
+    
+    def __init__(self, provider, use_responses_api, max_output_chars=0):
+        self.provider = provider
+        self.use_responses_api = use_responses_api
+        self.max_output_chars = max_output_chars
+        self.started = time.perf_counter()
+        self.first_token_at = None
+        self.chunks = []
+        self.length = 0
+        self.delta_count = 0
+        self.reported_tokens = None
+        self.stopped_early = False
+        # Set by the provider's end-of-stream event; a dropped connection leaves it False
+        self.completed = False
+        self.error = None
+    
+    def feed(self, line):
+        """Consume one SSE line; returns True when the stream should stop"""
+        if not line or not line.startswith("data:"):
+            return False
+        data = line[5:].strip()
+        if data == "[DONE]":
+            self.completed = True
+            return True
+        try:
+            event = json.loads(data)
+        except ValueError:
+            return False
+        
+        text, saw_token, output_tokens, done, error = LLMClient._parse_stream_event(event, self.provider, self.use_responses_api)
+        if error:
+            self.error = error
+            return True
+        if saw_token:
+            self.delta_count += 1
+            if self.first_token_at is None:
+                self.first_token_at = time.perf_counter()
+        if output_tokens is not None:
+            self.reported_tokens = output_tokens
+        if text:
+            self.chunks.append(text)
+            self.length += len(text)
+            if self.max_output_chars and self.length >= self.max_output_chars:
+                self.stopped_early = True
+                return True
+        if done:
+            self.completed = True
+        return done
+    
+    @staticmethod
+    def summary(stats):
+        """One-line timing summary from the stats filled by finish()"""
+        ttft_label = f"{stats['ttft']:.2f}s" if stats["ttft"] is not None else "n/a"
+        return (f"Stream: TTFT {ttft_label}, {stats['output_tokens']} tokens in {stats['duration']:.2f}s "
+                f"({stats['tokens_per_sec']:.1f} tok/s)" + (", stopped at max_output_chars" if stats["stopped_early"] else "")
+                + (", stream ended before completion" if not stats["complete"] and not stats["stopped_early"] else ""))
+    
+    def finish(self, stats=None):
+        """Final answer text (or error string); fills stats and logs the timing"""
+        if self.error:
+            return self.error
+        
+        elapsed = time.perf_counter() - self.started
+        tokens = self.reported_tokens or self.delta_count
+        ttft = (self.first_token_at - self.started) if self.first_token_at else None
+        generation_time = elapsed - ttft if ttft is not None else elapsed
+        tokens_per_sec = tokens / generation_time if generation_time > 0 else 0.0
+        
+        timing = {
+            "ttft": ttft,
+            "duration": elapsed,
+            "output_tokens": tokens,
+            "tokens_per_sec": tokens_per_sec,
+            "stopped_early": self.stopped_early,
+            "complete": self.completed and not self.stopped_early
+        }
+        if stats is not None:
+            stats.update(timing)
+        print(f"[LiveSearch] {StreamAccumulator.summary(timing)}")
+        
+        text = "".join(self.chunks)
+        if self.stopped_early:
+            text = text[:self.max_output_chars]
+        if self.use_responses_api:
+            text = text.strip()
+        return text if text or self.stopped_early else "Error: Empty streamed response from LLM provider."
 
 class LiveSearch_Agent:
     """
@@ -515,6 +1139,51 @@ class LiveSearch_Agent:
         }
     }
     
+    # Memoized query-optimization results, keyed by provider, model and the full refine messages
+    query_memo = DiskCache("query_memo", max_bytes=4 * 1024 * 1024)
+    QUERY_MEMO_TTL = 7 * 24 * 60 * 60
+    # Encoded TI2T images, keyed by a hash of the image pixels and the encoding budget
+    image_cache = DiskCache("encoded_images", max_bytes=64 * 1024 * 1024)
+    IMAGE_CACHE_TTL = 24 * 60 * 60
+    # Final answers, reused for similar optimized queries within a per-intent freshness window
+    answer_cache = AnswerCache()
+    
+    QUERY_OPTIMIZER_PROMPT = """You are a Search Query Generator Tool.
+Your ONLY task is to extract key terms to form a search query for a search engine (like DuckDuckGo).
+
+CRITICAL RULES:
+1. DO NOT answer the user's question.
+2. DO NOT generate any data, facts, time, or weather info.
+3. Output ONLY the raw search keywords string. No quotes, no prefixes.
+4. **ALWAYS output the search query in ENGLISH.** Even if the input is Chinese or other languages, translate key terms to English (e.g., "北京" -> "Beijing").
+   - English queries generally return better results from international sources like timeanddate.com.
+5. If location name is provided in parentheses, prioritize using "City Country" format to avoid ambiguity (e.g., "Ia Greece" instead of "Ia").
+6. Keep search queries SHORT - 3-6 words maximum.
+7. For weather/time queries: use "current local time weather City Country".
+   - Avoid using specific website names like "timeanddate" unless necessary.
+   - Always include the Country name if the city is short or potentially ambiguous.
+
+Examples:
+Input: "北京现在的天气" -> Output: current weather Beijing China
+Input: "What time is it in New York?" -> Output: current local time New York USA
+Input: "coordinates ... (Location: New York)" -> Output: current local time weather New York USA
+Input: "coordinates ... (Location: Ia Municipal Unit, Greece)" -> Output: current local time weather Ia Greece
+Input: "Haidian District China current weather time (Location: Beijing Haidian)" -> Output: current local time weather Beijing Haidian China
+Input: "Who won the Super Bowl 2024" -> Output: Super Bowl 2024 winner"""
+    
+    # Separates per-prompt entries in the outputs of batch mode
+    BATCH_SEPARATOR = "\n\n=====\n\n"
+    # TI2T image encoding
+    IMAGE_MIME_TYPES = {"PNG": "image/png", "JPEG": "image/jpeg", "WEBP": "image/webp"}
+    IMAGE_MIN_QUALITY = 40
+    IMAGE_MIN_EDGE = 256
+    # Per-source context budget when no model budget is given (see ContextBudget)
+    SOURCE_TOKEN_BUDGET = 500
+    # Room kept for the TI2T answer system prompt when budgeting VLM context
+    VLM_SYSTEM_TOKENS = 250
+    # Speculative search: share of refined-query URLs that must already be in the raw-prompt results to keep them
+    SPECULATION_MIN_OVERLAP = 0.5
+    
     def __init__(self):
         pass
     
@@ -538,6 +1207,49 @@ class LiveSearch_Agent:
     CATEGORY = "LiveSearch"
     
     def process_search(self, prompt, model_config, search_settings, image=None, role=""):
+        try:
+            if isinstance(prompt, (list, tuple)) or search_settings.get("batch_mode", False):
+                return self._run_batch(prompt, model_config, search_settings, image, role)
+            return self._run_search(prompt, model_config, search_settings, image, role)
+        finally:
+            # Confirms keep-alive connections and caches are reused across queue items
+            SessionPool.log_stats()
+            DiskCache.log_stats()
+            RateLimiter.log_stats()
+    
+    def _run_batch(self, prompts, model_config, search_settings, image=None, role=""):
+        """
+        Run the full pipeline for several prompts (a list, or one prompt per line) in parallel.
+        Identical prompts run once; outputs keep input order, joined by BATCH_SEPARATOR.
+        """
+        if isinstance(prompts, str):
+            prompts = prompts.splitlines()
+        prompts = [p.strip() for p in prompts if p and p.strip()]
+        if not prompts:
+            return ("No prompts provided for batch mode.", "", "Batch mode (empty)")
+        
+        unique_prompts = list(dict.fromkeys(prompts))
+        concurrency = max(1, min(search_settings.get("batch_concurrency", 4), len(unique_prompts)))
+        print(f"[LiveSearch] Batch: {len(prompts)} prompts ({len(unique_prompts)} unique), concurrency {concurrency}")
+        
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="LiveSearchBatch") as executor:
+            futures = {
+                p: executor.submit(self._run_search, p, model_config, search_settings, image, role)
+                for p in unique_prompts
+            }
+            results = {}
+            for p, future in futures.items():
+                try:
+                    results[p] = future.result()
+                except Exception as e:
+                    results[p] = (f"Error: {e}", "", "Batch item failed")
+        print(f"[LiveSearch] Batch finished in {time.perf_counter() - started:.2f}s")
+        
+        ordered = [results[p] for p in prompts]
+        return tuple(self.BATCH_SEPARATOR.join(item[i] for item in ordered) for i in range(3))
+    
+    def _run_search(self, prompt, model_config, search_settings, image=None, role=""):
         # Extract settings
         mode = search_settings.get("mode", "T2T")
         enable_web_search = search_settings.get("enable_web_search", True)
@@ -546,6 +1258,13 @@ class LiveSearch_Agent:
         # Support both old and new setting keys
         optimize_query = search_settings.get("optimize_query", search_settings.get("optimize_prompt", False))
         valid_proxy = search_settings.get("proxy")
+        use_cache = search_settings.get("use_cache", True)
+        cache_ttl = search_settings.get("cache_ttl_minutes", 360) * 60
+        index_first = search_settings.get("index_first", False)
+        geocoder_backend = search_settings.get("reverse_geocoder", "Offline (GeoNames)")
+        max_page_bytes = search_settings.get("max_page_kb", 1024) * 1024
+        html_extractor = search_settings.get("html_extractor", "auto")
+        RateLimiter.configure_duckduckgo(search_settings.get("ddg_qps", RateLimiter.DEFAULT_DDG_QPS))
         
         # Add proxy to model_config for API calls
         model_config_with_proxy = model_config.copy()
@@ -563,7 +1282,7 @@ class LiveSearch_Agent:
         
         # TI2T 模式：直接走 VLM 路径
         if mode == "TI2T":
-            return self._process_vlm(prompt, model_config_with_proxy, image, output_language, enable_web_search, optimize_query, num_results, role)
+            return self._process_vlm(prompt, model_config_with_proxy, image, output_language, enable_web_search, optimize_query, num_results, role, search_settings)
         
         if self._is_ti2t_model(provider, model):
             print(f"[LiveSearch] Notice: {provider} / {model} 属于 TI2T 视觉模型，当前运行于 T2T 模式，将仅使用文本能力。")
@@ -574,156 +1293,77 @@ class LiveSearch_Agent:
         if not enable_web_search:
             print("[LiveSearch] Web search disabled, using LLM directly")
             return self._direct_llm_response(prompt, model_config_with_proxy, output_language, role)
-        
+
+        if search_settings.get("engine", "Threaded") == "Asyncio":
+            from .async_engine import HTTPX_AVAILABLE, AsyncSearchPipeline, run_sync
+            if HTTPX_AVAILABLE:
+                print("[LiveSearch] Using asyncio engine")
+                return run_sync(AsyncSearchPipeline(self).run_t2t(prompt, model_config_with_proxy, search_settings, role))
+            print("[LiveSearch] Warning: httpx not installed, falling back to threaded engine. Install with: pip install httpx")
+
         # 1. Determine Search Query
         search_query = prompt
         optimized_prompt_output = "No optimization (using original prompt)"
         
-        # Extract coordinates from prompt and convert to location name
-        location_name = None
-        city_name = None  # Simplified city name for search
-        weather_context = "" # Store precise weather data
-        coordinate_pattern = r'(-?\d+\.?\d*)\s*[,，]\s*(-?\d+\.?\d*)'
-        coord_match = re.search(coordinate_pattern, prompt)
-        
-        print(f"[LiveSearch] GEOPY_AVAILABLE: {GEOPY_AVAILABLE}, coord_match: {coord_match is not None}")
+        # Speculative search on the raw prompt, overlapping the optimization round trip
+        router = SearchRouter.from_settings(search_settings)
+        speculation = None
+        # Index-first runs usually never search, so they do not speculate either
+        if optimize_query and search_settings.get("speculative_search", False) and not index_first:
+            executor = ThreadPoolExecutor(max_workers=1)
+            speculation = executor.submit(self._speculative_search, prompt, num_results, valid_proxy, use_cache, cache_ttl, max_page_bytes, html_extractor, router)
+            executor.shutdown(wait=False)
         
-        if coord_match:
-            try:
-                lat, lon = float(coord_match.group(1)), float(coord_match.group(2))
-                
-                # 1. Fetch precise weather data (Open-Meteo)
-                weather_context = SearchTool.get_weather_data(lat, lon, proxy=valid_proxy)
-                if weather_context:
-                    print(f"[LiveSearch] Precise weather data fetched for {lat}, {lon}")
-                
-                # 2. Reverse Geocoding (Geopy)
-                if GEOPY_AVAILABLE:
-                    print(f"[LiveSearch] Detected coordinates: {lat}, {lon}, attempting reverse geocoding...")
-                    geolocator = Nominatim(user_agent="comfyui_live_search")
-                    location = geolocator.reverse((lat, lon), timeout=10, language='en')
-                    
-                    if location:
-                        # Extract city/country from address
-                        address = location.raw.get('address', {})
-                        city = address.get('city') or address.get('town') or address.get('village') or address.get('county')
-                        state = address.get('state', '') or address.get('state_district', '')
-                        country = address.get('country', '')
-                        location_name = f"{city}, {country}" if city else country
-                        # Extract city and district for more precise search queries
-                        city_name = city or state or address.get('region', '')
-                        # Also extract district/suburb if available (for Beijing Haidian case)
-                        district = address.get('suburb', '') or address.get('district', '')
-                        if district and city_name:
-                            # Store both city and district for "timeanddate Beijing Haidian" format
-                            city_name = f"{city_name} {district}"
-                        print(f"[LiveSearch] Reverse geocoded to: {location_name} (city: {city_name})")
-            except (GeocoderTimedOut, GeocoderServiceError, Exception) as e:
-                print(f"[LiveSearch] Coordinate processing failed: {e}, will rely on LLM optimization")
-        
-        # Apply prompt optimization if enabled
-        if optimize_query:
-            # If we have city name from geopy, inject simplified location info
-            optimization_prompt = prompt
-            if city_name:
-                # Use just city name for cleaner search queries
-                optimization_prompt = f"{prompt} (Location: {city_name})"
-            elif location_name:
-                optimization_prompt = f"{prompt} (Location: {location_name})"
-            
-            refine_messages = [
-                {"role": "system", "content": """You are a Search Query Generator Tool.
-Your ONLY task is to extract key terms to form a search query for a search engine (like DuckDuckGo).
-
-CRITICAL RULES:
-1. DO NOT answer the user's question.
-2. DO NOT generate any data, facts, time, or weather info.
-3. Output ONLY the raw search keywords string. No quotes, no prefixes.
-4. **ALWAYS output the search query in ENGLISH.** Even if the input is Chinese or other languages, translate key terms to English (e.g., "北京" -> "Beijing").
-   - English queries generally return better results from international sources like timeanddate.com.
-5. If location name is provided in parentheses, prioritize using "City Country" format to avoid ambiguity (e.g., "Ia Greece" instead of "Ia").
-6. Keep search queries SHORT - 3-6 words maximum.
-7. For weather/time queries: use "current local time weather City Country".
-   - Avoid using specific website names like "timeanddate" unless necessary.
-   - Always include the Country name if the city is short or potentially ambiguous.
-
-Examples:
-Input: "北京现在的天气" -> Output: current weather Beijing China
-Input: "What time is it in New York?" -> Output: current local time New York USA
-Input: "coordinates ... (Location: New York)" -> Output: current local time weather New York USA
-Input: "coordinates ... (Location: Ia Municipal Unit, Greece)" -> Output: current local time weather Ia Greece
-Input: "Haidian District China current weather time (Location: Beijing Haidian)" -> Output: current local time weather Beijing Haidian China
-Input: "Who won the Super Bowl 2024" -> Output: Super Bowl 2024 winner"""},
-                {"role": "user", "content": optimization_prompt}
-            ]
-            refined_query = LLMClient.chat_completion(model_config_with_proxy, refine_messages)
+        # Weather + geocoding, then optimization (see _pre_search)
+        weather_context, location_name, refined, _ = self._pre_search(
+            prompt, model_config_with_proxy, optimize_query, valid_proxy, use_cache, geocoder_backend
+        )
+        if refined:
+            refined_query, from_cache = refined
             if not refined_query.startswith("Error"):
-                print(f"[LiveSearch] Prompt optimized: {prompt} -> {refined_query}")
-                optimized_prompt_output = f"Original: {prompt}\nOptimized: {refined_query}"
-                if location_name:
-                    optimized_prompt_output += f"\nLocation resolved: {location_name}"
+                print(f"[LiveSearch] Prompt optimized{' (cached)' if from_cache else ''}: {prompt} -> {refined_query}")
                 search_query = refined_query
-            else:
-                optimized_prompt_output = f"Optimization failed: {refined_query}"
+            optimized_prompt_output = self._optimization_summary(prompt, refined_query, from_cache, location_name)
 
-        # 2. Perform Search
-        print(f"[LiveSearch] Searching for: {search_query} using DuckDuckGo")
-        
-        search_results = SearchTool.search_duckduckgo(search_query, num_results, proxy=valid_proxy)
-        
-        if not search_results:
-            return (f"No search results found using DuckDuckGo.", "", optimized_prompt_output)
+        # A recent answer to a similar query skips search, fetch and answer generation
+        if use_cache:
+            cached = self._cached_answer(prompt, search_query, model_config_with_proxy, output_language, role)
+            if cached:
+                return (cached[0], cached[1], optimized_prompt_output + cached[2])
 
-        # 3. Extract Content (prioritize trusted domains and specific pages)
-        context_data = []
-        source_urls = []
-        
-        # Sort results: trusted domains first, and prioritize specific pages over homepages
-        def sort_key(res):
-            url = res.get('url', '')
-            is_trusted = SearchTool.is_trusted_url(url)
-            is_homepage = url.endswith('/') or url.count('/') <= 3  # Homepage has few slashes
-            # Trusted + specific page = highest priority (0)
-            # Trusted + homepage = medium priority (1)
-            # Untrusted = lowest priority (2)
-            if is_trusted and not is_homepage:
-                return 0
-            elif is_trusted:
-                return 1
-            else:
-                return 2
+        budget = ContextBudget(model_config_with_proxy)
+        fixed_tokens = budget.count_messages(self._build_answer_messages(prompt, weather_context, output_language, role))
         
-        sorted_results = sorted(search_results, key=sort_key)
+        # 2. Index-first: answer from locally indexed pages when they are fresh enough for the query
+        indexed = None
+        if index_first:
+            indexed = self._indexed_sources(prompt, search_query, num_results, budget, fixed_tokens)
         
-        for res in sorted_results:
-            url = res.get('url', '')
-            title = res.get('title', '')
-            summary = res.get('summary', '')
-            
-            # Skip empty or invalid URLs
-            if not url or not url.startswith(('http://', 'https://')):
-                continue
-            
-            # Skip timeanddate.com homepage - we want specific location pages
-            if url == 'https://www.timeanddate.com/' or url == 'https://www.timeanddate.com':
-                print(f"[LiveSearch] Skipping timeanddate.com homepage, looking for specific page")
-                continue
+        if indexed:
+            context_data, source_urls = indexed
+            optimized_prompt_output += f"\nPage index: {len(source_urls)} local pages, web search skipped"
+        else:
+            # 3. Perform Search
+            print(f"[LiveSearch] Searching for: {search_query} using {router.label}")
             
-            print(f"[LiveSearch] Fetching: {url}")
-            content = SearchTool.fetch_url_content(url, proxy=valid_proxy)
+            if speculation is not None:
+                speculative_results = speculation.result()
+                refined_results = None
+                if search_query != prompt:
+                    refined_results = SearchTool.search_web(search_query, num_results, proxy=valid_proxy, use_cache=use_cache, cache_ttl=cache_ttl, router=router)
+                search_results = self._resolve_speculation(speculative_results, refined_results, num_results)
+            else:
+                search_results = SearchTool.search_web(search_query, num_results, proxy=valid_proxy, use_cache=use_cache, cache_ttl=cache_ttl, router=router)
             
-            if content:
-                # For timeanddate.com, use more content since we extract it more precisely
-                snippet_length = 3000 if 'timeanddate.com' in url else 2000
-                snippet = content[:snippet_length] if content else summary
-                context_data.append(f"Source: {title} ({url})\nSummary: {summary}\nContent: {snippet}\n---")
-                source_urls.append(url)
-                
-                # If we have enough trusted sources with actual content, we can stop early
-                trusted_with_content = [s for s in source_urls if SearchTool.is_trusted_url(s) and s not in ['https://www.timeanddate.com/', 'https://www.timeanddate.com']]
-                if len(trusted_with_content) >= 2:
-                    print("[LiveSearch] Found enough trusted sources with content, stopping early")
-                    break
+            if not search_results:
+                return (f"No search results found using {router.label}.", "", optimized_prompt_output)
+
+            # 4. Extract Content (prioritize trusted domains and specific pages), sized to the model's context window
+            context_data, source_urls = self._collect_sources(
+                search_results, valid_proxy, use_cache=use_cache, max_bytes=max_page_bytes, extractor=html_extractor,
+                query=f"{search_query} {prompt}", token_budget=budget.source_budget(fixed_tokens, len(search_results))
+            )
+        context_data, source_urls = budget.fit(context_data, source_urls, fixed_tokens)
         
         full_context = "\n".join(context_data)
         
@@ -731,7 +1371,197 @@ Input: "Who won the Super Bowl 2024" -> Output: Super Bowl 2024 winner"""},
         if weather_context:
             full_context = f"{weather_context}\n\n--- Web Search Results ---\n{full_context}"
 
-        # 4. Generate Answer
+        # 5. Generate Answer
+        final_messages = self._build_answer_messages(prompt, full_context, output_language, role)
+        optimized_prompt_output += self._prompt_token_report(budget, final_messages)
+
+        llm_stats = {}
+        answer = LLMClient.chat_completion(model_config_with_proxy, final_messages, llm_stats)
+        optimized_prompt_output += self._llm_report(llm_stats)
+        if use_cache:
+            self._store_answer(prompt, search_query, model_config_with_proxy, output_language, role, answer, source_urls, llm_stats)
+        
+        return (answer, "\n".join(source_urls), optimized_prompt_output)
+    
+    @staticmethod
+    def _timed(timings, stage, fn, *args, **kwargs):
+        """Run fn and record its wall time under timings[stage]"""
+        started = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            timings[stage] = time.perf_counter() - started
+
+    @staticmethod
+    def _log_stage_timings(timings, wall):
+        if not timings:
+            return
+        parts = ", ".join(f"{stage} {seconds:.2f}s" for stage, seconds in timings.items())
+        print(f"[LiveSearch] Pre-search stages: {parts} | wall {wall:.2f}s (sequential {sum(timings.values()):.2f}s)")
+
+    def _pre_search(self, prompt, model_config, optimize_query, proxy, use_cache, geocoder_backend):
+        """
+        Pre-search stages scheduled as a dependency graph:
+        weather and reverse geocoding run concurrently, query optimization starts as soon as
+        the location hint is known (immediately when the prompt has no coordinates).
+        Returns (weather_context, location_name, refined, timings), refined = (query, from_cache) or None.
+        """
+        started = time.perf_counter()
+        timings = {}
+        weather_context = ""
+        location_name = None
+        city_name = None  # Simplified city name for search
+        refined = None
+
+        coordinate_pattern = r'(-?\d+\.?\d*)\s*[,，]\s*(-?\d+\.?\d*)'
+        coord_match = re.search(coordinate_pattern, prompt)
+        print(f"[LiveSearch] Geocoder: {geocoder_backend}, GEOPY_AVAILABLE: {GEOPY_AVAILABLE}, coord_match: {coord_match is not None}")
+
+        weather_future = None
+        executor = None
+        try:
+            if coord_match:
+                lat, lon = float(coord_match.group(1)), float(coord_match.group(2))
+                executor = ThreadPoolExecutor(max_workers=1)
+                # Open-Meteo does not depend on the location name; it only has to finish before the context is built
+                weather_future = executor.submit(
+                    self._timed, timings, "weather", SearchTool.get_weather_data, lat, lon, proxy=proxy, use_cache=use_cache
+                )
+                try:
+                    print(f"[LiveSearch] Detected coordinates: {lat}, {lon}, attempting reverse geocoding...")
+                    address = self._timed(
+                        timings, "geocode", SearchTool.reverse_geocode, lat, lon, backend=geocoder_backend, user_agent="comfyui_live_search", proxy=proxy
+                    )
+                    if address:
+                        location_name, city_name = self._location_from_address(address)
+                        print(f"[LiveSearch] Reverse geocoded to: {location_name} (city: {city_name})")
+                except Exception as e:
+                    print(f"[LiveSearch] Coordinate processing failed: {e}, will rely on LLM optimization")
+
+            if optimize_query:
+                refine_messages = self._build_refine_messages(prompt, city_name, location_name)
+                refined = self._timed(timings, "optimize", self._refine_query, model_config, refine_messages, use_cache)
+
+            if weather_future is not None:
+                try:
+                    weather_context = weather_future.result()
+                    if weather_context:
+                        print(f"[LiveSearch] Precise weather data fetched for {lat}, {lon}")
+                except Exception as e:
+                    print(f"[LiveSearch] Weather fetch failed: {e}")
+        finally:
+            if executor is not None:
+                executor.shutdown(wait=False)
+
+        self._log_stage_timings(timings, time.perf_counter() - started)
+        return weather_context, location_name, refined, timings
+
+    def _speculative_search(self, prompt, num_results, proxy, use_cache, cache_ttl, max_bytes=None, extractor="auto", router=None):
+        """
+        Search the raw prompt and warm the page cache with its top pages while the query is being optimized
+        """
+        started = time.perf_counter()
+        results = SearchTool.search_web(prompt, num_results, proxy=proxy, use_cache=use_cache, cache_ttl=cache_ttl, router=router)
+        if results and use_cache:
+            urls = [res['url'] for res in self._select_candidates(results)]
+            with closing(SearchTool.fetch_urls_in_order(urls, proxy=proxy, use_cache=use_cache, max_bytes=max_bytes, extractor=extractor)) as fetches:
+                for _ in fetches:
+                    pass
+        print(f"[LiveSearch] Speculative search on raw prompt finished in {time.perf_counter() - started:.2f}s ({len(results)} results)")
+        return results
+
+    @staticmethod
+    def _result_overlap(speculative_results, refined_results):
+        """Share of the refined-query URLs already present in the speculative results"""
+        refined_urls = {canonical_url(res.get('url')) for res in refined_results if res.get('url')}
+        if not refined_urls:
+            return 0.0
+        speculative_urls = {canonical_url(res.get('url')) for res in speculative_results if res.get('url')}
+        return len(refined_urls & speculative_urls) / len(refined_urls)
+
+    @staticmethod
+    def _merge_by_rank(primary, secondary, limit):
+        """Interleave two ranked result lists (primary first at each rank), dropping duplicate URLs"""
+        merged = []
+        seen = set()
+        for rank in range(max(len(primary), len(secondary))):
+            for results in (primary, secondary):
+                if rank >= len(results):
+                    continue
+                key = canonical_url(results[rank].get('url'))
+                if key not in seen:
+                    seen.add(key)
+                    merged.append(results[rank])
+        return merged[:limit]
+
+    def _resolve_speculation(self, speculative_results, refined_results, num_results):
+        """
+        Pick the results to fetch once the refined query is known.
+        refined_results is None when optimization failed or did not change the query.
+        """
+        if not refined_results:
+            return speculative_results or refined_results or []
+        if not speculative_results:
+            return refined_results
+        overlap = self._result_overlap(speculative_results, refined_results)
+        if overlap >= self.SPECULATION_MIN_OVERLAP:
+            print(f"[LiveSearch] Speculative results kept ({overlap:.0%} overlap with refined query)")
+            return speculative_results
+        print(f"[LiveSearch] Speculative results merged by rank ({overlap:.0%} overlap with refined query)")
+        return self._merge_by_rank(refined_results, speculative_results, num_results)
+
+    @staticmethod
+    def _location_from_address(address):
+        """
+        Turn a Nominatim-style address dict into (location_name, city_name).
+        city_name includes the district when known, e.g. "Beijing Haidian".
+        """
+        city = address.get('city') or address.get('town') or address.get('village') or address.get('county')
+        state = address.get('state', '') or address.get('state_district', '')
+        country = address.get('country', '')
+        location_name = f"{city}, {country}" if city else country
+        # Extract city and district for more precise search queries
+        city_name = city or state or address.get('region', '')
+        # Also extract district/suburb if available (for Beijing Haidian case)
+        district = address.get('suburb', '') or address.get('district', '')
+        if district and city_name:
+            # Store both city and district for "timeanddate Beijing Haidian" format
+            city_name = f"{city_name} {district}"
+        return location_name, city_name
+    
+    def _build_refine_messages(self, prompt, city_name=None, location_name=None):
+        """
+        Messages for the query-optimization call, with the resolved location injected
+        """
+        # If we have city name from geopy, inject simplified location info
+        optimization_prompt = prompt
+        if city_name:
+            # Use just city name for cleaner search queries
+            optimization_prompt = f"{prompt} (Location: {city_name})"
+        elif location_name:
+            optimization_prompt = f"{prompt} (Location: {location_name})"
+        
+        return [
+            {"role": "system", "content": self.QUERY_OPTIMIZER_PROMPT},
+            {"role": "user", "content": optimization_prompt}
+        ]
+    
+    @staticmethod
+    def _optimization_summary(prompt, refined_query, from_cache=False, location_name=None):
+        """Text for the optimized_prompt output"""
+        if refined_query.startswith("Error"):
+            return f"Optimization failed: {refined_query}"
+        summary = f"Original: {prompt}\nOptimized: {refined_query}"
+        if from_cache:
+            summary += " (from cache)"
+        if location_name:
+            summary += f"\nLocation resolved: {location_name}"
+        return summary
+    
+    def _build_answer_messages(self, prompt, full_context, output_language, role=""):
+        """
+        Messages for the final T2T answer call
+        """
         # Determine output language instruction
         language_instruction = ""
         if output_language == "English":
@@ -756,14 +1586,31 @@ Rules:
 6. If search results don't contain real-time data, clearly state that and suggest using a dedicated weather service
 7. Keep the answer concise and well-structured, but include all relevant time and weather details"""
 
-        final_messages = [
+        return [
             {"role": "system", "content": system_prompt},
             {"role": "user", "content": f"User Query: {prompt}\n\nSearch Results:\n{full_context}"}
         ]
-
-        answer = LLMClient.chat_completion(model_config_with_proxy, final_messages)
+    
+    @staticmethod
+    def _query_memo_key(model_config, refine_messages):
+        return DiskCache.make_key(model_config.get("provider", ""), model_config.get("model", ""), refine_messages)
+    
+    def _refine_query(self, model_config, refine_messages, use_cache=True, memo_key=None):
+        """
+        Run the query-optimization LLM call, memoized on disk.
+        memo_key overrides the default key (e.g. to key VLM calls on the image hash instead of its payload).
+        Returns (refined_query, from_cache); errors are never cached.
+        """
+        memo_key = memo_key or self._query_memo_key(model_config, refine_messages)
+        if use_cache:
+            cached = self.query_memo.get(memo_key)
+            if cached:
+                return cached, True
         
-        return (answer, "\n".join(source_urls), optimized_prompt_output)
+        refined_query = LLMClient.chat_completion(model_config, refine_messages)
+        if use_cache and refined_query and not refined_query.startswith("Error"):
+            self.query_memo.set(memo_key, refined_query, self.QUERY_MEMO_TTL)
+        return refined_query, False
     
     def _direct_llm_response(self, prompt, model_config, output_language, role=""):
         """
@@ -792,14 +1639,15 @@ Rules:
             {"role": "user", "content": prompt}
         ]
         
-        answer = LLMClient.chat_completion(model_config, messages)
+        llm_stats = {}
+        answer = LLMClient.chat_completion(model_config, messages, llm_stats)
         
         if answer.startswith("Error"):
             return (f"Error: {answer}", "", "No optimization (direct LLM mode)")
         
-        return (answer, "", "No optimization (direct LLM mode, web search disabled)")
+        return (answer, "", "No optimization (direct LLM mode, web search disabled)" + self._llm_report(llm_stats))
     
-    def _process_vlm(self, prompt, model_config, image, output_language, enable_web_search, optimize_query, num_results, role=""):
+    def _process_vlm(self, prompt, model_config, image, output_language, enable_web_search, optimize_query, num_results, role="", search_settings=None):
         """
         Handle TI2T 模式：将 ComfyUI IMAGE 编码为 base64 并调用 VLM
         Supports Web Search by calling VLM twice: 1. Extract Keywords 2. Final Answer
@@ -807,6 +1655,12 @@ Rules:
         provider = model_config.get("provider", "")
         model = model_config.get("model", "")
         valid_proxy = model_config.get("proxy")
+        search_settings = search_settings or {}
+        use_cache = search_settings.get("use_cache", True)
+        cache_ttl = search_settings.get("cache_ttl_minutes", 360) * 60
+        geocoder_backend = search_settings.get("reverse_geocoder", "Offline (GeoNames)")
+        max_page_bytes = search_settings.get("max_page_kb", 1024) * 1024
+        html_extractor = search_settings.get("html_extractor", "auto")
         
         if Image is None:
             return ("当前环境缺少 Pillow 库，无法处理图像输入。请安装 pillow>=9.0 后重试。", "", "TI2T mode unavailable (Pillow missing)")
@@ -828,9 +1682,19 @@ Rules:
         if image is None:
             return ("TI2T 模式需要连接 IMAGE 输入端口，请提供图片后再试。", "", "TI2T mode missing image")
         
-        image_b64 = self._image_to_base64(image)
+        image_b64, image_mime, image_hash = self._image_to_base64(
+            image,
+            max_edge=search_settings.get("image_max_edge", 1536),
+            image_format=search_settings.get("image_format", "JPEG"),
+            quality=search_settings.get("image_quality", 85),
+            max_bytes=search_settings.get("image_max_kb", 1024) * 1024,
+            use_cache=use_cache
+        )
         if not image_b64:
             return ("无法读取或编码输入图像，请确认图像张量有效。", "", "TI2T mode image encoding failed")
+        # Built once; the search path sends it with both VLM calls
+        image_url = f"data:{image_mime};base64,{image_b64}"
+        image_detail = search_settings.get("image_detail", "auto")
         
         # Determine language instruction
         language_instruction = ""
@@ -850,23 +1714,20 @@ Rules:
                 lat, lon = float(coord_match.group(1)), float(coord_match.group(2))
                 
                 # 1. Fetch precise weather data (Open-Meteo)
-                weather_context = SearchTool.get_weather_data(lat, lon, proxy=valid_proxy)
+                weather_context = SearchTool.get_weather_data(lat, lon, proxy=valid_proxy, use_cache=use_cache)
                 if weather_context:
                     print(f"[LiveSearch VLM] Precise weather data fetched for {lat}, {lon}")
                 
                 # 2. Reverse Geocoding
-                if GEOPY_AVAILABLE:
-                    print(f"[LiveSearch VLM] Detected coordinates: {lat}, {lon}, attempting reverse geocoding...")
-                    geolocator = Nominatim(user_agent="comfyui_live_search_vlm")
-                    location = geolocator.reverse((lat, lon), timeout=10, language='en')
-                    if location:
-                        address = location.raw.get('address', {})
-                        city = address.get('city') or address.get('town') or address.get('village') or address.get('county')
-                        country = address.get('country', '')
-                        if city:
-                            location_name = f"{city}, {country}" if country else city
-                            location_hint = f" (Location identified from coordinates: {location_name})"
-                            print(f"[LiveSearch VLM] Reverse geocoded: {location_name}")
+                print(f"[LiveSearch VLM] Detected coordinates: {lat}, {lon}, attempting reverse geocoding...")
+                address = SearchTool.reverse_geocode(lat, lon, backend=geocoder_backend, user_agent="comfyui_live_search_vlm", proxy=valid_proxy)
+                if address:
+                    city = address.get('city') or address.get('town') or address.get('village') or address.get('county')
+                    country = address.get('country', '')
+                    if city:
+                        location_name = f"{city}, {country}" if country else city
+                        location_hint = f" (Location identified from coordinates: {location_name})"
+                        print(f"[LiveSearch VLM] Reverse geocoded: {location_name}")
             except Exception as e:
                 print(f"[LiveSearch VLM] Coordinate processing failed: {e}")
 
@@ -890,10 +1751,7 @@ Rules:
 6. Do not answer the question yet."""
                 
                 query_gen_content = [
-                    {
-                        "type": "image_url",
-                        "image_url": {"url": f"data:image/png;base64,{image_b64}", "detail": "auto"}
-                    },
+                    self._image_part(image_url, image_detail),
                     {"type": "text", "text": f"User Question: {prompt}{location_hint}\nGenerate a search query:"}
                 ]
                 
@@ -902,68 +1760,36 @@ Rules:
                     {"role": "user", "content": query_gen_content}
                 ]
                 
-                generated_query = LLMClient.chat_completion(model_config, query_messages)
+                # The query only depends on the image and the question: key on the pixel hash, not the payload
+                memo_key = DiskCache.make_key(provider, model, "vlm_query", image_hash, image_detail, query_gen_system, query_gen_content[1]["text"])
+                generated_query, from_cache = self._refine_query(model_config, query_messages, use_cache, memo_key=memo_key)
                 
                 if not generated_query.startswith("Error"):
                     search_query = generated_query.strip()
-                    print(f"[LiveSearch] VLM Generated Query: {search_query}")
+                    print(f"[LiveSearch] VLM Generated Query{' (cached)' if from_cache else ''}: {search_query}")
                     optimized_prompt_output = f"User Prompt: {prompt}\nVLM Generated Query: {search_query}"
+                    if from_cache:
+                        optimized_prompt_output += " (from cache)"
                 else:
                     print(f"[LiveSearch] VLM Query Generation failed: {generated_query}")
             
             # Step 2: Perform Search
-            print(f"[LiveSearch] Searching for: {search_query} using DuckDuckGo")
-            search_results = SearchTool.search_duckduckgo(search_query, num_results, proxy=valid_proxy)
-            
-            context_data = []
-            source_urls = []
+            router = SearchRouter.from_settings(search_settings)
+            print(f"[LiveSearch] Searching for: {search_query} using {router.label}")
+            search_results = SearchTool.search_web(search_query, num_results, proxy=valid_proxy, use_cache=use_cache, cache_ttl=cache_ttl, router=router)
             
+            context_data, source_urls = [], []
+            budget = ContextBudget(model_config)
             if search_results:
-                # Sort results: trusted domains first, and prioritize specific pages over homepages
-                def sort_key(res):
-                    url = res.get('url', '')
-                    is_trusted = SearchTool.is_trusted_url(url)
-                    is_homepage = url.endswith('/') or url.count('/') <= 3
-                    if is_trusted and not is_homepage:
-                        return 0
-                    elif is_trusted:
-                        return 1
-                    else:
-                        return 2
-                
-                sorted_results = sorted(search_results, key=sort_key)
-                
-                for res in sorted_results:
-                    url = res.get('url', '')
-                    title = res.get('title', '')
-                    summary = res.get('summary', '')
-                    
-                    # Skip empty or invalid URLs
-                    if not url or not url.startswith(('http://', 'https://')):
-                        continue
-                    
-                    # Skip timeanddate.com homepage
-                    if url == 'https://www.timeanddate.com/' or url == 'https://www.timeanddate.com':
-                        continue
-                    
-                    print(f"[LiveSearch] Fetching: {url}")
-                    content = SearchTool.fetch_url_content(url, proxy=valid_proxy)
-                    
-                    if content:
-                        snippet_length = 3000 if 'timeanddate.com' in url else 2000
-                        snippet = content[:snippet_length] if content else summary
-                        context_data.append(f"Source: {title} ({url})\nSummary: {summary}\nContent: {snippet}\n---")
-                        source_urls.append(url)
-                        
-                        # Early stop if we have enough trusted content
-                        trusted_with_content = [s for s in source_urls if SearchTool.is_trusted_url(s) and s not in ['https://www.timeanddate.com/', 'https://www.timeanddate.com']]
-                        if len(trusted_with_content) >= 2:
-                            print("[LiveSearch] Found enough trusted sources with content, stopping early")
-                            break
-                    else:
-                         # Fallback to summary if fetch fails
-                         context_data.append(f"Source: {title} ({url})\nSummary: {summary}\n(Content fetch failed)\n---")
-                         source_urls.append(url)
+                # Fixed part: image, question and weather, plus room for the VLM system prompt
+                fixed_tokens = self.VLM_SYSTEM_TOKENS + budget.count_messages([
+                    {"role": "user", "content": [self._image_part(image_url, image_detail), {"type": "text", "text": f"{prompt}\n{weather_context}"}]}
+                ])
+                context_data, source_urls = self._collect_sources(
+                    search_results, valid_proxy, keep_failed=True, use_cache=use_cache, max_bytes=max_page_bytes, extractor=html_extractor,
+                    query=f"{search_query} {prompt}", token_budget=budget.source_budget(fixed_tokens, len(search_results))
+                )
+                context_data, source_urls = budget.fit(context_data, source_urls, fixed_tokens)
             
             full_context = "\n".join(context_data) if context_data else "No search results found."
             
@@ -996,10 +1822,7 @@ Rules:
                  final_system_prompt = f"{role}\n\nSystem Rules:\n1. {language_instruction}\n2. Use provided search results and image."
 
             final_user_content = [
-                {
-                    "type": "image_url",
-                    "image_url": {"url": f"data:image/png;base64,{image_b64}", "detail": "auto"}
-                },
+                self._image_part(image_url, image_detail),
                 {"type": "text", "text": f"User Question: {prompt} {lang_suffix}\n\nSearch Results:\n{full_context}"}
             ]
             
@@ -1007,9 +1830,11 @@ Rules:
                 {"role": "system", "content": final_system_prompt},
                 {"role": "user", "content": final_user_content}
             ]
+            optimized_prompt_output += self._prompt_token_report(budget, final_messages)
             
-            answer = LLMClient.chat_completion(model_config, final_messages)
-            return (answer, "\n".join(source_urls), optimized_prompt_output)
+            llm_stats = {}
+            answer = LLMClient.chat_completion(model_config, final_messages, llm_stats)
+            return (answer, "\n".join(source_urls), optimized_prompt_output + self._llm_report(llm_stats))
 
         # --- Direct VLM (No Search) ---
         else:
@@ -1024,10 +1849,7 @@ Rules:
                 system_prompt = f"{role}\n\nSystem Rules:\n1. {language_instruction}"
 
             user_content = [
-                {
-                    "type": "image_url",
-                    "image_url": {"url": f"data:image/png;base64,{image_b64}", "detail": "auto"}
-                },
+                self._image_part(image_url, image_detail),
                 {"type": "text", "text": prompt} if prompt.strip() else {"type": "text", "text": "Describe this image."}
             ]
             
@@ -1036,50 +1858,325 @@ Rules:
                 {"role": "user", "content": user_content}
             ]
             
-            answer = LLMClient.chat_completion(model_config, messages)
-            return (answer, "", "TI2T mode (direct vision response)")
+            llm_stats = {}
+            answer = LLMClient.chat_completion(model_config, messages, llm_stats)
+            return (answer, "", "TI2T mode (direct vision response)" + self._llm_report(llm_stats))
     
-    def _image_to_base64(self, image_tensor):
+    @staticmethod
+    def _result_priority(res):
         """
-        Convert ComfyUI IMAGE tensor to base64 encoded PNG
+        Sort key for search results: trusted domains first, and specific pages over homepages
         """
-        try:
-            if isinstance(image_tensor, list):
-                image_tensor = image_tensor[0]
-            
-            if image_tensor is None:
-                return None
+        url = res.get('url', '')
+        is_trusted = SearchTool.is_trusted_url(url)
+        is_homepage = url.endswith('/') or url.count('/') <= 3  # Homepage has few slashes
+        # Trusted + specific page = highest priority (0)
+        # Trusted + homepage = medium priority (1)
+        # Untrusted = lowest priority (2)
+        if is_trusted and not is_homepage:
+            return 0
+        elif is_trusted:
+            return 1
+        else:
+            return 2
+    
+    def _select_candidates(self, search_results, deduplicator=None):
+        """
+        Fetchable results in priority order (invalid URLs, the timeanddate.com homepage and
+        URLs equivalent to a higher-priority result dropped)
+        """
+        if deduplicator is None:
+            deduplicator = SourceDeduplicator()
+        candidates = []
+        for res in sorted(search_results, key=self._result_priority):
+            url = res.get('url', '')
             
-            tensor = image_tensor
-            if hasattr(tensor, "cpu"):
-                tensor = tensor.detach().cpu()
-            else:
-                return None
+            # Skip empty or invalid URLs
+            if not url or not url.startswith(('http://', 'https://')):
+                continue
             
-            if tensor.ndim == 4:
-                tensor = tensor[0]
+            # Skip timeanddate.com homepage - we want specific location pages
+            if url == 'https://www.timeanddate.com/' or url == 'https://www.timeanddate.com':
+                print(f"[LiveSearch] Skipping timeanddate.com homepage, looking for specific page")
+                continue
             
-            # Ensure channel-last for Pillow
-            if tensor.ndim == 3 and tensor.shape[0] in (1, 3, 4) and tensor.shape[-1] not in (1, 3, 4):
-                tensor = tensor.permute(1, 2, 0)
+            # Mirrors, www./m. variants and tracking-parameter copies of a URL already selected
+            if deduplicator.seen_url(url):
+                continue
             
-            array = tensor.clamp(0, 1).mul(255).byte().numpy()
-            if array.ndim == 2 or array.shape[-1] == 1:
-                array = array.squeeze()
+            candidates.append(res)
+        return candidates
+    
+    @classmethod
+    def _format_source(cls, res, content, query=None, token_budget=None):
+        """
+        Context block for one fetched page; content=None marks a failed fetch.
+        With a query, the page is cut down to its most relevant passages (BM25) within
+        token_budget (default SOURCE_TOKEN_BUDGET).
+        """
+        url = res.get('url', '')
+        title = res.get('title', '')
+        summary = res.get('summary', '')
+        if content is None:
+            return f"Source: {title} ({url})\nSummary: {summary}\n(Content fetch failed)\n---"
+        if 'timeanddate.com' in url:
+            # timeanddate.com extraction is already targeted (time/weather first), keep its order
+            content = content[:3000]
+        elif query:
+            content = select_passages(content, query, token_budget or cls.SOURCE_TOKEN_BUDGET)
+        else:
+            content = content[:2000]
+        return f"Source: {title} ({url})\nSummary: {summary}\nContent: {content}\n---"
+    
+    def _source_block(self, deduplicator, res, content, query=None, token_budget=None):
+        """Context block for a fetched page, or None when it near-duplicates a source already kept"""
+        if deduplicator.duplicate_of(res['url'], content):
+            return None
+        return self._format_source(res, content, query, token_budget)
+    
+    @staticmethod
+    def _has_enough_sources(source_urls):
+        """Early-stop condition: at least two trusted sources with content"""
+        return len([s for s in source_urls if SearchTool.is_trusted_url(s)]) >= 2
+    
+    def _collect_sources(self, search_results, proxy, keep_failed=False, use_cache=True, max_bytes=None, extractor="auto", query=None, token_budget=None):
+        """
+        Fetch result pages concurrently and assemble context in priority order.
+        Stops (and abandons pending fetches) once enough trusted sources have content.
+        Pages whose text is a near-duplicate (SimHash) of a higher-priority source are dropped.
+        keep_failed: keep the search summary for pages whose fetch failed (VLM path)
+        query: rank page passages against it instead of truncating (see _format_source)
+        token_budget: passage budget per source, from ContextBudget.source_budget
+        """
+        deduplicator = SourceDeduplicator()
+        candidates = self._select_candidates(search_results, deduplicator)
+        context_data = []
+        source_urls = []
+        if not candidates:
+            return context_data, source_urls
+        
+        print(f"[LiveSearch] Fetching {len(candidates)} pages (up to {SearchTool.MAX_FETCH_WORKERS} in parallel)")
+        fetched_tokens = 0
+        fetches = SearchTool.fetch_urls_in_order([res['url'] for res in candidates], proxy=proxy, use_cache=use_cache, max_bytes=max_bytes, extractor=extractor)
+        with closing(fetches):
+            for res, (url, content) in zip(candidates, fetches):
+                if content:
+                    print(f"[LiveSearch] Fetched: {url}")
+                    fetched_tokens += estimate_tokens(content)
+                    block = self._source_block(deduplicator, res, content, query, token_budget)
+                    if block is None:
+                        continue
+                    context_data.append(block)
+                    source_urls.append(url)
+                    
+                    # If we have enough trusted sources with actual content, we can stop early
+                    if self._has_enough_sources(source_urls):
+                        print("[LiveSearch] Found enough trusted sources with content, stopping early")
+                        break
+                elif keep_failed:
+                    # Fallback to summary if fetch fails
+                    context_data.append(self._format_source(res, None))
+                    source_urls.append(url)
+        
+        self._log_context_size(context_data, fetched_tokens)
+        return context_data, source_urls
+    
+    def _indexed_sources(self, prompt, search_query, num_results, budget, fixed_tokens):
+        """
+        Index-first mode: context blocks from pages in the local page index that match search_query
+        and are fresh enough for the query's intent, or None to go to the web
+        """
+        intent = classify_query_intent(f"{prompt} {search_query}")
+        pages = SearchTool.page_index.lookup(search_query, num_results, intent)
+        if not pages:
+            print(f"[LiveSearch] Page index miss ({intent} query), searching the web")
+            return None
+        
+        deduplicator = SourceDeduplicator()
+        token_budget = budget.source_budget(fixed_tokens, len(pages))
+        context_data = []
+        source_urls = []
+        now = time.time()
+        for page in pages:
+            if deduplicator.seen_url(page.url) or deduplicator.duplicate_of(page.url, page.text):
+                continue
+            res = {'url': page.url, 'title': page.title, 'summary': f"(indexed page, fetched {(now - page.fetched_at) / 60:.0f} min ago)"}
+            context_data.append(self._format_source(res, page.text, f"{search_query} {prompt}", token_budget))
+            source_urls.append(page.url)
+        oldest = (now - min(page.fetched_at for page in pages)) / 60
+        print(f"[LiveSearch] Page index hit ({intent} query): {len(source_urls)} pages, oldest fetched {oldest:.0f} min ago")
+        return context_data, source_urls
+    
+    @staticmethod
+    def _answer_scope(model_config, output_language, role):
+        """Answers are only shared between runs with the same model, output language and role"""
+        return DiskCache.make_key(model_config.get("provider", ""), model_config.get("model", ""), output_language, role or "")
+    
+    def _cached_answer(self, prompt, search_query, model_config, output_language, role):
+        """
+        (answer, source_urls, optimized_prompt line) from the answer cache for a search query
+        similar to search_query, or None
+        """
+        intent = classify_query_intent(f"{prompt} {search_query}")
+        cached = self.answer_cache.lookup(search_query, self._answer_scope(model_config, output_language, role), intent)
+        if cached is None:
+            return None
+        age = (time.time() - cached.created_at) / 60
+        print(f"[LiveSearch] Answer cache hit ({intent} query, similarity {cached.similarity:.2f} to \"{cached.query}\", "
+              f"{age:.0f} min old), skipping search and answer generation")
+        report = f"\nAnswer cache: reused the answer for \"{cached.query}\" ({age:.0f} min old, similarity {cached.similarity:.2f})"
+        return cached.answer, "\n".join(cached.source_urls), report
+    
+    def _store_answer(self, prompt, search_query, model_config, output_language, role, answer, source_urls, llm_stats=None):
+        """
+        Cache a web-grounded answer. Errors, answers without sources and partial streamed answers
+        (cut at max_output_chars, or the stream ended without its completion event) are not reused.
+        """
+        if hedging.is_error(answer) or not source_urls or not (llm_stats or {}).get("complete", True):
+            return
+        intent = classify_query_intent(f"{prompt} {search_query}")
+        self.answer_cache.store(search_query, self._answer_scope(model_config, output_language, role), intent, answer, source_urls)
+    
+    @staticmethod
+    def _prompt_token_report(budget, messages):
+        """Line for the optimized_prompt output: estimated prompt size against the model's window"""
+        prompt_tokens = budget.count_messages(messages)
+        print(f"[LiveSearch] Prompt: ~{prompt_tokens} tokens (context window {budget.context_window}, {budget.max_output} reserved for output)")
+        return f"\nPrompt tokens: ~{prompt_tokens} / {budget.context_window}"
+    
+    @staticmethod
+    def _llm_report(llm_stats):
+        """
+        Lines for the optimized_prompt output: streaming TTFT and tokens/sec (streaming mode),
+        hedging winner and failover path, when they happened
+        """
+        lines = [StreamAccumulator.summary(llm_stats)] if "duration" in llm_stats else []
+        lines += [llm_stats[key] for key in ("hedge", "failover") if llm_stats.get(key)]
+        return "".join(f"\n{line}" for line in lines)
+    
+    @staticmethod
+    def _log_context_size(context_data, fetched_tokens):
+        if fetched_tokens:
+            context_tokens = sum(estimate_tokens(block) for block in context_data)
+            print(f"[LiveSearch] Context: ~{context_tokens} tokens from ~{fetched_tokens} tokens of fetched text")
+    
+    def _image_array(self, image_tensor):
+        """
+        First image of a ComfyUI IMAGE batch as a channel-last uint8 numpy array (None if unusable).
+        The batch is sliced before .cpu() so only one frame is copied.
+        """
+        if isinstance(image_tensor, list):
+            image_tensor = image_tensor[0]
+        
+        if image_tensor is None or not hasattr(image_tensor, "cpu"):
+            return None
+        
+        tensor = image_tensor
+        if tensor.ndim == 4:
+            tensor = tensor[0]
+        tensor = tensor.detach().cpu()
+        
+        # Ensure channel-last for Pillow
+        if tensor.ndim == 3 and tensor.shape[0] in (1, 3, 4) and tensor.shape[-1] not in (1, 3, 4):
+            tensor = tensor.permute(1, 2, 0)
+        
+        array = tensor.clamp(0, 1).mul(255).byte().numpy()
+        if array.ndim == 2 or array.shape[-1] == 1:
+            array = array.squeeze()
+        return array
+    
+    @staticmethod
+    def _image_hash(array):
+        """Fast content hash of the pixel data (xxhash when installed, else BLAKE2b)"""
+        header = f"{array.shape}|{array.dtype}".encode("utf-8")
+        data = memoryview(array).cast("B") if array.flags["C_CONTIGUOUS"] else array.tobytes()
+        if xxhash is not None:
+            digest = xxhash.xxh3_128(header)
+            digest.update(data)
+            return digest.hexdigest()
+        digest = hashlib.blake2b(header, digest_size=16)
+        digest.update(data)
+        return digest.hexdigest()
+    
+    def _image_to_base64(self, image_tensor, max_edge=0, image_format="PNG", quality=85, max_bytes=0, use_cache=True):
+        """
+        Convert ComfyUI IMAGE tensor to a base64 payload within a size budget.
+        Encoded payloads are cached by pixel hash and budget, so re-queued images are not re-encoded.
+        Returns (base64_str, mime_type, image_hash) or (None, None, None).
+        """
+        try:
+            array = self._image_array(image_tensor)
+            if array is None:
+                return None, None, None
             
-            mode = "RGB"
-            if array.ndim == 2:
-                mode = "L"
-            elif array.shape[-1] == 4:
-                mode = "RGBA"
+            image_format = image_format if image_format in self.IMAGE_MIME_TYPES else "PNG"
+            image_hash = self._image_hash(array)
+            cache_key = DiskCache.make_key(image_hash, max_edge, image_format, quality, max_bytes)
+            if use_cache:
+                cached = self.image_cache.get(cache_key)
+                if cached:
+                    print(f"[LiveSearch VLM] Reusing encoded image {image_hash[:12]} ({len(cached['data']) * 3 // 4 / 1024:.0f} KB)")
+                    return cached["data"], cached["mime"], image_hash
             
-            pil_image = Image.fromarray(array, mode=mode)
-            buffer = io.BytesIO()
-            pil_image.save(buffer, format="PNG")
-            return base64.b64encode(buffer.getvalue()).decode("utf-8")
+            image_b64, mime = self._encode_image(array, max_edge, image_format, quality, max_bytes)
+            if use_cache:
+                self.image_cache.set(cache_key, {"data": image_b64, "mime": mime}, self.IMAGE_CACHE_TTL)
+            return image_b64, mime, image_hash
         except Exception as e:
             print(f"[LiveSearch] Failed to encode image for TI2T: {e}")
-            return None
+            return None, None, None
+    
+    def _encode_image(self, array, max_edge, image_format, quality, max_bytes):
+        """
+        Encode a uint8 image array. The long edge is capped at max_edge and, if the encoded image
+        is still above max_bytes, quality (JPEG/WEBP) and then size are reduced, down to
+        IMAGE_MIN_QUALITY and IMAGE_MIN_EDGE.
+        Returns (base64_str, mime_type).
+        """
+        mode = "RGB"
+        if array.ndim == 2:
+            mode = "L"
+        elif array.shape[-1] == 4:
+            mode = "RGBA"
+        
+        pil_image = Image.fromarray(array, mode=mode)
+        original_size = pil_image.size
+        if image_format == "JPEG" and pil_image.mode == "RGBA":
+            pil_image = pil_image.convert("RGB")
+        
+        if max_edge and max(pil_image.size) > max_edge:
+            pil_image.thumbnail((max_edge, max_edge), Image.LANCZOS)
+        
+        lossy = image_format in ("JPEG", "WEBP")
+        while True:
+            buffer = io.BytesIO()
+            if lossy:
+                pil_image.save(buffer, format=image_format, quality=quality)
+            else:
+                pil_image.save(buffer, format=image_format)
+            data = buffer.getvalue()
+            if not max_bytes or len(data) <= max_bytes:
+                break
+            # Over budget: trade quality first, then resolution, until both are at their floors
+            long_edge = max(pil_image.size)
+            if lossy and quality > self.IMAGE_MIN_QUALITY:
+                quality = max(self.IMAGE_MIN_QUALITY, quality - 15)
+            elif long_edge > self.IMAGE_MIN_EDGE:
+                scale = max(0.75, self.IMAGE_MIN_EDGE / long_edge)
+                width, height = pil_image.size
+                pil_image = pil_image.resize((max(1, int(width * scale)), max(1, int(height * scale))), Image.LANCZOS)
+            else:
+                break
+        
+        print(f"[LiveSearch VLM] Encoded image {original_size[0]}x{original_size[1]} -> "
+              f"{pil_image.size[0]}x{pil_image.size[1]} {image_format}"
+              f"{f' q{quality}' if lossy else ''}: {len(data) / 1024:.0f} KB")
+        return base64.b64encode(data).decode("utf-8"), self.IMAGE_MIME_TYPES[image_format]
+    
+    @staticmethod
+    def _image_part(image_url, detail="auto"):
+        """Chat Completions image content part for a data URL"""
+        return {"type": "image_url", "image_url": {"url": image_url, "detail": detail}}
     
     @classmethod
     def _is_ti2t_model(cls, provider, model):
@@ -0,0 +1,234 @@
+"""
+LiveSearch Search Backends
+DuckDuckGo and SearXNG (JSON API) behind one interface, plus a router that queries
+one backend or fans out to several in parallel and merges them with reciprocal-rank fusion
+"""
+
+import re
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+try:
+    from ddgs import DDGS
+except ImportError:
+    from duckduckgo_search import DDGS
+
+from .dedup import canonical_url
+from .http_pool import SessionPool
+from .rate_limiter import RateLimiter
+
+
+class SearchBackend:
+    """
+    A web search service. search() returns [{'title', 'url', 'summary'}] in the service's
+    rank order, or raises; retries and throttling are the backend's own business.
+    """
+
+    name = "base"
+
+    @property
+    def key(self):
+        """Cache-key component identifying this backend (and its endpoint)"""
+        return self.name
+
+    def search(self, query, num_results=3, proxy=None, region=None):
+        raise NotImplementedError
+
+
+class DuckDuckGoBackend(SearchBackend):
+    """
+    DuckDuckGo through ddgs; each thread keeps and reuses one client per proxy. ddgs clients
+    are not documented as thread-safe, and a shared lock would let a search that fan-out
+    left behind (up to MAX_RETRIES x TIMEOUT) block every later search in the process.
+    """
+
+    name = "duckduckgo"
+    MAX_RETRIES = 3
+    TIMEOUT = 30
+
+    _local = threading.local()
+
+    @classmethod
+    def _clients(cls):
+        clients = getattr(cls._local, "clients", None)
+        if clients is None:
+            clients = cls._local.clients = {}
+        return clients
+
+    @classmethod
+    def _client(cls, proxy):
+        clients = cls._clients()
+        client = clients.get(proxy or "")
+        if client is None:
+            client = clients[proxy or ""] = DDGS(proxy=proxy, timeout=cls.TIMEOUT)
+        return client
+
+    @staticmethod
+    def _rate_limited(error):
+        """ddgs raises RatelimitException, older duckduckgo_search versions report DDG's 202 reply"""
+        text = f"{type(error).__name__} {error}".lower()
+        return "ratelimit" in text or re.search(r"\b202\b", text) is not None
+
+    def search(self, query, num_results=3, proxy=None, region=None):
+        for attempt in range(self.MAX_RETRIES):
+            # Shared across workflows; throttling below lowers the rate for everyone
+            waited = RateLimiter.wait(RateLimiter.DUCKDUCKGO)
+            if waited >= 0.5:
+                print(f"[LiveSearch] Waited {waited:.1f}s for the DuckDuckGo rate limit")
+            try:
+                ddgs = self._client(proxy)
+                # ddgs.text() returns dicts: {'title', 'href', 'body'}
+                if region:
+                    results = list(ddgs.text(query, region=region, max_results=num_results))
+                else:
+                    results = list(ddgs.text(query, max_results=num_results))
+                if results:
+                    RateLimiter.succeeded(RateLimiter.DUCKDUCKGO)
+                    return [
+                        {'title': res.get('title', ''), 'url': res.get('href', ''), 'summary': res.get('body', '')}
+                        for res in results
+                    ]
+
+                # Empty results may be transient; DDG signals throttling with a ratelimit error (202)
+                if attempt < self.MAX_RETRIES - 1:
+                    print(f"[LiveSearch] DDG returned empty results, retrying ({attempt + 1}/{self.MAX_RETRIES})...")
+            except Exception as e:
+                print(f"[LiveSearch] Search attempt {attempt + 1} failed: {e}")
+                if self._rate_limited(e):
+                    RateLimiter.throttled(RateLimiter.DUCKDUCKGO)
+                else:
+                    # A broken client (closed connection, stale session) is rebuilt on the next attempt
+                    self._clients().pop(proxy or "", None)
+                    if attempt < self.MAX_RETRIES - 1:
+                        time.sleep(2)  # Wait a bit before retry
+        return []
+
+
+class SearXNGBackend(SearchBackend):
+    """
+    SearXNG instance via its JSON API (/search?format=json); the instance must have
+    the json format enabled in settings.yml (search.formats)
+    """
+
+    name = "searxng"
+    TIMEOUT = 15
+
+    def __init__(self, base_url):
+        self.base_url = base_url.rstrip("/")
+
+    @property
+    def key(self):
+        return f"searxng:{self.base_url}"
+
+    def search(self, query, num_results=3, proxy=None, region=None):
+        url = f"{self.base_url}/search"
+        params = {"q": query, "format": "json"}
+        if region:
+            params["language"] = region
+        response = SessionPool.get_session(url, proxy).get(url, params=params, timeout=self.TIMEOUT)
+        response.raise_for_status()
+        results = response.json().get("results") or []
+        return [
+            {'title': res.get('title', ''), 'url': res.get('url', ''), 'summary': res.get('content', '')}
+            for res in results[:num_results]
+            if res.get('url')
+        ]
+
+
+def reciprocal_rank_fusion(result_lists, k=60):
+    """
+    Merge ranked lists: each URL scores sum(1 / (k + rank)) over the lists it appears in.
+    URLs are compared canonicalized; the first copy seen is kept.
+    """
+    scores = {}
+    items = {}
+    for results in result_lists:
+        for rank, res in enumerate(results, start=1):
+            key = canonical_url(res.get('url'))
+            scores[key] = scores.get(key, 0.0) + 1.0 / (k + rank)
+            items.setdefault(key, res)
+    # sorted() is stable, so ties keep first-seen order
+    return [items[key] for key in sorted(items, key=lambda key: -scores[key])]
+
+
+class SearchRouter:
+    """
+    Runs a search on one backend, or on several in parallel. Fan-out waits up to
+    deadline seconds, fuses whatever has answered, and leaves slow backends behind.
+    If nothing has answered by then, the first backend to answer within one more
+    deadline is used; after that the search gives up with no results.
+    """
+
+    RRF_K = 60
+    _executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="livesearch-search")
+
+    def __init__(self, backends, deadline=4.0):
+        self.backends = backends
+        self.deadline = deadline
+
+    @property
+    def key(self):
+        return "+".join(backend.key for backend in self.backends)
+
+    @property
+    def label(self):
+        names = {"duckduckgo": "DuckDuckGo", "searxng": "SearXNG"}
+        return " + ".join(names.get(backend.name, backend.name) for backend in self.backends)
+
+    @classmethod
+    def from_settings(cls, search_settings):
+        """Router for the search_backend / searxng_url / search_deadline settings"""
+        choice = (search_settings or {}).get("search_backend", "DuckDuckGo")
+        searxng_url = ((search_settings or {}).get("searxng_url") or "").strip()
+        deadline = (search_settings or {}).get("search_deadline", 4.0)
+        if choice in ("SearXNG", "Fan-out") and not searxng_url:
+            print(f"[LiveSearch] Warning: search_backend {choice} needs searxng_url, using DuckDuckGo")
+            choice = "DuckDuckGo"
+        if choice == "SearXNG":
+            return cls([SearXNGBackend(searxng_url)], deadline)
+        if choice == "Fan-out":
+            return cls([DuckDuckGoBackend(), SearXNGBackend(searxng_url)], deadline)
+        return cls([DuckDuckGoBackend()], deadline)
+
+    def search(self, query, num_results=3, proxy=None, region=None):
+        if len(self.backends) == 1:
+            try:
+                return self.backends[0].search(query, num_results, proxy, region)
+            except Exception as e:
+                print(f"[LiveSearch] {self.label} search failed: {e}")
+                return []
+
+        started = time.perf_counter()
+        timings = {}
+
+        def run(backend):
+            try:
+                return backend.search(query, num_results, proxy, region)
+            finally:
+                timings[backend.name] = time.perf_counter() - started
+
+        futures = {self._executor.submit(run, backend): backend for backend in self.backends}
+        done, pending = wait(futures, timeout=self.deadline)
+        if not done:
+            # Nothing within the deadline: take the first backend that answers in a second deadline
+            done, pending = wait(futures, timeout=self.deadline, return_when=FIRST_COMPLETED)
+
+        result_lists = []
+        report = []
+        for future, backend in futures.items():
+            if future in pending:
+                report.append(f"{backend.name} still running, skipped")
+                continue
+            try:
+                results = future.result()
+            except Exception as e:
+                report.append(f"{backend.name} failed ({e})")
+                continue
+            result_lists.append(results)
+            report.append(f"{backend.name} {len(results)} in {timings.get(backend.name, 0):.2f}s")
+
+        merged = reciprocal_rank_fusion(result_lists, self.RRF_K)
+        print(f"[LiveSearch] Search fan-out: {', '.join(report)} -> {len(merged)} fused results "
+              f"in {time.perf_counter() - started:.2f}s")
+        return merged
@@ -24,6 +24,25 @@ class LiveSearch_Settings:
             },
             "optional": {
                 "proxy": ("STRING", {"default": "", "placeholder": "http://127.0.0.1:7890 (Optional)"}),
+                "use_cache": ("BOOLEAN", {"default": True, "label_on": "Cache ON", "label_off": "Cache OFF (bypass)"}),
+                "cache_ttl_minutes": ("INT", {"default": 360, "min": 1, "max": 10080, "step": 1}),
+                "reverse_geocoder": (["Offline (GeoNames)", "Nominatim"], {"default": "Offline (GeoNames)"}),
+                "batch_mode": ("BOOLEAN", {"default": False, "label_on": "Batch (one prompt per line)", "label_off": "Single prompt"}),
+                "batch_concurrency": ("INT", {"default": 4, "min": 1, "max": 16, "step": 1}),
+                "engine": (["Threaded", "Asyncio"], {"default": "Threaded"}),
+                "speculative_search": ("BOOLEAN", {"default": False, "label_on": "Speculative search ON", "label_off": "Speculative search OFF"}),
+                "max_page_kb": ("INT", {"default": 1024, "min": 64, "max": 16384, "step": 64}),
+                "html_extractor": (["Auto", "selectolax", "lxml", "BS4"], {"default": "Auto"}),
+                "ddg_qps": ("FLOAT", {"default": 1.0, "min": 0.1, "max": 10.0, "step": 0.1}),
+                "search_backend": (["DuckDuckGo", "SearXNG", "Fan-out"], {"default": "DuckDuckGo"}),
+                "searxng_url": ("STRING", {"default": "", "placeholder": "http://127.0.0.1:8888 (SearXNG with JSON format enabled)"}),
+                "search_deadline": ("FLOAT", {"default": 4.0, "min": 0.5, "max": 30.0, "step": 0.5}),
+                "index_first": ("BOOLEAN", {"default": False, "label_on": "Local page index first", "label_off": "Always search the web"}),
+                "image_max_edge": ("INT", {"default": 1536, "min": 0, "max": 8192, "step": 64}),
+                "image_max_kb": ("INT", {"default": 1024, "min": 0, "max": 20480, "step": 64}),
+                "image_format": (["JPEG", "WEBP", "PNG"], {"default": "JPEG"}),
+                "image_quality": ("INT", {"default": 85, "min": 40, "max": 100, "step": 1}),
+                "image_detail": (["auto", "low", "high"], {"default": "auto"}),
             }
         }
     
@@ -32,7 +51,7 @@ class LiveSearch_Settings:
     FUNCTION = "load_settings"
     CATEGORY = "LiveSearch"
     
-    def load_settings(self, mode, enable_web_search, num_results, output_language, optimize_query, proxy=""):
+    def load_settings(self, mode, enable_web_search, num_results, output_language, optimize_query, proxy="", use_cache=True, cache_ttl_minutes=360, reverse_geocoder="Offline (GeoNames)", batch_mode=False, batch_concurrency=4, engine="Threaded", speculative_search=False, max_page_kb=1024, html_extractor="Auto", ddg_qps=1.0, search_backend="DuckDuckGo", searxng_url="", search_deadline=4.0, index_first=False, image_max_edge=1536, image_max_kb=1024, image_format="JPEG", image_quality=85, image_detail="auto"):
         """
         Load search settings
         Returns a settings dict that can be passed to the search agent
@@ -45,12 +64,31 @@ class LiveSearch_Settings:
             "num_results": num_results,
             "output_language": output_language,
             "optimize_query": optimize_query,
-            "proxy": proxy.strip() if proxy else None
+            "proxy": proxy.strip() if proxy else None,
+            "use_cache": use_cache,
+            "cache_ttl_minutes": cache_ttl_minutes,
+            "reverse_geocoder": reverse_geocoder if reverse_geocoder in ("Offline (GeoNames)", "Nominatim") else "Offline (GeoNames)",
+            "batch_mode": batch_mode,
+            "batch_concurrency": batch_concurrency,
+            "engine": engine if engine in ("Threaded", "Asyncio") else "Threaded",
+            "speculative_search": speculative_search,
+            "max_page_kb": max_page_kb,
+            "html_extractor": html_extractor.lower() if html_extractor in ("Auto", "selectolax", "lxml", "BS4") else "auto",
+            "ddg_qps": ddg_qps,
+            "search_backend": search_backend if search_backend in ("DuckDuckGo", "SearXNG", "Fan-out") else "DuckDuckGo",
+            "searxng_url": searxng_url.strip() if searxng_url else "",
+            "search_deadline": search_deadline,
+            "index_first": index_first,
+            "image_max_edge": image_max_edge,
+            "image_max_kb": image_max_kb,
+            "image_format": image_format if image_format in ("JPEG", "WEBP", "PNG") else "JPEG",
+            "image_quality": image_quality,
+            "image_detail": image_detail if image_detail in ("auto", "low", "high") else "auto"
         }
         
         mode_label = f"{normalized_mode} mode"
         search_mode = "Web Search" if enable_web_search else "LLM Only (No Search)"
-        print(f"[LiveSearch Settings] Configured: {mode_label}, {search_mode}, {num_results} results, Language: {output_language}, Optimize: {optimize_query}")
+        print(f"[LiveSearch Settings] Configured: {mode_label}, {search_mode}, {num_results} results, Language: {output_language}, Optimize: {optimize_query}, Cache: {use_cache}, Batch: {batch_mode}, Engine: {search_settings['engine']}")
         
         return (search_settings,)
 
@@ -0,0 +1,15 @@
+"""
+The repository root is the ComfyUI node package (relative imports). Register it as the
+"livesearch" package without running its __init__, which imports the ComfyUI nodes.
+"""
+
+import os
+import sys
+import types
+
+ROOT = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
+
+if "livesearch" not in sys.modules:
+    package = types.ModuleType("livesearch")
+    package.__path__ = [ROOT]
+    sys.modules["livesearch"] = package
@@ -0,0 +1,72 @@
+import pytest
+
+from livesearch.answer_cache import AnswerCache
+
+SCOPE = "scope"
+
+GENERAL_QUERIES = [
+    "who is the CEO of OpenAI",
+    "best python web framework",
+    "python 3.13 release date",
+    "how tall is mount everest",
+    "capital of australia",
+    "boiling point of water at altitude",
+    "rust vs go performance",
+    "how many moons does jupiter have",
+    "population of tokyo",
+    "what is retrieval augmented generation",
+]
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = AnswerCache()
+    cache.path = str(tmp_path / "answer_cache.sqlite3")
+    return cache
+
+
+@pytest.fixture
+def general_cache(cache):
+    for query in GENERAL_QUERIES:
+        cache.store(query, SCOPE, "general", f"answer: {query}", [f"https://example.com/{len(query)}"])
+    return cache
+
+
+@pytest.mark.parametrize("query", [
+    "who is the CTO of OpenAI",
+    "worst python web framework",
+    "python 3.12 release date",
+    "population of kyoto",
+])
+def test_near_miss_queries_are_not_reused(general_cache, query):
+    assert general_cache.lookup(query, SCOPE, "general") is None
+
+
+def test_other_city_weather_is_not_reused(cache):
+    cache.store("current local time weather Beijing China", SCOPE, "realtime", "Beijing: sunny", ["https://example.com/bj"])
+    assert cache.lookup("current local time weather Nanjing China", SCOPE, "realtime") is None
+
+
+@pytest.mark.parametrize("query, cached_query", [
+    ("Who is the CEO of OpenAI?", "who is the CEO of OpenAI"),
+    ("python 3.13 release", "python 3.13 release date"),
+])
+def test_rephrasings_are_reused(general_cache, query, cached_query):
+    hit = general_cache.lookup(query, SCOPE, "general")
+    assert hit is not None and hit.query == cached_query
+    assert hit.source_urls == [f"https://example.com/{len(cached_query)}"]
+
+
+def test_weather_rephrasings_are_reused(cache):
+    cache.store("weather in Beijing now", SCOPE, "realtime", "Beijing: sunny", ["https://example.com/bj"])
+    for query in ("Beijing weather now!", "weather beijing, now"):
+        assert cache.lookup(query, SCOPE, "realtime").answer == "Beijing: sunny"
+    cache.store("北京 天气", SCOPE, "realtime", "北京：晴", ["https://example.com/bj"])
+    assert cache.lookup("北京天气", SCOPE, "realtime").answer == "北京：晴"
+
+
+def test_scope_and_freshness(cache):
+    cache.store("weather in Beijing now", SCOPE, "realtime", "Beijing: sunny", ["https://example.com/bj"])
+    assert cache.lookup("weather in Beijing now", "other model", "realtime") is None
+    cache._entries[-1]["created_at"] -= AnswerCache.MAX_AGE["realtime"] + 1
+    assert cache.lookup("weather in Beijing now", SCOPE, "realtime") is None
@@ -0,0 +1,90 @@
+import asyncio
+import json
+
+import httpx
+import pytest
+
+from livesearch import failover, hedging
+from livesearch.async_engine import AsyncHTTP, AsyncLLMClient, run_sync
+from livesearch.rate_limiter import RateLimiter
+
+PRIMARY = {
+    "provider": "OpenAI", "model": "slow", "api_key": "k", "base_url": "https://primary.example",
+    "hedge": {"provider": "DeepSeek", "model": "fast", "api_key": "k", "base_url": "https://backup.example"},
+}
+
+
+def test_coroutines_run_on_the_shared_loop():
+    async def loop_id():
+        return id(asyncio.get_running_loop())
+
+    assert run_sync(loop_id(), timeout=5) == run_sync(loop_id(), timeout=5)
+
+
+def test_slow_primary_is_cancelled_when_the_backup_wins(monkeypatch):
+    cancelled = []
+
+    async def primary(config, messages, stats=None):
+        try:
+            await asyncio.sleep(5)
+        except asyncio.CancelledError:
+            cancelled.append(config["provider"])
+            raise
+        return "slow answer"
+
+    async def backup(config, messages, stats=None):
+        return "fast answer"
+
+    monkeypatch.setattr(AsyncLLMClient, "_failover_completion", staticmethod(primary))
+    monkeypatch.setattr(AsyncLLMClient, "_single_completion", staticmethod(backup))
+    monkeypatch.setattr(hedging, "hedge_delay", lambda config: (0.05, "default"))
+    stats = {}
+    answer = run_sync(AsyncLLMClient.chat_completion(PRIMARY, [{"role": "user", "content": "hi"}], stats), timeout=5)
+    assert answer == "fast answer" and cancelled == ["OpenAI"]
+    assert "backup won" in stats["hedge"] and "primary (OpenAI / slow) cancelled after" in stats["hedge"]
+
+
+@pytest.fixture
+def provider(monkeypatch):
+    """Serves each request from the queued (status, headers, body) responses"""
+    responses = []
+
+    def handler(request):
+        status, headers, body = responses.pop(0)
+        return httpx.Response(status, headers=headers, content=body)
+
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    monkeypatch.setattr(AsyncHTTP, "client", classmethod(lambda cls, proxy=None: client))
+    monkeypatch.setattr(failover, "_breakers", {})
+    monkeypatch.setattr(failover, "backoff_delay", lambda attempt, retry_after=None: 0.0)
+    monkeypatch.setattr(RateLimiter, "_exempt_hosts", set())
+    return responses
+
+
+CONFIG = {"provider": "OpenAI", "model": "gpt-4o", "api_key": "k", "base_url": "https://api.example/v1"}
+
+
+def sse(*deltas, done=True):
+    lines = ["data: " + json.dumps({"choices": [{"delta": {"content": delta}}]}) for delta in deltas]
+    return ("\n\n".join(lines + (["data: [DONE]"] if done else [])) + "\n\n").encode()
+
+
+def test_streamed_answer_and_timing(provider):
+    provider.append((200, {"Content-Type": "text/event-stream"}, sse("Sunny", ", 21°C")))
+    stats = {}
+    answer = run_sync(AsyncLLMClient.chat_completion(dict(CONFIG, stream=True), [{"role": "user", "content": "hi"}], stats), timeout=5)
+    assert answer == "Sunny, 21°C"
+    assert stats["complete"] and stats["output_tokens"] == 2
+
+
+def test_retry_after_is_honoured_then_retried(provider):
+    provider.append((429, {"Retry-After": "0"}, b'{"error": {"message": "rate limited"}}'))
+    provider.append((200, {"Content-Type": "application/json"}, json.dumps({"choices": [{"message": {"content": "Sunny"}}]}).encode()))
+    answer = run_sync(AsyncLLMClient.chat_completion(CONFIG, [{"role": "user", "content": "hi"}]), timeout=5)
+    assert answer == "Sunny" and provider == []
+
+
+def test_client_errors_are_not_retried(provider):
+    provider.append((401, {}, b'{"error": {"message": "invalid api key"}}'))
+    answer = run_sync(AsyncLLMClient.chat_completion(CONFIG, [{"role": "user", "content": "hi"}]), timeout=5)
+    assert answer.startswith("Error") and "401" in answer
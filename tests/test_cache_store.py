@@ -0,0 +1,113 @@
+import os
+import threading
+import time
+
+import pytest
+
+from livesearch.cache_store import DiskCache, SingleFlight, classify_query_intent, normalize_query
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(DiskCache, "_instances", [])
+    cache = DiskCache("test")
+    cache.path = str(tmp_path / "test.sqlite3")
+    return cache
+
+
+def test_expired_entries_are_returned_stale(cache):
+    cache.set("fresh", {"a": 1}, ttl=60, meta={"etag": "x"})
+    cache.set("stale", [1, 2], ttl=-1)
+    assert cache.get("fresh") == {"a": 1}
+    assert cache.lookup("fresh").meta == {"etag": "x"}
+    assert cache.get("stale") is None
+    entry = cache.lookup("stale")
+    assert entry.value == [1, 2] and not entry.fresh
+    assert cache.stats() == {"name": "test", "hits": 2, "misses": 2}
+
+
+def test_touch_extends_an_expired_entry(cache):
+    cache.set("page", "body", ttl=-1)
+    cache.touch("page", 60, meta={"etag": "y"})
+    entry = cache.lookup("page")
+    assert entry.fresh and entry.meta == {"etag": "y"}
+
+
+def test_least_recently_used_entries_are_evicted(cache):
+    value = os.urandom(2000).hex()
+    cache.set("a", value, ttl=60)
+    entry_size = cache._connect().execute("SELECT size FROM entries").fetchone()[0]
+    cache.max_bytes = entry_size * 3
+    cache.set("b", value, ttl=60)
+    cache.set("c", value, ttl=60)
+    cache.get("a")
+    cache.set("d", value, ttl=60)
+    assert cache.get("b") is None
+    assert cache.get("a") == value and cache.get("d") == value
+
+
+def run_concurrently(flight, fn, followers=3):
+    """Leader plus followers that join while the leader's call is still running"""
+    outcomes = []
+
+    def call():
+        try:
+            outcomes.append(flight.do("k", fn))
+        except ValueError as e:
+            outcomes.append(e)
+
+    threads = [threading.Thread(target=call) for _ in range(followers + 1)]
+    threads[0].start()
+    fn.started.wait(5)
+    for thread in threads[1:]:
+        thread.start()
+    time.sleep(0.1)
+    fn.release.set()
+    for thread in threads:
+        thread.join(5)
+    return outcomes
+
+
+class SlowCall:
+    def __init__(self, error=None):
+        self.error = error
+        self.calls = 0
+        self.started = threading.Event()
+        self.release = threading.Event()
+
+    def __call__(self):
+        self.calls += 1
+        self.started.set()
+        self.release.wait(5)
+        if self.error:
+            raise self.error
+        return "result"
+
+
+def test_single_flight_shares_one_call():
+    fn = SlowCall()
+    assert run_concurrently(SingleFlight(), fn) == ["result"] * 4
+    assert fn.calls == 1
+
+
+def test_single_flight_propagates_errors_to_followers():
+    flight = SingleFlight()
+    fn = SlowCall(ValueError("search failed"))
+    outcomes = run_concurrently(flight, fn)
+    assert fn.calls == 1
+    assert len(outcomes) == 4 and all(outcome is fn.error for outcome in outcomes)
+    assert flight._calls == {}
+
+
+@pytest.mark.parametrize("query, intent", [
+    ("weather in Paris", "realtime"),
+    ("北京现在几点", "realtime"),
+    ("latest OpenAI announcement", "news"),
+    ("capital of australia", "general"),
+])
+def test_query_intent(query, intent):
+    assert classify_query_intent(query) == intent
+
+
+def test_normalize_query():
+    assert normalize_query("  Weather   IN\tParis ") == "weather in paris"
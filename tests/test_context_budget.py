@@ -0,0 +1,19 @@
+import pytest
+
+from livesearch.context_budget import default_context_window
+
+
+@pytest.mark.parametrize("model, window", [
+    ("gpt-4o", 128000),
+    ("gpt-4o-mini", 128000),
+    ("gpt-4-turbo", 128000),
+    ("gpt-4.1-mini", 1000000),
+    ("gpt-4", 8192),
+    ("gpt-4-0613", 8192),
+])
+def test_openai_model_windows(model, window):
+    assert default_context_window("OpenAI", model) == window
+
+
+def test_unknown_model_uses_provider_window():
+    assert default_context_window("Ollama (Local)", "llama3") == 4096
@@ -0,0 +1,59 @@
+import pytest
+
+from livesearch.dedup import SourceDeduplicator, canonical_url, hamming_distance, simhash
+
+ARTICLE = (
+    "The city council approved the new tram line on Tuesday after a two year planning process. "
+    "Construction of the eleven kilometre route will start next spring and is expected to take three years. "
+    "The line connects the central station with the university campus and the new housing districts in the north. "
+    "Officials estimate that forty thousand passengers will use the trams every weekday once the line opens. "
+    "Residents along the route had raised concerns about noise, parking and the loss of mature trees. "
+    "In response, planners moved two stops, added sound barriers near the hospital and promised to plant "
+    "three new trees for every one removed. Local shop owners asked for compensation during the works, "
+    "and the council agreed to set up a support fund for businesses that lose customers while streets are closed. "
+    "The project is funded jointly by the city, the regional government and a national infrastructure programme, "
+    "with a total budget of about four hundred million euros including new vehicles and a depot."
+)
+OTHER = (
+    "Heavy rain is expected across the region this weekend as a low pressure system moves in from the west. "
+    "Forecasters warn of local flooding in low lying areas and advise drivers to avoid unnecessary journeys. "
+    "Temperatures will stay below the seasonal average until the middle of next week, when drier air returns."
+)
+
+
+@pytest.mark.parametrize("a, b", [
+    ("https://www.example.com/news/tram/", "http://example.com/news/tram"),
+    ("https://m.example.com/news/tram?utm_source=x&id=3&fbclid=y", "https://example.com/news/tram?id=3"),
+    ("https://example.com/a?b=2&a=1#comments", "https://example.com:443/a?a=1&b=2"),
+])
+def test_equivalent_urls_share_a_key(a, b):
+    assert canonical_url(a) == canonical_url(b)
+
+
+@pytest.mark.parametrize("a, b", [
+    ("https://example.com/news/tram?id=3", "https://example.com/news/tram?id=4"),
+    ("https://example.com:8080/a", "https://example.com/a"),
+    ("https://www.example.com/a", "https://blog.example.com/a"),
+])
+def test_different_pages_keep_different_keys(a, b):
+    assert canonical_url(a) != canonical_url(b)
+
+
+def test_near_identical_text_has_close_fingerprints():
+    mirror = ARTICLE.replace("on Tuesday", "on Tuesday evening") + " Share this article."
+    assert hamming_distance(simhash(ARTICLE), simhash(mirror)) <= 6
+    assert hamming_distance(simhash(ARTICLE), simhash(OTHER)) > 6
+
+
+def test_short_text_is_not_fingerprinted():
+    assert simhash("Page not found") is None
+
+
+def test_first_copy_wins():
+    deduplicator = SourceDeduplicator()
+    assert not deduplicator.seen_url("https://www.example.com/tram")
+    assert deduplicator.seen_url("https://example.com/tram/?utm_medium=social")
+    assert deduplicator.duplicate_of("https://a.example/tram", ARTICLE) is None
+    assert deduplicator.duplicate_of("https://b.example/tram", ARTICLE + " Photo: city council.") == "https://a.example/tram"
+    assert deduplicator.duplicate_of("https://c.example/rain", OTHER) is None
+    assert deduplicator.duplicate_of("https://d.example/404", "Not found") is None
@@ -0,0 +1,123 @@
+import time
+from email.utils import formatdate
+
+import pytest
+
+from livesearch import failover
+from livesearch.search_agent import LLMClient
+
+
+def test_fallbacks_do_not_inherit_the_primary_limits():
+    primary = {
+        "provider": "OpenAI", "model": "gpt-4o", "api_key": "sk-a", "temperature": 0.2,
+        "context_window": 128000, "rpm_limit": 500, "tpm_limit": 30000,
+        "hedge": {"provider": "DeepSeek"},
+        "fallbacks": [{"provider": "DeepSeek", "model": "deepseek-chat", "api_key": "sk-b", "base_url": ""}],
+    }
+    configs = failover.chain(primary, [{"role": "user", "content": "hi"}])
+    assert configs[0] is primary
+    fallback = configs[1]
+    assert fallback["provider"] == "DeepSeek" and fallback["temperature"] == 0.2
+    assert not set(failover.PRIMARY_ONLY_KEYS) & set(fallback)
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(failover.time, "monotonic", clock)
+    return clock
+
+
+def test_breaker_opens_after_repeated_failures_and_half_opens(clock):
+    breaker = failover.CircuitBreaker("OpenAI")
+    for _ in range(failover.CircuitBreaker.FAILURE_THRESHOLD):
+        assert breaker.allow()
+        breaker.record_failure()
+    assert not breaker.allow()
+
+    clock.now += failover.CircuitBreaker.RESET_TIMEOUT
+    # Half-open: one trial request, concurrent callers still fail over
+    assert breaker.allow()
+    assert not breaker.allow()
+    breaker.record_failure()
+    assert not breaker.allow()
+
+    clock.now += failover.CircuitBreaker.RESET_TIMEOUT
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.allow() and breaker.allow()
+
+
+def test_abandoned_trial_frees_the_half_open_slot(clock):
+    breaker = failover.CircuitBreaker("OpenAI")
+    breaker.record_failure(open_for=5)
+    clock.now += 5
+    assert breaker.allow() and not breaker.allow()
+    breaker.abandon()
+    assert breaker.allow()
+
+
+def test_long_retry_after_holds_the_breaker_open(clock):
+    breaker = failover.CircuitBreaker("OpenAI")
+    error = failover.ProviderError("Error calling LLM: 429", status=429, retry_after=120)
+    assert failover.should_retry(error, 0) == (False, 0.0)
+    failover.record_outcome(breaker, error)
+    clock.now += 119
+    assert not breaker.allow()
+    clock.now += 1
+    assert breaker.allow()
+
+
+def test_non_transient_errors_count_as_the_provider_being_up(clock):
+    breaker = failover.CircuitBreaker("OpenAI")
+    breaker.record_failure()
+    breaker.record_failure()
+    failover.record_outcome(breaker, failover.ProviderError("Error calling LLM: 401", status=401))
+    breaker.record_failure()
+    assert breaker.allow()
+
+
+@pytest.mark.parametrize("value, seconds", [
+    ("7", 7.0),
+    ("-3", 0.0),
+    ("", None),
+    ("soon", None),
+])
+def test_retry_after_seconds(value, seconds):
+    assert failover.parse_retry_after(value) == seconds
+
+
+def test_retry_after_http_date():
+    value = formatdate(time.time() + 30, usegmt=True)
+    assert 28 <= failover.parse_retry_after(value) <= 30
+
+
+def test_short_retry_after_is_the_backoff_floor():
+    error = failover.response_error("Error calling LLM: 503", 503, {"Retry-After": "2"})
+    retry, delay = failover.should_retry(error, 0)
+    assert retry and 2 <= delay <= 2 + failover.BACKOFF_BASE
+    assert failover.should_retry(error, failover.MAX_ATTEMPTS - 1) == (False, 0.0)
+    assert not failover.should_retry(failover.ProviderError("Error calling LLM: timeout", timeout=True), 0)[0]
+
+
+def test_image_prompts_stay_on_the_primary():
+    primary = {"provider": "OpenAI", "model": "gpt-4o", "fallbacks": [{"provider": "DeepSeek", "model": "deepseek-chat"}]}
+    messages = [{"role": "user", "content": [{"type": "image_url", "image_url": {"url": "data:"}}]}]
+    assert failover.chain(primary, messages) == [primary]
+
+
+def test_failover_answers_from_the_next_entry(monkeypatch):
+    primary = {"provider": "OpenAI", "model": "gpt-4o", "fallbacks": [{"provider": "DeepSeek", "model": "deepseek-chat"}]}
+    answers = {"OpenAI": "Error calling LLM: 503 Service Unavailable", "DeepSeek": "Sunny"}
+    monkeypatch.setattr(LLMClient, "_single_completion", staticmethod(lambda config, messages, stats=None, cancel=None: answers[config["provider"]]))
+    stats = {}
+    assert LLMClient._failover_completion(primary, [{"role": "user", "content": "hi"}], stats) == "Sunny"
+    assert stats["failover"].startswith("Failover: answered by DeepSeek / deepseek-chat after OpenAI / gpt-4o: Error calling LLM: 503")
@@ -0,0 +1,30 @@
+import pytest
+
+from livesearch import hedging
+from livesearch.search_agent import LLMClient
+
+PRIMARY = {
+    "provider": "OpenAI", "model": "slow", "api_key": "k", "base_url": "https://primary.example",
+    "hedge": {"provider": "DeepSeek", "model": "fast", "api_key": "k", "base_url": "https://backup.example"},
+}
+
+
+@pytest.fixture
+def slow_primary(monkeypatch):
+    def primary(config, messages, stats=None, cancel=None):
+        cancel.wait(2)
+        return "Error calling LLM: cancelled" if config.get("stream") else "slow answer"
+
+    monkeypatch.setattr(LLMClient, "_failover_completion", staticmethod(primary))
+    monkeypatch.setattr(LLMClient, "_single_completion", staticmethod(lambda config, messages, stats=None, cancel=None: "fast answer"))
+    monkeypatch.setattr(hedging, "hedge_delay", lambda config: (0.05, "default"))
+
+
+@pytest.mark.parametrize("stream, outcome", [(False, "abandoned (still running)"), (True, "cancelled")])
+def test_losing_primary_is_reported_as_it_ended(slow_primary, stream, outcome):
+    stats = {}
+    config = dict(PRIMARY, stream=stream)
+    answer = LLMClient._hedged_completion(config, hedging.backup_config(config, []), [], stats)
+    assert answer == "fast answer"
+    assert "backup won" in stats["hedge"]
+    assert f"primary (OpenAI / slow) {outcome} after" in stats["hedge"]
@@ -0,0 +1,45 @@
+import pytest
+
+from livesearch.html_extractor import available_backends, get_extractor
+
+XHTML = """<?xml version="1.0" encoding="UTF-8"?>
+<!DOCTYPE html PUBLIC "-//W3C//DTD XHTML 1.0 Strict//EN" "http://www.w3.org/TR/xhtml1/DTD/xhtml1-strict.dtd">
+<html xmlns="http://www.w3.org/1999/xhtml"><head><title>Forecast</title></head>
+<body><div id="content"><p>Light rain in Hangzhou this afternoon, clearing by evening, high of 21 degrees.</p></div></body></html>
+"""
+
+
+@pytest.mark.parametrize("backend", available_backends())
+def test_xhtml_with_encoding_declaration(backend):
+    assert "Light rain in Hangzhou" in get_extractor(backend).extract(XHTML)
+
+
+@pytest.mark.parametrize("backend", available_backends())
+@pytest.mark.parametrize("html", ["", "   \n ", b"", b"\n"])
+def test_empty_documents(backend, html):
+    assert get_extractor(backend).extract(html) == ""
+
+
+@pytest.mark.skipif("lxml" not in available_backends(), reason="lxml not installed")
+def test_lxml_falls_back_to_bs4_on_parser_errors():
+    assert get_extractor("lxml").extract("<!-- only a comment -->") == get_extractor("bs4").extract("<!-- only a comment -->")
+
+
+FORECAST = """<html><body><div class="menu"><a href="/">Home</a> <a href="/radar">Radar</a></div>
+<div class="content-area">
+<section class="current"><h1>Current weather in Munich</h1><span>27 °C</span><span>Sunny, humidity 41 %, wind 6 km/h</span></section>
+<section class="forecast-text"><p>Today will be dry and sunny with highs of 31 °C, a little hotter than yesterday.
+Tonight stays clear and mild with a low of 17 °C, and the heat peaks on Saturday at 33 °C, before thunderstorms,
+some with hail, bring a cooler, showery start to next week.</p></section>
+<table class="forecast-table">""" + "".join(
+    f"<tr><td>{day} Aug</td><td>Sunny intervals</td><td>{28 + day % 5}° / {15 + day % 3}°</td><td>{day * 3} % rain</td></tr>"
+    for day in range(14, 24)
+) + """</table></div></body></html>"""
+
+
+@pytest.mark.parametrize("backend", available_backends())
+def test_main_block_is_widened_to_hold_most_of_the_page(backend):
+    text = get_extractor(backend).extract(FORECAST)
+    assert "Today will be dry and sunny" in text
+    assert "27 °C" in text and "23 Aug" in text
+    assert "Radar" not in text
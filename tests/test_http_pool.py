@@ -0,0 +1,41 @@
+import socket
+
+import pytest
+
+from livesearch.http_pool import SessionPool
+
+
+@pytest.fixture(autouse=True)
+def empty_pool(monkeypatch):
+    monkeypatch.setattr(SessionPool, "_sessions", {})
+    monkeypatch.setattr(SessionPool, "_page_sessions", {})
+
+
+def test_api_sessions_are_per_origin_and_proxy():
+    session = SessionPool.get_session("https://api.example.com/v1/chat/completions")
+    assert SessionPool.get_session("https://API.example.com/v1/responses") is session
+    assert SessionPool.get_session("https://api.example.com/v1", "http://proxy:8080") is not session
+    assert SessionPool.get_session("https://other.example.com/v1") is not session
+
+
+def test_page_fetches_share_one_session_per_proxy():
+    session = SessionPool.page_session()
+    assert SessionPool.page_session(None) is session
+    assert SessionPool.page_session("http://proxy:8080").proxies["https"] == "http://proxy:8080"
+    assert SessionPool._sessions == {}
+
+
+def test_page_session_keeps_a_bounded_number_of_host_pools(monkeypatch):
+    monkeypatch.setattr(SessionPool, "PAGE_HOSTS", 3)
+    manager = SessionPool.page_session().get_adapter("https://").poolmanager
+    pools = [manager.connection_from_url(f"https://host{i}.example.com/") for i in range(5)]
+    assert len(manager.pools) == 3
+    # Evicted pools are closed, which releases their sockets
+    assert pools[0].pool is None and pools[-1].pool is not None
+
+
+def test_getaddrinfo_is_left_alone():
+    original = socket.getaddrinfo
+    SessionPool.get_session("https://api.example.com/")
+    SessionPool.page_session()
+    assert socket.getaddrinfo is original
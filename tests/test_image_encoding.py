@@ -0,0 +1,31 @@
+import base64
+import io
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from livesearch.search_agent import LiveSearch_Agent
+
+
+def encode(array, image_format, max_bytes, quality=90):
+    data, _ = LiveSearch_Agent()._encode_image(array, 1024, image_format, quality, max_bytes)
+    return Image.open(io.BytesIO(base64.b64decode(data))), len(base64.b64decode(data))
+
+
+@pytest.fixture
+def noise():
+    return np.random.default_rng(0).integers(0, 256, (300, 300, 3), dtype=np.uint8)
+
+
+def test_small_lossy_image_still_lowers_quality(noise):
+    small = noise[:200, :200]
+    at_full_quality = encode(small, "JPEG", 0)[1]
+    image, size = encode(small, "JPEG", at_full_quality - 1)
+    # Already below the minimum edge, so only quality can shrink it
+    assert image.size == (200, 200) and size < at_full_quality * 0.8
+
+
+def test_resizing_stops_at_the_minimum_edge(noise):
+    image, _ = encode(noise, "PNG", 1)
+    assert max(image.size) == LiveSearch_Agent.IMAGE_MIN_EDGE
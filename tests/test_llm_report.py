@@ -0,0 +1,59 @@
+import json
+
+from livesearch.search_agent import LiveSearch_Agent, StreamAccumulator
+
+
+def test_streaming_timing_is_reported():
+    accumulator = StreamAccumulator("OpenAI", False)
+    for delta in ("Sunny", ", 21°C"):
+        accumulator.feed("data: " + json.dumps({"choices": [{"delta": {"content": delta}}]}))
+    stats = {}
+    assert accumulator.finish(stats) == "Sunny, 21°C"
+    report = LiveSearch_Agent._llm_report(dict(stats, failover="Failover: x"))
+    assert report.startswith("\nStream: TTFT ") and "2 tokens in " in report and " tok/s)" in report
+    assert report.endswith("\nFailover: x")
+
+
+def test_blocking_calls_report_nothing_extra():
+    assert LiveSearch_Agent._llm_report({}) == ""
+
+
+def stream(lines, max_output_chars=0):
+    accumulator = StreamAccumulator("OpenAI", False, max_output_chars)
+    for line in lines:
+        if accumulator.feed(line):
+            break
+    stats = {}
+    return accumulator.finish(stats), stats
+
+
+CHUNKS = ["data: " + json.dumps({"choices": [{"delta": {"content": delta}}]}) for delta in ("Sunny", ", 21°C")]
+
+
+def test_only_finished_streams_are_complete():
+    assert stream(CHUNKS + ["data: [DONE]"])[1]["complete"]
+    answer, stats = stream(CHUNKS)
+    assert answer == "Sunny, 21°C" and not stats["complete"]
+    assert "stream ended before completion" in LiveSearch_Agent._llm_report(stats)
+    answer, stats = stream(CHUNKS + ["data: [DONE]"], max_output_chars=5)
+    assert answer == "Sunny" and not stats["complete"]
+
+
+class RecordingCache:
+    def __init__(self):
+        self.stored = []
+
+    def store(self, *args):
+        self.stored.append(args)
+
+
+def test_partial_answers_are_not_cached():
+    agent = LiveSearch_Agent()
+    agent.answer_cache = RecordingCache()
+    config = {"provider": "OpenAI", "model": "gpt-4o"}
+    for llm_stats in ({"complete": False, "stopped_early": True}, {"complete": False, "stopped_early": False}):
+        agent._store_answer("weather", "weather", config, "English", "", "Sunny", ["https://a.example"], llm_stats)
+    assert agent.answer_cache.stored == []
+    agent._store_answer("weather", "weather", config, "English", "", "Sunny", ["https://a.example"], {})
+    agent._store_answer("weather", "weather", config, "English", "", "Sunny", ["https://a.example"], {"complete": True})
+    assert len(agent.answer_cache.stored) == 2
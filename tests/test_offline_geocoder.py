@@ -0,0 +1,61 @@
+import math
+import random
+
+import pytest
+
+from livesearch.offline_geocoder import OfflineGeocoder, _KDTree, _to_unit_vector
+
+# GeoNames columns: id, name, asciiname, alternatenames, lat, lon, class, code, country, cc2, admin1, ..., population (14)
+PLACES = [
+    ("Beijing", 39.9075, 116.39723, "PPLC", "CN", "22", 18960744),
+    ("Haidian", 39.95667, 116.31028, "PPLX", "CN", "22", 2240124),
+    ("Tongzhou", 39.90278, 116.6575, "PPL", "CN", "22", 70000),
+    ("Munich", 48.13743, 11.57549, "PPLA", "DE", "02", 1260391),
+    ("Freising", 48.40351, 11.74876, "PPLA3", "DE", "02", 45223),
+]
+
+
+@pytest.fixture
+def geocoder(tmp_path):
+    rows = []
+    for i, (name, lat, lon, code, country, admin1, population) in enumerate(PLACES):
+        fields = [str(i), name, name, "", str(lat), str(lon), "P", code, country, "", admin1, "", "", "", str(population)]
+        rows.append("\t".join(fields + ["", "", "Asia/Shanghai", "2026-01-01"]))
+    (tmp_path / "cities15000.txt").write_text("\n".join(rows) + "\n", encoding="utf-8")
+    (tmp_path / "admin1CodesASCII.txt").write_text("CN.22\tBeijing\tBeijing\t2038349\nDE.02\tBavaria\tBavaria\t2951839\n", encoding="utf-8")
+    (tmp_path / "countryInfo.txt").write_text("#ISO\tISO3\tISO-Numeric\tfips\tCountry\nCN\tCHN\t156\tCH\tChina\nDE\tDEU\t276\tGM\tGermany\n", encoding="utf-8")
+    geocoder = OfflineGeocoder(data_dir=str(tmp_path))
+    geocoder.load(auto_download=False)
+    return geocoder
+
+
+def test_nearest_city_with_state_and_country(geocoder):
+    assert geocoder.reverse(48.14, 11.58) == {"city": "Munich", "state": "Bavaria", "country": "Germany", "country_code": "de"}
+
+
+def test_small_places_are_towns(geocoder):
+    assert geocoder.reverse(48.40, 11.75)["town"] == "Freising"
+
+
+def test_city_sections_are_reported_as_suburbs(geocoder):
+    address = geocoder.reverse(39.96, 116.30)
+    assert address["city"] == "Beijing" and address["suburb"] == "Haidian"
+
+
+def test_far_from_any_place_is_none(geocoder):
+    assert geocoder.reverse(0.0, -30.0) is None
+
+
+def test_missing_gazetteer_without_download_raises(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        OfflineGeocoder(data_dir=str(tmp_path)).load(auto_download=False)
+
+
+def test_kd_tree_matches_brute_force():
+    rng = random.Random(0)
+    points = [_to_unit_vector(rng.uniform(-90, 90), rng.uniform(-180, 180)) for _ in range(500)]
+    tree = _KDTree(points)
+    for _ in range(50):
+        query = _to_unit_vector(rng.uniform(-90, 90), rng.uniform(-180, 180))
+        expected = sorted(range(len(points)), key=lambda i: math.dist(query, points[i]))[:5]
+        assert [index for _, index in tree.query(query, 5)] == expected
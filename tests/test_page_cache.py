@@ -0,0 +1,93 @@
+import pytest
+
+from livesearch.cache_store import DiskCache
+from livesearch.page_index import PageIndex
+from livesearch.search_agent import SearchTool, SessionPool
+
+PAGE = b"<html><head><title>Paris weather</title></head><body><main><p>" + b"Paris is sunny and 24 degrees today. " * 20 + b"</p></main></body></html>"
+
+
+class FakeResponse:
+    def __init__(self, status_code, headers, body=b""):
+        self.status_code = status_code
+        self.headers = headers
+        self.body = body
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise RuntimeError(self.status_code)
+
+    def iter_content(self, chunk_size):
+        for start in range(0, len(self.body), chunk_size):
+            yield self.body[start:start + chunk_size]
+
+
+class FakeSession:
+    def __init__(self, *responses):
+        self.responses = list(responses)
+        self.requests = []
+
+    def get(self, url, headers=None, **kwargs):
+        self.requests.append(headers)
+        return self.responses.pop(0)
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(DiskCache, "_instances", [])
+    cache = DiskCache("page_content")
+    cache.path = str(tmp_path / "page_content.sqlite3")
+    index = PageIndex()
+    index.path = str(tmp_path / "page_index.sqlite3")
+    monkeypatch.setattr(SearchTool, "page_cache", cache)
+    monkeypatch.setattr(SearchTool, "page_index", index)
+    return cache
+
+
+def fetch_with(monkeypatch, session):
+    monkeypatch.setattr(SessionPool, "page_session", classmethod(lambda cls, proxy=None: session))
+    return SearchTool.fetch_url_content("https://a.example/paris")
+
+
+@pytest.mark.parametrize("cache_control, ttl", [
+    ("", SearchTool.PAGE_CACHE_TTL),
+    ("public, max-age=600", 600),
+    ("max-age=99999999", SearchTool.PAGE_CACHE_MAX_TTL),
+    ("private, no-store", None),
+])
+def test_page_ttl_follows_cache_control(cache_control, ttl):
+    assert SearchTool._page_cache_ttl({"Cache-Control": cache_control}) == ttl
+
+
+def test_fresh_pages_are_served_without_a_request(cache, monkeypatch):
+    headers = {"Content-Type": "text/html", "ETag": '"v1"'}
+    text = fetch_with(monkeypatch, FakeSession(FakeResponse(200, headers, PAGE)))
+    assert "sunny" in text
+    session = FakeSession()
+    assert fetch_with(monkeypatch, session) == text and session.requests == []
+
+
+def test_stale_pages_are_revalidated(cache, monkeypatch):
+    headers = {"Content-Type": "text/html", "ETag": '"v1"', "Last-Modified": "Mon, 12 Oct 2026 08:00:00 GMT"}
+    text = fetch_with(monkeypatch, FakeSession(FakeResponse(200, headers, PAGE)))
+    cache.touch("https://a.example/paris", -1)
+
+    session = FakeSession(FakeResponse(304, {"Cache-Control": "max-age=60"}))
+    assert fetch_with(monkeypatch, session) == text
+    assert session.requests[0]["If-None-Match"] == '"v1"'
+    assert session.requests[0]["If-Modified-Since"] == headers["Last-Modified"]
+    entry = cache.lookup("https://a.example/paris")
+    # The 304 extends the entry and keeps the validators it did not resend
+    assert entry.fresh and entry.meta["etag"] == '"v1"'
+
+
+def test_no_store_pages_are_not_cached(cache, monkeypatch):
+    headers = {"Content-Type": "text/html", "Cache-Control": "no-store"}
+    assert fetch_with(monkeypatch, FakeSession(FakeResponse(200, headers, PAGE)))
+    assert cache.lookup("https://a.example/paris") is None
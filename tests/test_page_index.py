@@ -0,0 +1,69 @@
+import pytest
+
+from livesearch.page_index import PageIndex
+from livesearch.search_agent import SearchTool
+
+SHANGHAI = ("Shanghai weather today: current local time 14:05, temperature 21°C, light rain, "
+            "humidity 80 percent, wind from the east. Shanghai, China forecast for the week.")
+
+
+@pytest.fixture
+def index(tmp_path):
+    index = PageIndex()
+    index.path = str(tmp_path / "page_index.sqlite3")
+    return index
+
+
+def test_other_city_pages_do_not_match(index):
+    index.add("https://a.example/shanghai", "Shanghai weather", SHANGHAI)
+    index.add("https://b.example/shanghai", "Shanghai, China weather", SHANGHAI + " Updated hourly.")
+    assert index.lookup("current local time weather Beijing China", 3, "realtime") is None
+    assert len(index.lookup("current local time weather Shanghai China", 3, "realtime")) == 2
+
+
+def test_stale_pages_do_not_match(index):
+    index.add("https://a.example/shanghai", "Shanghai weather", SHANGHAI)
+    index.add("https://b.example/shanghai", "Shanghai weather", SHANGHAI)
+    index._connect().execute("UPDATE pages SET fetched_at = fetched_at - ?", (PageIndex.MAX_AGE["realtime"] + 1,))
+    assert index.lookup("Shanghai weather", 3, "realtime") is None
+    assert index.lookup("Shanghai weather", 3, "general") is not None
+
+
+def test_downloads_are_indexed_with_their_title(index, monkeypatch):
+    monkeypatch.setattr(SearchTool, "page_index", index)
+    body = '<html><head><meta charset="gbk"><title>上海天气 &amp; 时间</title></head></html>'.encode("gbk")
+    SearchTool._index_page("https://a.example/sh", SHANGHAI, body, "text/html")
+    # A 304 revalidation refreshes the fetch time but keeps the title
+    SearchTool._index_page("https://a.example/sh", SHANGHAI)
+    assert index.search("Shanghai", 1, 60)[0].title == "上海天气 & 时间"
+
+
+def test_refetched_pages_replace_their_terms(index):
+    index.add("https://a.example/shanghai", "Shanghai weather", SHANGHAI)
+    index.add("https://a.example/shanghai", None, "Shanghai typhoon warning: ferries suspended, schools closed.")
+    assert index.search("Shanghai typhoon ferries", 3, 60)[0].title == "Shanghai weather"
+    assert index.search("Shanghai humidity wind", 3, 60) == []
+
+
+def test_chinese_queries_match_chinese_pages(index):
+    text = "上海今天天气：小雨，气温21度，东风3级，湿度80%。"
+    index.add("https://a.example/sh", "上海天气", text)
+    index.add("https://b.example/sh", "上海天气预报", text + "未来三天多云。")
+    assert len(index.lookup("上海天气", 3, "realtime")) == 2
+    assert index.lookup("北京天气", 3, "realtime") is None
+
+
+def test_lookup_needs_enough_pages(index):
+    index.add("https://a.example/shanghai", "Shanghai weather", SHANGHAI)
+    assert index.lookup("Shanghai weather", 3, "realtime") is None
+    assert len(index.lookup("Shanghai weather", 1, "realtime")) == 1
+
+
+def test_surplus_pages_are_pruned(index, monkeypatch):
+    monkeypatch.setattr(PageIndex, "MAX_PAGES", 3)
+    monkeypatch.setattr(PageIndex, "PRUNE_EVERY", 5)
+    for i in range(5):
+        index.add(f"https://a.example/{i}", "Shanghai weather", SHANGHAI)
+    urls = [row[0] for row in index._connect().execute("SELECT url FROM pages ORDER BY id")]
+    assert urls == ["https://a.example/2", "https://a.example/3", "https://a.example/4"]
+    assert index._connect().execute("SELECT COUNT(*) FROM pages_fts").fetchone()[0] == 3
@@ -0,0 +1,37 @@
+from livesearch.passage_ranker import estimate_tokens, select_passages, split_passages, tokenize
+
+FILLER = "\n".join(f"Section {i}: the museum shop sells postcards, posters and books about the collection." for i in range(40))
+HOURS = "Opening hours: the museum is open daily from 9:00 to 18:00, and until 21:00 on Fridays."
+
+
+def test_cjk_runs_become_bigrams():
+    assert tokenize("What is the 北京天气 today") == ["北京", "京天", "天气", "today"]
+    assert tokenize("雨") == ["雨"]
+
+
+def test_estimate_counts_cjk_per_character():
+    assert estimate_tokens("天气晴") == 3
+    assert estimate_tokens("a" * 40) == 10
+
+
+def test_long_lines_are_split_at_sentences():
+    line = " ".join(f"Sentence number {i} is here." for i in range(60))
+    passages = split_passages(line, target_chars=200)
+    assert len(passages) > 5 and all(len(passage) <= 400 for passage in passages)
+
+
+def test_relevant_passages_are_selected_in_document_order():
+    text = f"{FILLER}\n{HOURS}\n{FILLER}\nTickets cost 15 euros for adults."
+    selected = select_passages(text, "opening hours and tickets", 250)
+    assert "until 21:00 on Fridays" in selected and "Tickets cost" in selected
+    assert selected.index("Fridays") < selected.index("Tickets")
+    assert estimate_tokens(selected) <= 250 + 10
+
+
+def test_no_overlap_keeps_the_beginning():
+    selected = select_passages(FILLER, "volcano eruption", 50)
+    assert selected.startswith("Section 0:") and estimate_tokens(selected) <= 50
+
+
+def test_short_text_is_returned_whole():
+    assert select_passages(HOURS, "hours", 1000) == HOURS
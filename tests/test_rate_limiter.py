@@ -0,0 +1,106 @@
+import pytest
+
+from livesearch.rate_limiter import RateLimiter, TokenBucket
+from livesearch.search_backends import DuckDuckGoBackend
+
+
+@pytest.fixture(autouse=True)
+def empty_registry(monkeypatch):
+    monkeypatch.setattr(RateLimiter, "_buckets", {})
+    monkeypatch.setattr(RateLimiter, "_host_keys", set())
+    monkeypatch.setattr(RateLimiter, "_pruned", {"requests": 0, "waited": 0.0, "max_wait": 0.0, "throttles": 0})
+
+
+def test_idle_host_buckets_are_pruned(monkeypatch):
+    monkeypatch.setattr(RateLimiter, "MAX_HOST_BUCKETS", 4)
+    RateLimiter.wait("nominatim.openstreetmap.org")
+    RateLimiter.bucket(RateLimiter.DUCKDUCKGO, 2.0, 2)
+    for i in range(10):
+        RateLimiter.wait(f"site{i}.example")
+        # A second later the bucket is full again
+        RateLimiter._buckets[f"site{i}.example"].updated -= 1
+    # Page hosts stay bounded, configured buckets stay
+    assert len(RateLimiter._host_keys) <= 4
+    assert {"nominatim.openstreetmap.org", RateLimiter.DUCKDUCKGO} <= set(RateLimiter._buckets)
+    # Pruned buckets still count in the stats
+    assert sum(item["requests"] for item in RateLimiter.stats()) == 11
+
+
+def test_busy_host_buckets_are_kept(monkeypatch):
+    monkeypatch.setattr(RateLimiter, "MAX_HOST_BUCKETS", 1)
+    RateLimiter.bucket("busy.example").throttled()
+    RateLimiter.bucket("other.example")
+    assert "busy.example" in RateLimiter._buckets
+
+
+class FakeDDGS:
+    def __init__(self, outcomes):
+        self.outcomes = list(outcomes)
+
+    def text(self, query, max_results=3, region=None):
+        outcome = self.outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+
+class RatelimitException(Exception):
+    pass
+
+
+@pytest.mark.parametrize("outcomes, throttles", [
+    ([[], [], []], 0),
+    ([RatelimitException("https://html.duckduckgo.com/html 202 Ratelimit"), [{"href": "https://a.example"}]], 1),
+])
+def test_duckduckgo_throttles_only_on_ratelimit(monkeypatch, outcomes, throttles):
+    monkeypatch.setattr(DuckDuckGoBackend, "_client", classmethod(lambda cls, proxy: client))
+    client = FakeDDGS(outcomes)
+    RateLimiter.bucket(RateLimiter.DUCKDUCKGO, 1000.0, 1000)
+    DuckDuckGoBackend().search("weather")
+    assert RateLimiter.bucket(RateLimiter.DUCKDUCKGO).throttles == throttles
+
+
+def test_reservations_queue_callers_in_arrival_order(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr("livesearch.rate_limiter.time.monotonic", lambda: now[0])
+    bucket = TokenBucket(rate=2.0, capacity=2)
+    assert [bucket.reserve() for _ in range(4)] == [0.0, 0.0, 0.5, 1.0]
+    now[0] += 2.0
+    assert bucket.reserve() == 0.0
+    assert bucket.max_wait == 1.0 and bucket.requests == 5
+
+
+def test_throttling_halves_the_rate_and_success_recovers_it():
+    bucket = TokenBucket(rate=4.0, capacity=4)
+    bucket.throttled()
+    assert bucket.rate == 2.0 and bucket.tokens <= 0
+    for _ in range(5):
+        bucket.throttled()
+    assert bucket.rate == 4.0 * TokenBucket.MIN_RATE_RATIO
+    for _ in range(100):
+        bucket.succeeded()
+    assert bucket.rate == 4.0
+
+
+def test_reconfiguring_keeps_a_throttled_rate():
+    bucket = TokenBucket(rate=4.0, capacity=4)
+    bucket.throttled()
+    bucket.configure(8.0, 8)
+    assert bucket.rate == 2.0 and bucket.max_rate == 8.0
+
+
+def test_llm_limits_from_the_model_config():
+    config = {"provider": "OpenAI", "rpm_limit": 600, "tpm_limit": 60000}
+    assert RateLimiter.llm_limits(config, 1500) == [
+        ("llm-rpm:OpenAI", 1, 10.0, 60),
+        ("llm-tpm:OpenAI", 1500, 1000.0, 60000),
+    ]
+    assert RateLimiter.llm_limits({"provider": "OpenAI"}, 1500) == []
+
+
+def test_exempt_hosts_never_wait(monkeypatch):
+    monkeypatch.setattr(RateLimiter, "_exempt_hosts", set())
+    RateLimiter.exempt_url("https://api.example.com/v1/chat/completions")
+    for _ in range(20):
+        assert RateLimiter.wait("api.example.com") == 0.0
+    assert "api.example.com" not in RateLimiter._buckets
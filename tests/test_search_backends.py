@@ -0,0 +1,74 @@
+import time
+
+import pytest
+
+from livesearch.search_backends import SearchRouter, reciprocal_rank_fusion
+
+
+def results(*urls):
+    return [{"title": url, "url": url, "summary": ""} for url in urls]
+
+
+class FakeBackend:
+    def __init__(self, name, urls=(), delay=0.0, error=None):
+        self.name = self.key = name
+        self.urls = urls
+        self.delay = delay
+        self.error = error
+
+    def search(self, query, num_results=3, proxy=None, region=None):
+        time.sleep(self.delay)
+        if self.error:
+            raise self.error
+        return results(*self.urls)
+
+
+def urls(items):
+    return [item["url"] for item in items]
+
+
+def test_rrf_ranks_urls_found_by_both_backends_first():
+    merged = reciprocal_rank_fusion([
+        results("https://a.example/1", "https://b.example/2", "https://c.example/3"),
+        results("https://d.example/4", "https://www.c.example/3/?utm_source=searx"),
+    ])
+    # c is in both lists; the first copy seen is kept
+    assert urls(merged) == ["https://c.example/3", "https://a.example/1", "https://d.example/4", "https://b.example/2"]
+
+
+def test_rrf_ties_keep_first_seen_order():
+    merged = reciprocal_rank_fusion([results("https://a.example"), results("https://b.example")])
+    assert urls(merged) == ["https://a.example", "https://b.example"]
+
+
+def test_slow_backends_are_left_behind_at_the_deadline():
+    router = SearchRouter([FakeBackend("fast", ["https://a.example"]), FakeBackend("slow", ["https://b.example"], delay=1.0)], deadline=0.2)
+    started = time.perf_counter()
+    assert urls(router.search("q")) == ["https://a.example"]
+    assert time.perf_counter() - started < 0.8
+
+
+def test_first_answer_after_the_deadline_is_used():
+    router = SearchRouter([FakeBackend("slow", ["https://a.example"], delay=0.3), FakeBackend("slower", ["https://b.example"], delay=2.0)], deadline=0.2)
+    started = time.perf_counter()
+    assert urls(router.search("q")) == ["https://a.example"]
+    assert time.perf_counter() - started < 1.0
+
+
+def test_failed_backends_are_skipped():
+    router = SearchRouter([FakeBackend("broken", error=RuntimeError("503")), FakeBackend("ok", ["https://a.example"])], deadline=0.5)
+    assert urls(router.search("q")) == ["https://a.example"]
+
+
+def test_single_backend_errors_give_no_results():
+    assert SearchRouter([FakeBackend("broken", error=RuntimeError("503"))]).search("q") == []
+
+
+@pytest.mark.parametrize("settings, label", [
+    ({}, "DuckDuckGo"),
+    ({"search_backend": "SearXNG", "searxng_url": "http://localhost:8888/"}, "SearXNG"),
+    ({"search_backend": "Fan-out", "searxng_url": "http://localhost:8888"}, "DuckDuckGo + SearXNG"),
+    ({"search_backend": "SearXNG"}, "DuckDuckGo"),
+])
+def test_router_from_settings(settings, label):
+    assert SearchRouter.from_settings(settings).label == label
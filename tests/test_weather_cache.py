@@ -0,0 +1,64 @@
+import pytest
+
+from livesearch.search_agent import SearchTool, SessionPool
+
+
+class FakeSession:
+    def __init__(self):
+        self.params = []
+
+    def get(self, url, params=None, timeout=None):
+        self.params.append(params)
+        return self
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return {"timezone": "Europe/Paris", "current": {"temperature_2m": 21.5, "weather_code": 1, "time": "2026-10-17T14:00"}}
+
+
+@pytest.fixture
+def session(monkeypatch):
+    session = FakeSession()
+    monkeypatch.setattr(SearchTool, "_weather_cache", {})
+    monkeypatch.setattr(SessionPool, "get_session", classmethod(lambda cls, url, proxy=None: session))
+    return session
+
+
+@pytest.mark.parametrize("lat, lon, grid, cell", [
+    (48.85661, 2.35222, 0.01, (48.86, 2.35)),
+    (48.85661, 2.35222, 0.1, (48.9, 2.4)),
+    (-33.8688, 151.2093, 0.25, (-33.75, 151.25)),
+    (48.85661, 2.35222, 1, (49, 2)),
+    (0.3, 0.7, 0.1, (0.3, 0.7)),
+])
+def test_coordinates_snap_to_the_grid(lat, lon, grid, cell):
+    assert SearchTool._weather_cell(lat, lon, grid) == cell
+
+
+def test_nearby_coordinates_share_one_request(session):
+    first = SearchTool.get_weather_data(48.8566, 2.3522)
+    second = SearchTool.get_weather_data(48.8581, 2.3539)
+    assert "Temperature: 21.5 °C" in first and "Temperature: 21.5 °C" in second
+    assert len(session.params) == 1
+    assert (session.params[0]["latitude"], session.params[0]["longitude"]) == (48.86, 2.35)
+    SearchTool.get_weather_data(48.8, 2.35)
+    assert len(session.params) == 2
+
+
+def test_entries_expire_at_the_update_boundary(session, monkeypatch):
+    now = 1_800_000_000 + 14 * 60
+    monkeypatch.setattr("livesearch.search_agent.time.time", lambda: now)
+    SearchTool.get_weather_data(48.8566, 2.3522)
+    expires_at = SearchTool._weather_cache[(48.86, 2.35)][0]
+    assert expires_at == 1_800_000_000 + SearchTool.WEATHER_UPDATE_INTERVAL
+    now = expires_at
+    SearchTool.get_weather_data(48.8566, 2.3522)
+    assert len(session.params) == 2
+
+
+def test_cache_can_be_bypassed(session):
+    SearchTool.get_weather_data(48.8566, 2.3522)
+    SearchTool.get_weather_data(48.8566, 2.3522, use_cache=False)
+    assert len(session.params) == 2